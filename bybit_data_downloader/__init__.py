@@ -5,10 +5,12 @@ A Python package for downloading historical and live data from ByBit exchange.
 """
 
 from .historical.ByBitHistoricalDataDownloader import ByBitHistoricalDataDownloader
+from .historical.AsyncByBitHistoricalDataDownloader import AsyncByBitHistoricalDataDownloader
 
 __version__ = "1.0.0"
 __author__ = "AdityaLakkad"
 
 __all__ = [
     "ByBitHistoricalDataDownloader",
+    "AsyncByBitHistoricalDataDownloader",
 ]
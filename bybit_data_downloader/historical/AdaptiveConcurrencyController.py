@@ -0,0 +1,191 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+
+import httpx
+
+class Transfer:
+    """Book-keeping for one in-flight transfer holding a concurrency slot."""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.bytes = 0
+
+class AdaptiveConcurrencyController:
+    """
+    AIMD controller for the number of in-flight transfers.
+
+    Works like a semaphore whose size changes at runtime. Every completed
+    transfer is recorded; once per window the controller compares aggregate
+    throughput and latency with the previous window and raises the limit by
+    one while throughput keeps improving. Throttling (429), server errors (5xx)
+    and transport failures halve the limit immediately. The limit always stays
+    within [min_limit, max_limit]; with min_limit == max_limit it behaves as a
+    plain fixed-size semaphore.
+    """
+
+    def __init__(self, initial: int, min_limit: Optional[int] = None, max_limit: Optional[int] = None,
+                 window: int = 8, decrease_factor: float = 0.5):
+        """
+        Initialize the controller.
+
+        Args:
+            initial: Starting number of in-flight transfers
+            min_limit: Lower bound for the limit (default: initial)
+            max_limit: Upper bound for the limit (default: initial)
+            window: Completed transfers per evaluation window (default: 8)
+            decrease_factor: Multiplier applied on congestion (default: 0.5)
+        """
+        min_limit = initial if min_limit is None else min_limit
+        max_limit = initial if max_limit is None else max_limit
+        if not 1 <= min_limit <= initial <= max_limit:
+            raise ValueError("Concurrency bounds must satisfy 1 <= min_limit <= initial <= max_limit")
+
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.window = window
+        self.decrease_factor = decrease_factor
+
+        self._limit = initial
+        self._in_flight = 0
+        self._condition = threading.Condition()
+
+        self._window_started = time.monotonic()
+        self._window_bytes = 0
+        self._window_latencies: List[float] = []
+        self._last_throughput = 0.0
+        self._base_latency: Optional[float] = None
+        self._errors = 0
+        self._peak = initial
+        self._listeners: List[Callable[[int], None]] = []
+
+    @property
+    def adaptive(self) -> bool:
+        """Whether the limit is allowed to move at all."""
+        return self.min_limit != self.max_limit
+
+    @property
+    def limit(self) -> int:
+        """Current number of transfers allowed in flight."""
+        return self._limit
+
+    def set_bounds(self, min_limit: int, max_limit: int) -> None:
+        """Change the limit bounds at runtime, clamping the current limit."""
+        if not 1 <= min_limit <= max_limit:
+            raise ValueError("Concurrency bounds must satisfy 1 <= min_limit <= max_limit")
+        with self._condition:
+            previous = self._limit
+            self.min_limit = min_limit
+            self.max_limit = max_limit
+            self._limit = min(max(self._limit, min_limit), max_limit)
+            self._limit_changed(previous)
+            self._condition.notify_all()
+
+    @contextmanager
+    def listen(self, callback: Callable[[int], None]) -> Iterator[None]:
+        """
+        Call callback with the new limit whenever it changes during the block.
+
+        The callback runs on whichever thread changed the limit, with the
+        controller's lock held, so it must be quick and must not call back
+        into the controller.
+        """
+        with self._condition:
+            self._listeners.append(callback)
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._listeners.remove(callback)
+
+    @contextmanager
+    def slot(self) -> Iterator[Transfer]:
+        """
+        Hold one transfer slot for the duration of the block.
+
+        The yielded Transfer should have its ``bytes`` updated as data arrives.
+        Exceptions escaping the block are classified as congestion signals.
+        """
+        with self._condition:
+            while self._in_flight >= self._limit:
+                self._condition.wait()
+            self._in_flight += 1
+
+        transfer = Transfer()
+        try:
+            yield transfer
+        except Exception as e:
+            self._record(transfer, congested=self._is_congestion(e))
+            raise
+        else:
+            self._record(transfer, congested=False)
+
+    def stats(self) -> Dict[str, int]:
+        """Return the settled limit and counters for run statistics."""
+        return {
+            'concurrency_limit': self._limit,
+            'concurrency_peak': self._peak,
+            'concurrency_errors': self._errors,
+        }
+
+    def _is_congestion(self, error: Exception) -> bool:
+        """Decide whether a failed transfer indicates overload."""
+        if isinstance(error, httpx.HTTPStatusError):
+            status = error.response.status_code
+            return status == 429 or status >= 500
+        return isinstance(error, httpx.TransportError)
+
+    def _record(self, transfer: Transfer, congested: bool) -> None:
+        """Release a slot and update the limit from the transfer outcome."""
+        elapsed = time.monotonic() - transfer.started
+
+        with self._condition:
+            self._in_flight -= 1
+            previous = self._limit
+
+            if congested:
+                self._errors += 1
+                if self.adaptive:
+                    self._limit = max(self.min_limit, int(self._limit * self.decrease_factor))
+                    self._reset_window()
+            else:
+                self._window_bytes += transfer.bytes
+                self._window_latencies.append(elapsed)
+                if self.adaptive and len(self._window_latencies) >= self.window:
+                    self._evaluate_window()
+
+            self._peak = max(self._peak, self._limit)
+            self._limit_changed(previous)
+            self._condition.notify_all()
+
+    def _limit_changed(self, previous: int) -> None:
+        """Tell the listeners about a new limit. Called with the lock held."""
+        if self._limit != previous:
+            for callback in self._listeners:
+                callback(self._limit)
+
+    def _evaluate_window(self) -> None:
+        """Additive increase while throughput grows and latency stays sane."""
+        duration = max(time.monotonic() - self._window_started, 1e-6)
+        throughput = self._window_bytes / duration
+        latency = sorted(self._window_latencies)[len(self._window_latencies) // 2]
+
+        if self._base_latency is None or latency < self._base_latency:
+            self._base_latency = latency
+
+        latency_inflated = latency > 2 * self._base_latency
+        if throughput >= self._last_throughput * 0.95 and not latency_inflated:
+            self._limit = min(self.max_limit, self._limit + 1)
+        elif throughput < self._last_throughput * 0.8 or latency_inflated:
+            # Adding transfers made things worse, step back gently
+            self._limit = max(self.min_limit, self._limit - 1)
+
+        self._last_throughput = throughput
+        self._reset_window()
+
+    def _reset_window(self) -> None:
+        """Start a fresh measurement window."""
+        self._window_started = time.monotonic()
+        self._window_bytes = 0
+        self._window_latencies = []
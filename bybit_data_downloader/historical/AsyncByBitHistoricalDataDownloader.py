@@ -0,0 +1,362 @@
+import asyncio
+import functools
+import logging
+import os
+from typing import List, Dict, Optional
+from pathlib import Path
+import httpx
+
+from .HistoricalDownloaderBase import HistoricalDownloaderBase
+
+class AsyncByBitHistoricalDataDownloader(HistoricalDownloaderBase):
+    """
+    An asyncio-based downloader for Bybit historical data.
+
+    Mirrors the ByBitHistoricalDataDownloader API, but keeps all transfers on a
+    single event loop using httpx.AsyncClient. Concurrency is bounded by a
+    semaphore instead of a thread pool, so hundreds of transfers can be in
+    flight from one process.
+
+    File system work (stat, mkdir, opening and writing files) runs on the
+    loop's default executor so a slow disk never stalls the other transfers.
+    """
+
+    # Received chunks are gathered into blocks of this size before each write
+    WRITE_BLOCK_SIZE = 1024 * 1024
+
+    def __init__(self, parallel_downloads: int = 50, timeout: int = 30):
+        """
+        Initialize the async Bybit data downloader.
+
+        Args:
+            parallel_downloads: Maximum number of in-flight transfers (default: 50)
+            timeout: Request timeout in seconds (default: 30)
+        """
+        self.parallel_downloads = parallel_downloads
+        self.timeout = timeout
+        self.download_timeout = max(timeout, 60)
+
+        logging.basicConfig(level=logging.INFO)
+        self.logger = logging.getLogger(__name__)
+
+        self.headers = dict(self.HEADERS)
+
+        # The AsyncClient is bound to the event loop it is first used on, so it
+        # is created lazily inside the running loop.
+        self._client: Optional[httpx.AsyncClient] = None
+
+    async def __aenter__(self) -> "AsyncByBitHistoricalDataDownloader":
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """Close the shared async HTTP connection pool."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Return the shared AsyncClient, creating it on first use."""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.parallel_downloads + 2,
+                    max_keepalive_connections=self.parallel_downloads + 2,
+                    keepalive_expiry=60
+                )
+            )
+        return self._client
+
+    async def fetch_symbols(self, biz_type: str, product_id: str) -> List[str]:
+        """
+        Fetch available symbols for the specified market and product type.
+
+        Args:
+            biz_type: Market type ('spot' or 'contract')
+            product_id: Data type ('trade' or 'orderbook')
+
+        Returns:
+            List of available symbols
+
+        Raises:
+            ValueError: If invalid parameters provided
+            httpx.RequestError: If API request fails
+        """
+        self._validate_biz_type(biz_type)
+        self._validate_product_id(product_id)
+
+        url = f"{self.BASE_URL}/list-options"
+        params = {
+            'bizType': biz_type,
+            'productId': product_id
+        }
+
+        try:
+            response = await self._get_client().get(url, params=params, headers=self.headers)
+            response.raise_for_status()
+
+            data = response.json()
+            if data.get('ret_code') != 0:
+                raise Exception(f"API Error: {data.get('ret_msg', 'Unknown error')}")
+
+            symbols = data.get('result', {}).get('symbols', [])
+            self.logger.info(f"Fetched {len(symbols)} symbols for {biz_type}/{product_id}")
+            return symbols
+
+        except httpx.RequestError as e:
+            self.logger.error(f"Failed to fetch symbols: {e}")
+            raise
+
+    async def _get_download_files(self, symbol: str, start_date: str, end_date: str,
+                                  biz_type: str, product_id: str) -> List[Dict]:
+        """
+        Get download file information for a specific date range.
+
+        Args:
+            symbol: Trading pair symbol
+            start_date: Start date in 'YYYY-MM-DD' format
+            end_date: End date in 'YYYY-MM-DD' format
+            biz_type: Market type ('spot' or 'contract')
+            product_id: Data type ('trade' or 'orderbook')
+
+        Returns:
+            List of file information dictionaries
+        """
+        url = f"{self.BASE_URL}/list-files"
+        params = {
+            'bizType': biz_type,
+            'productId': product_id,
+            'symbols': symbol,
+            'interval': 'daily',
+            'periods': '',
+            'startDay': start_date,
+            'endDay': end_date
+        }
+
+        try:
+            response = await self._get_client().get(url, params=params, headers=self.headers)
+            response.raise_for_status()
+
+            data = response.json()
+            if data.get('ret_code') != 0:
+                raise Exception(f"API Error: {data.get('ret_msg', 'Unknown error')}")
+
+            return data.get('result', {}).get('list', [])
+
+        except httpx.RequestError as e:
+            self.logger.error(f"Failed to get file list: {e}")
+            raise
+
+    def _in_executor(self, func, *args, **kwargs) -> asyncio.Future:
+        """Start a blocking call on the loop's default executor and return its future."""
+        return asyncio.get_running_loop().run_in_executor(None, functools.partial(func, *args, **kwargs))
+
+    @staticmethod
+    def _has_size(file_path: Path, expected_size: int) -> bool:
+        """Return True if file_path exists and is exactly expected_size bytes."""
+        return file_path.exists() and file_path.stat().st_size == expected_size
+
+    async def _write_stream(self, response: httpx.Response, part_path: Path, mode: str) -> None:
+        """
+        Write a streamed response body to part_path without blocking the loop.
+
+        Chunks are gathered into WRITE_BLOCK_SIZE blocks and each block is
+        written on the executor while the next one is received. At most one
+        write per transfer is outstanding, so blocks land in order.
+
+        Args:
+            response: Streaming response whose body is written
+            part_path: Partial file to write to
+            mode: 'ab' to append to the partial file, 'wb' to start it over
+        """
+        f = await self._in_executor(open, part_path, mode)
+        pending = None
+        try:
+            block = bytearray()
+            async for chunk in response.aiter_bytes(chunk_size=65536):
+                block += chunk
+                if len(block) >= self.WRITE_BLOCK_SIZE:
+                    if pending is not None:
+                        await pending
+                    pending = self._in_executor(f.write, block)
+                    block = bytearray()
+
+            if pending is not None:
+                await pending
+            if block:
+                pending = self._in_executor(f.write, block)
+                await pending
+        finally:
+            # Never close the file under a write that is still running
+            if pending is not None and not pending.done():
+                await asyncio.wait([pending])
+            await self._in_executor(f.close)
+
+    async def _download_file(self, file_info: Dict, output_dir: str,
+                             semaphore: asyncio.Semaphore) -> bool:
+        """
+        Download a single file with retry logic.
+
+        Uses the same '.part' file resume scheme as the threaded downloader.
+
+        Args:
+            file_info: File information dictionary from API
+            output_dir: Output directory path
+            semaphore: Semaphore bounding the number of in-flight transfers
+
+        Returns:
+            True if download successful, False otherwise
+        """
+        url = file_info['url']
+        filename = file_info['filename']
+        file_path = Path(output_dir) / filename
+        part_path = file_path.with_name(filename + '.part')
+        expected_size = int(file_info.get('size', 0))
+
+        # Skip if file already exists and has correct size
+        if expected_size > 0 and await self._in_executor(self._has_size, file_path, expected_size):
+            self.logger.info(f"File already exists: {filename}")
+            return True
+
+        await self._in_executor(file_path.parent.mkdir, parents=True, exist_ok=True)
+        client = self._get_client()
+
+        max_retries = 3
+        for attempt in range(max_retries):
+            try:
+                offset, headers = await self._in_executor(self._resume_state, part_path, expected_size)
+
+                if expected_size == 0 or offset < expected_size:
+                    async with semaphore:
+                        async with client.stream('GET', url, headers=headers,
+                                                 timeout=self.download_timeout) as response:
+                            if response.status_code == 416:
+                                await self._in_executor(self._discard_partial, part_path)
+                                raise Exception("Requested range not satisfiable, restarting from scratch")
+                            response.raise_for_status()
+
+                            mode = self._resume_mode(response, offset, expected_size)
+                            await self._in_executor(self._save_validator, part_path, response)
+                            await self._write_stream(response, part_path, mode)
+
+                # Verify file size
+                actual_size = (await self._in_executor(part_path.stat)).st_size
+
+                if expected_size > 0 and actual_size != expected_size:
+                    self.logger.warning(f"Size mismatch for {filename}: expected {expected_size}, got {actual_size}")
+                    if actual_size > expected_size:
+                        await self._in_executor(self._discard_partial, part_path)
+                    continue
+
+                await self._in_executor(os.replace, part_path, file_path)
+                await self._in_executor(self._discard_partial, part_path)
+                self.logger.info(f"Downloaded: {filename} ({actual_size:,} bytes)")
+                return True
+
+            except Exception as e:
+                self.logger.error(f"Download attempt {attempt + 1} failed for {filename}: {e}")
+
+                # Back off outside the semaphore so the slot goes to another file
+                if attempt < max_retries - 1:
+                    await asyncio.sleep(2 ** attempt)
+
+        self.logger.error(f"Failed to download {filename} after {max_retries} attempts")
+        return False
+
+    async def download_data(self, symbol: str, start_date: str, end_date: str,
+                            biz_type: str, product_id: str, output_dir: str = "./data") -> Dict[str, int]:
+        """
+        Download historical data for the specified parameters.
+
+        Args:
+            symbol: Trading pair symbol (e.g., 'BTCUSDT')
+            start_date: Start date in 'YYYY-MM-DD' format
+            end_date: End date in 'YYYY-MM-DD' format
+            biz_type: Market type ('spot' or 'contract')
+            product_id: Data type ('trade' or 'orderbook')
+            output_dir: Output directory path (default: './data')
+
+        Returns:
+            Dictionary with download statistics
+
+        Raises:
+            ValueError: If invalid parameters provided
+        """
+        self._validate_request([biz_type], [product_id], start_date, end_date)
+
+        self.logger.info(f"Starting download: {symbol} {biz_type}/{product_id} from {start_date} to {end_date}")
+
+        date_chunks = self._split_date_range(start_date, end_date)
+        self.logger.info(f"Split into {len(date_chunks)} date chunks")
+
+        # List all chunks concurrently
+        results = await asyncio.gather(
+            *(self._get_download_files(symbol, chunk_start, chunk_end, biz_type, product_id)
+              for chunk_start, chunk_end in date_chunks),
+            return_exceptions=True
+        )
+
+        all_files = []
+        for (chunk_start, chunk_end), result in zip(date_chunks, results):
+            if isinstance(result, Exception):
+                self.logger.error(f"Failed to get files for {chunk_start} to {chunk_end}: {result}")
+                continue
+            all_files.extend(result)
+            self.logger.info(f"Found {len(result)} files for {chunk_start} to {chunk_end}")
+
+        if not all_files:
+            self.logger.warning("No files found for the specified parameters")
+            return {'total_files': 0, 'downloaded': 0, 'failed': 0}
+
+        output_path = Path(output_dir) / biz_type / product_id / symbol
+        await self._in_executor(output_path.mkdir, parents=True, exist_ok=True)
+
+        self.logger.info(f"Starting async download of {len(all_files)} files...")
+        semaphore = asyncio.Semaphore(self.parallel_downloads)
+        results = await asyncio.gather(
+            *(self._download_file(file_info, str(output_path), semaphore) for file_info in all_files),
+            return_exceptions=True
+        )
+
+        successful = 0
+        failed = 0
+        for file_info, result in zip(all_files, results):
+            if isinstance(result, Exception):
+                self.logger.error(f"Download task failed for {file_info['filename']}: {result}")
+                failed += 1
+            elif result:
+                successful += 1
+            else:
+                failed += 1
+
+        stats = {
+            'total_files': len(all_files),
+            'downloaded': successful,
+            'failed': failed
+        }
+
+        self.logger.info(f"Download completed: {successful}/{len(all_files)} files successful")
+        return stats
+
+    def _run_sync(self, coro):
+        """Run a coroutine to completion on a fresh event loop and close the client."""
+        async def runner():
+            try:
+                return await coro
+            finally:
+                await self.aclose()
+        return asyncio.run(runner())
+
+    def fetch_symbols_sync(self, biz_type: str, product_id: str) -> List[str]:
+        """Blocking wrapper around fetch_symbols() for non-async callers."""
+        return self._run_sync(self.fetch_symbols(biz_type, product_id))
+
+    def download_data_sync(self, symbol: str, start_date: str, end_date: str,
+                           biz_type: str, product_id: str, output_dir: str = "./data") -> Dict[str, int]:
+        """Blocking wrapper around download_data() for non-async callers."""
+        return self._run_sync(
+            self.download_data(symbol, start_date, end_date, biz_type, product_id, output_dir)
+        )
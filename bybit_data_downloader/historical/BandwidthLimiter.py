@@ -0,0 +1,103 @@
+import threading
+import time
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+class BandwidthLimiter:
+    """
+    Global bytes-per-second cap shared by every concurrent transfer.
+
+    A byte-denominated token bucket that may go into debt: a transfer always
+    consumes the chunk it just received, then sleeps until the bucket is back
+    in credit. Sleeping happens on a condition variable, so raising the limit
+    with set_rate() takes effect for waiting transfers immediately and nobody
+    polls. An optional daily schedule overrides the base rate inside
+    'HH:MM'-'HH:MM' local-time windows.
+    """
+
+    def __init__(self, rate: Optional[float] = None,
+                 schedule: Optional[List[Tuple[str, str, Optional[float]]]] = None,
+                 burst_seconds: float = 0.25):
+        """
+        Initialize the limiter.
+
+        Args:
+            rate: Base limit in bytes per second, None for unlimited
+            schedule: (start 'HH:MM', end 'HH:MM', bytes per second or None)
+                windows in local time; windows may wrap past midnight and the
+                first matching window wins
+            burst_seconds: Seconds worth of bytes that may be sent in a burst
+                (default: 0.25)
+        """
+        self._rate = rate
+        self._schedule = [
+            (self._parse_time(start), self._parse_time(end), window_rate)
+            for start, end, window_rate in (schedule or [])
+        ]
+        self._burst_seconds = burst_seconds
+        self._tokens = 0.0
+        self._updated = time.monotonic()
+        self._condition = threading.Condition()
+
+    @property
+    def enabled(self) -> bool:
+        """Whether any limit is configured at all."""
+        return self._rate is not None or bool(self._schedule)
+
+    def set_rate(self, rate: Optional[float]) -> None:
+        """Change the base limit at runtime; None removes it."""
+        with self._condition:
+            self._refill(self._current_rate())
+            self._rate = rate
+            self._condition.notify_all()
+
+    def current_rate(self) -> Optional[float]:
+        """Return the limit in effect right now, in bytes per second."""
+        return self._current_rate()
+
+    def consume(self, nbytes: int) -> None:
+        """Account for nbytes received and block while over the limit."""
+        with self._condition:
+            rate = self._current_rate()
+            if rate is None:
+                return
+            self._refill(rate)
+            self._tokens -= nbytes
+
+            while self._tokens < 0:
+                rate = self._current_rate()
+                if rate is None:
+                    self._tokens = 0.0
+                    return
+                # Re-check at least once a second so schedule changes apply
+                self._condition.wait(min(-self._tokens / rate, 1.0))
+                self._refill(self._current_rate())
+
+    def _refill(self, rate: Optional[float]) -> None:
+        """Add the tokens earned since the last update, capped at the burst size."""
+        now = time.monotonic()
+        if rate is not None:
+            self._tokens = min(rate * self._burst_seconds, self._tokens + (now - self._updated) * rate)
+        self._updated = now
+
+    def _current_rate(self) -> Optional[float]:
+        """Pick the scheduled rate for the current local time, or the base rate."""
+        if self._schedule:
+            now = datetime.now()
+            minute = now.hour * 60 + now.minute
+            for start, end, window_rate in self._schedule:
+                inside = start <= minute < end if start <= end else (minute >= start or minute < end)
+                if inside:
+                    return window_rate
+        return self._rate
+
+    def _parse_time(self, value: str) -> int:
+        """Convert 'HH:MM' into minutes after midnight."""
+        try:
+            hours, minutes = value.split(':')
+            result = int(hours) * 60 + int(minutes)
+        except ValueError:
+            raise ValueError(f"Invalid schedule time: {value}. Use 'HH:MM'")
+        if not 0 <= result <= 24 * 60:
+            raise ValueError(f"Invalid schedule time: {value}. Use 'HH:MM'")
+        return result
@@ -1,14 +1,35 @@
+import hashlib
+import heapq
 import logging
 import os
+import shutil
+import socket
+import threading
 import time
-from datetime import datetime, timedelta
-from typing import List, Dict, Tuple, Optional
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Iterable, Iterator, List, Dict, Tuple, Optional, Union
 from pathlib import Path
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, wait
 import httpx
 import json
+import multiprocessing
 
-class ByBitHistoricalDataDownloader:
+from .AdaptiveConcurrencyController import AdaptiveConcurrencyController
+from .BandwidthLimiter import BandwidthLimiter
+from .CoverageReport import CoverageReport
+from .EgressPool import EgressPath, EgressPool
+from .HistoricalDownloaderBase import HistoricalDownloaderBase
+from .JobQueue import DONE as FILE_DONE, IN_FLIGHT, JobQueue
+from .LeaseStore import LeaseStore
+from .DownloadManifest import TEMPORARY_SUFFIXES, DownloadManifest
+from .MetadataCache import MetadataCache, file_day
+from .RateLimiter import create_token_bucket
+from .RetryPolicy import COMPLETED, DONE, FATAL, RETRY, SKIPPED, RetryPolicy
+from .SchedulingPolicy import resolve_policy
+from .StreamVerifier import StreamVerifier, verify_path
+from .WriteBehindWriter import WriteBehindWriter
+
+class ByBitHistoricalDataDownloader(HistoricalDownloaderBase):
     """
     A high-performance synchronous downloader for Bybit historical data.
     
@@ -16,100 +37,344 @@ class ByBitHistoricalDataDownloader:
     with automatic date range splitting and parallel downloads using threading.
     """
     
-    BASE_URL = "https://www.bybit.com/x-api/quote/public/support/download"
-    
-    def __init__(self, parallel_downloads: int = 5, timeout: int = 30):
+    def __init__(self, parallel_downloads: int = 5, timeout: int = 30,
+                 segments: int = 1, segment_threshold: int = 64 * 1024 * 1024,
+                 adaptive_concurrency: bool = False,
+                 min_parallel_downloads: int = 1,
+                 max_parallel_downloads: Optional[int] = None,
+                 metadata_rate_limit: Optional[float] = None,
+                 download_rate_limit: Optional[float] = None,
+                 rate_limit_dir: Optional[str] = None,
+                 listing_concurrency: int = 4,
+                 cache_dir: Optional[str] = None,
+                 cache_ttl: float = 3600,
+                 cache_recent_days: int = 2,
+                 symbols_ttl: float = 3600,
+                 validate_symbols: bool = False,
+                 chunk_size: int = 1024 * 1024,
+                 write_behind: bool = True,
+                 checksum: Optional[str] = 'crc32',
+                 verify_archives: bool = True,
+                 max_retries: int = 3,
+                 retry_base_delay: float = 1.0,
+                 retry_max_delay: float = 60.0,
+                 scheduling: Union[str, Callable[[Dict], Any]] = 'largest_first',
+                 bandwidth_limit: Optional[float] = None,
+                 bandwidth_schedule: Optional[List[Tuple[str, str, Optional[float]]]] = None,
+                 warm_connections: int = 0,
+                 proxies: Optional[List[str]] = None,
+                 download_mirrors: Optional[List[str]] = None,
+                 egress_direct: bool = True,
+                 manifest_path: Optional[str] = None,
+                 max_queued_files: int = 10000,
+                 job_queue_path: Optional[str] = None,
+                 cpu_workers: int = 0,
+                 max_pending_cpu: Optional[int] = None,
+                 post_process: Optional[Callable[[str], Any]] = None):
         """
         Initialize the Bybit data downloader.
         
         Args:
             parallel_downloads: Maximum number of concurrent downloads (default: 5)
             timeout: Request timeout in seconds (default: 30)
+            segments: Number of byte ranges fetched concurrently for a single
+                large file (default: 1, i.e. no segmentation)
+            segment_threshold: Minimum file size in bytes before a file is split
+                into segments (default: 64 MiB)
+            adaptive_concurrency: Let an AIMD controller move the number of
+                in-flight transfers at runtime, starting from parallel_downloads
+                (default: False)
+            min_parallel_downloads: Lower bound for adaptive concurrency (default: 1)
+            max_parallel_downloads: Upper bound for adaptive concurrency
+                (default: 4 * parallel_downloads)
+            metadata_rate_limit: Requests per second allowed to list-options and
+                list-files (default: None, unlimited)
+            download_rate_limit: Requests per second allowed to the file CDN
+                (default: None, unlimited)
+            rate_limit_dir: Directory holding shared rate limiter state so that
+                all processes on the host share the budgets above (default: None,
+                per-process budgets)
+            listing_concurrency: Number of 7-day chunks listed concurrently
+                (default: 4)
+            cache_dir: Directory for the persistent list-files metadata cache
+                (default: None, no caching)
+            cache_ttl: Seconds a cached listing of a recent day stays valid;
+                older days are cached indefinitely (default: 3600)
+            cache_recent_days: Number of trailing days treated as recent
+                (default: 2)
+            symbols_ttl: Seconds fetched symbol lists stay valid (default: 3600)
+            validate_symbols: Reject symbols not listed by list-options before
+                any files are listed (default: False)
+            chunk_size: Size in bytes of the reusable write buffers (default: 1 MiB)
+            write_behind: Write to disk from a dedicated thread per transfer so
+                network reads never stall on disk (default: True)
+            checksum: Running checksum computed while streaming: 'crc32',
+                'sha256', 'xxh64' (requires xxhash) or None (default: 'crc32')
+            verify_archives: Incrementally check that .gz/.zip files are valid
+                archives while streaming (default: True)
+            max_retries: Default maximum attempts per file (default: 3)
+            retry_base_delay: Smallest delay between attempts in seconds (default: 1.0)
+            retry_max_delay: Largest delay between attempts in seconds (default: 60.0)
+            scheduling: Order in which listed files are started: 'largest_first',
+                'smallest_first', 'oldest_first', 'newest_first', 'listing_order',
+                or a callable returning a sort key for a file information
+                dictionary (default: 'largest_first')
+            bandwidth_limit: Cap in bytes per second across all concurrent
+                transfers (default: None, unlimited)
+            bandwidth_schedule: Daily (start 'HH:MM', end 'HH:MM', bytes per
+                second or None) windows in local time that override
+                bandwidth_limit (default: None)
+            warm_connections: Connections pre-opened to each file host as soon
+                as its first file is listed. The host's transfers wait for the
+                warm-up (at most one request timeout), so they start on hot
+                sockets (default: 0, disabled)
+            proxies: HTTP proxy URLs to spread file transfers across
+                (default: None)
+            download_mirrors: Base URLs that serve the same file paths as the
+                listed file host, used as additional transfer paths (default: None)
+            egress_direct: Also send transfers directly when proxies or mirrors
+                are configured (default: True)
+            manifest_path: SQLite manifest of completed downloads. When set,
+                skip checks are manifest lookups instead of per-file stat calls,
+                and checksums are stored there; without it, nothing but the
+                data files is written to the output directory (default: None)
+            max_queued_files: Listed files that may wait for a worker before
+                listing pauses, which bounds memory on very large runs
+                (default: 10000)
+            job_queue_path: SQLite checkpoint of download_data/download_many
+                jobs. A job that was interrupted resumes from its checkpoint
+                when run again with the same parameters (default: None)
+            cpu_workers: Size of the process pool for CPU-bound stages
+                (verifying segmented downloads, post_process); 0 runs them in
+                the transfer threads (default: 0)
+            max_pending_cpu: Files that may wait for the CPU stage before
+                transfers are held back (default: twice cpu_workers)
+            post_process: Called in the process pool with the path of every
+                newly downloaded file, e.g. to convert it; must be a picklable
+                top-level function. Requires cpu_workers (default: None)
         """
+        if segments < 1:
+            raise ValueError("segments must be at least 1")
+        if max_queued_files < 1:
+            raise ValueError("max_queued_files must be at least 1")
+        if post_process is not None and cpu_workers < 1:
+            raise ValueError("post_process requires cpu_workers")
+        
         self.parallel_downloads = parallel_downloads
         self.timeout = timeout
+        self.download_timeout = max(timeout, 60)
+        self.segments = segments
+        self.segment_threshold = segment_threshold
+        self.listing_concurrency = listing_concurrency
+        self.max_queued_files = max_queued_files
+        self.cpu_workers = cpu_workers
+        self.max_pending_cpu = max_pending_cpu or max(1, cpu_workers * 2)
+        self.post_process = post_process
+        self._cpu_pool: Optional[ProcessPoolExecutor] = None
+        self._cpu_pool_lock = threading.Lock()
+        self._cpu_slots = threading.BoundedSemaphore(self.max_pending_cpu)
+        self._retry_policy = RetryPolicy(max_retries, retry_base_delay, retry_max_delay)
+        self._schedule_key = resolve_policy(scheduling)
+        self._bandwidth = BandwidthLimiter(bandwidth_limit, bandwidth_schedule)
+        self.warm_connections = warm_connections
+        self.chunk_size = chunk_size
+        self.write_behind = write_behind
+        self.checksum = checksum
+        self.verify_archives = verify_archives
+        self._verification_enabled = checksum is not None or verify_archives
+        # Fail fast on an unknown or unavailable checksum algorithm
+        StreamVerifier('', checksum, verify_archives)
+        
+        if adaptive_concurrency:
+            self._concurrency = AdaptiveConcurrencyController(
+                parallel_downloads,
+                min_limit=min(min_parallel_downloads, parallel_downloads),
+                max_limit=max_parallel_downloads or parallel_downloads * 4
+            )
+        else:
+            self._concurrency = AdaptiveConcurrencyController(parallel_downloads)
+        
+        self._metadata_cache = None
+        if cache_dir is not None:
+            self._metadata_cache = MetadataCache(
+                os.path.join(cache_dir, 'metadata.sqlite'), ttl=cache_ttl, recent_days=cache_recent_days
+            )
+        
+        self._manifest = DownloadManifest(manifest_path) if manifest_path is not None else None
+        self._job_queue = JobQueue(job_queue_path) if job_queue_path is not None else None
+        
+        self.symbols_ttl = symbols_ttl
+        self.check_symbols = validate_symbols
+        self._symbols: Dict[Tuple[str, str], Tuple[float, List[str]]] = {}
+        self._symbols_lock = threading.Lock()
+        
+        # Bytes received by all transfers, and the throughput of the last run
+        self._bytes_received = 0
+        self._bytes_lock = threading.Lock()
+        self._throughput: Optional[float] = None
+        
+        self._metadata_limiter = create_token_bucket('metadata', metadata_rate_limit,
+                                                     state_dir=rate_limit_dir)
+        self._download_limiter = create_token_bucket('download', download_rate_limit,
+                                                     state_dir=rate_limit_dir)
         
         # Setup logging
         logging.basicConfig(level=logging.INFO)
         self.logger = logging.getLogger(__name__)
         
-        # Default headers based on the curl commands
-        self.headers = {
-            'accept': '*/*',
-            'accept-language': 'en-US,en;q=0.9',
-            'priority': 'u=1, i',
-            'sec-ch-ua': '"Not)A;Brand";v="8", "Chromium";v="138", "Google Chrome";v="138"',
-            'sec-ch-ua-mobile': '?0',
-            'sec-ch-ua-platform': '"macOS"',
-            'sec-fetch-dest': 'empty',
-            'sec-fetch-mode': 'cors',
-            'sec-fetch-site': 'same-origin',
-            'user-agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
-        }
+        self.headers = dict(self.HEADERS)
+        
+        # One long-lived, thread-safe connection pool shared by all requests.
+        # Keep-alive slots match the number of parallel transfers (including
+        # segments) plus the concurrent list-options/list-files calls.
+        self._client = self._make_client()
+        
+        # Transfers can be spread over several egress paths (direct, proxies,
+        # mirror base URLs); metadata requests always use the direct client
+        paths = [EgressPath('direct', self._client)] if egress_direct or not (proxies or download_mirrors) else []
+        for proxy in proxies or []:
+            paths.append(EgressPath(f"proxy:{proxy}", self._make_client(proxy)))
+        for mirror in download_mirrors or []:
+            paths.append(EgressPath(f"mirror:{mirror}", self._client, base_url=mirror))
+        self._egress = EgressPool(paths)
     
-    def help(self) -> None:
-        """Display usage information and parameter details."""
-        help_text = """
-        Bybit Data Downloader - Usage Guide
-        ==================================
-        
-        Parameters:
-        -----------
-        symbol: str
-            - Trading pair symbol (e.g., 'BTCUSDT', 'ETHUSDT')
-            - Use fetch_symbols() to get available symbols
-        
-        start_date: str
-            - Start date in 'YYYY-MM-DD' format
-            - Example: '2025-01-01'
-        
-        end_date: str
-            - End date in 'YYYY-MM-DD' format
-            - Example: '2025-01-07'
-        
-        biz_type: str
-            - Market type: 'spot' or 'contract'
-        
-        product_id: str
-            - Data type: 'trade' or 'orderbook'
-        
-        parallel_downloads: int
-            - Number of concurrent downloads (1-20 recommended)
-            - Default: 5
-        
-        Example Usage:
-        --------------
-        downloader = ByBitHistoricalDataDownloader(parallel_downloads=10)
-        
-        # Fetch available symbols
-        symbols = downloader.fetch_symbols('spot', 'trade')
-        
-        # Download trade data
-        downloader.download_data(
-            symbol='BTCUSDT',
-            start_date='2025-01-01',
-            end_date='2025-01-31',
-            biz_type='spot',
-            product_id='trade',
-            output_dir='./data'
+    def _make_client(self, proxy: Optional[str] = None) -> httpx.Client:
+        """Create a pooled keep-alive client, optionally routed through a proxy."""
+        max_connections = self._concurrency.max_limit * self.segments + self.listing_concurrency
+        return httpx.Client(
+            timeout=self.timeout,
+            proxy=proxy,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+                keepalive_expiry=60
+            )
         )
+    
+    def __enter__(self) -> "ByBitHistoricalDataDownloader":
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+    
+    def close(self) -> None:
+        """Close the shared HTTP connection pools, process pool, metadata cache, manifest and job queue."""
+        self._egress.close(keep=self._client)
+        self._client.close()
+        if self._metadata_cache is not None:
+            self._metadata_cache.close()
+        if self._manifest is not None:
+            self._manifest.close()
+        if self._job_queue is not None:
+            self._job_queue.close()
+        if self._cpu_pool is not None:
+            self._cpu_pool.shutdown()
+            self._cpu_pool = None
+    
+    def set_bandwidth_limit(self, bytes_per_second: Optional[float]) -> None:
+        """
+        Change the global bandwidth cap at runtime, including for running transfers.
         
-        Supported Markets:
-        ------------------
-        - biz_type: 'spot', 'contract'
-        - product_id: 'trade', 'orderbook'
+        Args:
+            bytes_per_second: New cap, or None to remove it (scheduled windows
+                still apply)
+        """
+        self._bandwidth.set_rate(bytes_per_second)
+    
+    def warm_up(self, url: str, connections: Optional[int] = None) -> int:
+        """
+        Pre-resolve a host and pre-open pooled keep-alive connections to it.
+        
+        The host name is resolved once up front (warming the system resolver
+        cache), then concurrent HEAD requests force the pool to establish that
+        many TCP+TLS connections, which stay open for the transfers that follow.
+        The HEAD requests take tokens from download_rate_limit like transfers.
         
-        Note: API supports maximum 7-day ranges. Larger ranges are automatically split.
+        Args:
+            url: Any URL on the host to warm up, typically a listed file URL
+            connections: Number of connections to open (default: warm_connections,
+                capped at the maximum number of transfers)
+            
+        Returns:
+            Number of connections successfully opened
         """
-        print(help_text)
+        connections = min(connections or self.warm_connections, self._concurrency.max_limit)
+        if connections <= 0:
+            return 0
+        
+        parsed = httpx.URL(url)
+        try:
+            socket.getaddrinfo(parsed.host, parsed.port or (443 if parsed.scheme == 'https' else 80),
+                               type=socket.SOCK_STREAM)
+        except OSError as e:
+            self.logger.debug(f"Pre-resolving {parsed.host} failed: {e}")
+            return 0
+        
+        def open_connection(path):
+            # HEAD requests count against the download endpoint's rate limit too
+            if self._download_limiter:
+                self._download_limiter.acquire()
+            try:
+                path.client.head(path.rewrite(url), timeout=self.timeout)
+                return True
+            except httpx.HTTPError:
+                return False
+            except RuntimeError:
+                # The client was closed while the warm-up was still running
+                return False
+        
+        # Every egress path keeps its own connections to its own host
+        targets = [path for path in self._egress.paths for _ in range(connections)]
+        with ThreadPoolExecutor(max_workers=connections) as executor:
+            opened = sum(executor.map(open_connection, targets))
+        self.logger.info(f"Warmed up {opened} connections to {parsed.host}")
+        return opened
     
-    def fetch_symbols(self, biz_type: str, product_id: str) -> List[str]:
+    def rebuild_manifest(self, output_dir: str = "./data", verify: bool = False,
+                         workers: int = 8) -> int:
+        """
+        Rebuild the manifest entries below output_dir from a scan of the disk.
+        
+        Directories are listed concurrently. Files whose size still matches
+        their record keep it; other files are checksummed again with verify.
+        Records of files that are gone are dropped.
+        
+        Args:
+            output_dir: Output directory path (default: './data')
+            verify: Checksum and archive-check files without a usable record
+                (default: False)
+            workers: Number of directories listed concurrently (default: 8)
+            
+        Returns:
+            Number of files recorded
+            
+        Raises:
+            ValueError: If the downloader was created without manifest_path
+        """
+        if self._manifest is None:
+            raise ValueError("rebuild_manifest() requires manifest_path")
+        
+        def verifier(path: Path) -> Optional[Dict]:
+            if verify and self._verification_enabled:
+                return dict(self._verify_file(path, path.name), verified_at=time.time())
+            return None
+        
+        count = self._manifest.scan(output_dir, workers=workers, verifier=verifier)
+        self.logger.info(f"Manifest rebuilt: {count} files under {output_dir}")
+        return count
+    
+    def fetch_symbols(self, biz_type: str, product_id: str, refresh: bool = False) -> List[str]:
         """
         Fetch available symbols for the specified market and product type.
         
+        Results are cached in memory (and in cache_dir, if configured) for
+        symbols_ttl seconds. Stale on-disk entries are revalidated with a
+        conditional request when the API returned an ETag.
+        
         Args:
             biz_type: Market type ('spot' or 'contract')
             product_id: Data type ('trade' or 'orderbook')
+            refresh: Ignore cached results and ask the API (default: False)
             
         Returns:
             List of available symbols
@@ -121,15 +386,40 @@ class ByBitHistoricalDataDownloader:
         self._validate_biz_type(biz_type)
         self._validate_product_id(product_id)
         
+        key = (biz_type, product_id)
+        now = time.time()
+        with self._symbols_lock:
+            entry = self._symbols.get(key)
+        if not refresh and entry and now - entry[0] < self.symbols_ttl:
+            return list(entry[1])
+        
+        cached = None
+        if self._metadata_cache is not None:
+            cached = self._metadata_cache.get_symbols(biz_type, product_id)
+            if not refresh and cached and now - cached[2] < self.symbols_ttl:
+                with self._symbols_lock:
+                    self._symbols[key] = (cached[2], cached[0])
+                return list(cached[0])
+        
         url = f"{self.BASE_URL}/list-options"
         params = {
             'bizType': biz_type,
             'productId': product_id
         }
+        headers = dict(self.headers)
+        if cached and cached[1]:
+            headers['If-None-Match'] = cached[1]
         
-        with httpx.Client(timeout=self.timeout) as client:
-            try:
-                response = client.get(url, params=params, headers=self.headers)
+        if self._metadata_limiter:
+            self._metadata_limiter.acquire()
+        
+        try:
+            response = self._client.get(url, params=params, headers=headers)
+            
+            if response.status_code == 304 and cached:
+                symbols = cached[0]
+                self.logger.info(f"Symbols for {biz_type}/{product_id} unchanged")
+            else:
                 response.raise_for_status()
                 
                 data = response.json()
@@ -138,38 +428,51 @@ class ByBitHistoricalDataDownloader:
                 
                 symbols = data.get('result', {}).get('symbols', [])
                 self.logger.info(f"Fetched {len(symbols)} symbols for {biz_type}/{product_id}")
-                return symbols
-                
-            except httpx.RequestError as e:
-                self.logger.error(f"Failed to fetch symbols: {e}")
-                raise
+            
+        except httpx.RequestError as e:
+            self.logger.error(f"Failed to fetch symbols: {e}")
+            raise
+        
+        with self._symbols_lock:
+            self._symbols[key] = (time.time(), symbols)
+        if self._metadata_cache is not None:
+            self._metadata_cache.put_symbols(biz_type, product_id, symbols, response.headers.get('etag'))
+        return list(symbols)
     
-    def _split_date_range(self, start_date: str, end_date: str) -> List[Tuple[str, str]]:
+    def preload_symbols(self, refresh: bool = False) -> Dict[Tuple[str, str], List[str]]:
         """
-        Split date range into 7-day chunks as required by the API.
+        Fetch the symbol lists of every supported market concurrently.
         
         Args:
-            start_date: Start date in 'YYYY-MM-DD' format
-            end_date: End date in 'YYYY-MM-DD' format
+            refresh: Ignore cached results and ask the API (default: False)
             
         Returns:
-            List of (start_date, end_date) tuples, each spanning max 7 days
+            Dictionary mapping (biz_type, product_id) to its symbols
         """
-        start = datetime.strptime(start_date, '%Y-%m-%d')
-        end = datetime.strptime(end_date, '%Y-%m-%d')
-        
-        chunks = []
-        current_start = start
-        
-        while current_start <= end:
-            current_end = min(current_start + timedelta(days=6), end)
-            chunks.append((
-                current_start.strftime('%Y-%m-%d'),
-                current_end.strftime('%Y-%m-%d')
-            ))
-            current_start = current_end + timedelta(days=1)
+        markets = [(biz_type, product_id) for biz_type in self.BIZ_TYPES for product_id in self.PRODUCT_IDS]
+        with ThreadPoolExecutor(max_workers=len(markets)) as executor:
+            futures = {
+                market: executor.submit(self.fetch_symbols, market[0], market[1], refresh)
+                for market in markets
+            }
+            return {market: future.result() for market, future in futures.items()}
+    
+    def validate_symbols(self, symbols: List[str], biz_type: str, product_id: str) -> None:
+        """
+        Check that symbols are listed for a market, using the symbol cache.
         
-        return chunks
+        Args:
+            symbols: Trading pair symbols to check
+            biz_type: Market type ('spot' or 'contract')
+            product_id: Data type ('trade' or 'orderbook')
+            
+        Raises:
+            ValueError: If any symbol is not listed for the market
+        """
+        available = set(self.fetch_symbols(biz_type, product_id))
+        unknown = [symbol for symbol in symbols if symbol not in available]
+        if unknown:
+            raise ValueError(f"Unknown symbols for {biz_type}/{product_id}: {', '.join(unknown)}")
     
     def _get_download_files(self, symbol: str, start_date: str, end_date: str,
                            biz_type: str, product_id: str) -> List[Dict]:
@@ -197,82 +500,427 @@ class ByBitHistoricalDataDownloader:
             'endDay': end_date
         }
         
-        with httpx.Client(timeout=self.timeout) as client:
-            try:
-                response = client.get(url, params=params, headers=self.headers)
-                response.raise_for_status()
-                
-                data = response.json()
-                if data.get('ret_code') != 0:
-                    raise Exception(f"API Error: {data.get('ret_msg', 'Unknown error')}")
-                
-                return data.get('result', {}).get('list', [])
-                
-            except httpx.RequestError as e:
-                self.logger.error(f"Failed to get file list: {e}")
-                raise
+        if self._metadata_limiter:
+            self._metadata_limiter.acquire()
+        
+        try:
+            response = self._client.get(url, params=params, headers=self.headers)
+            response.raise_for_status()
+            
+            data = response.json()
+            if data.get('ret_code') != 0:
+                raise Exception(f"API Error: {data.get('ret_msg', 'Unknown error')}")
+            
+            return data.get('result', {}).get('list', [])
+            
+        except httpx.RequestError as e:
+            self.logger.error(f"Failed to get file list: {e}")
+            raise
     
-    def _download_file(self, file_info: Dict, output_dir: str) -> bool:
+    def _download_file(self, file_info: Dict, output_dir: str, max_retries: Optional[int] = None) -> bool:
         """
-        Download a single file with retry logic.
+        Download a single file, retrying in the calling thread.
+        
+        download_data() and friends don't use this; they re-queue failed
+        attempts through the pipeline so no worker sits idle during backoff.
         
         Args:
             file_info: File information dictionary from API
             output_dir: Output directory path
+            max_retries: Maximum attempts (default: the downloader's max_retries)
             
         Returns:
             True if download successful, False otherwise
         """
+        max_retries = max_retries or self._retry_policy.max_retries
+        delay = None
+        for attempt in range(max_retries):
+            status, retry_after = self._attempt_download(file_info, output_dir, attempt)
+            if status != RETRY:
+                return status in COMPLETED
+            if attempt < max_retries - 1:
+                delay = self._retry_policy.next_delay(delay, retry_after)
+                time.sleep(delay)
+        
+        self.logger.error(f"Failed to download {file_info['filename']} after {max_retries} attempts")
+        return False
+    
+    def _attempt_download(self, file_info: Dict, output_dir: str, attempt: int = 0) -> Tuple[str, Optional[float]]:
+        """
+        Make one attempt at downloading a file.
+        
+        Data is streamed into a '<filename>.part' file which is kept across
+        failed attempts (and process restarts), so the next attempt resumes with
+        an HTTP Range request instead of starting again from byte 0. The part
+        file is only renamed into place once its size matches the API metadata.
+        
+        Args:
+            file_info: File information dictionary from API
+            output_dir: Output directory path
+            attempt: Zero-based attempt number, for logging
+            
+        Returns:
+            Tuple of (DONE, SKIPPED if the file was already complete, RETRY or
+            FATAL, Retry-After seconds requested by the server)
+        """
         url = file_info['url']
         filename = file_info['filename']
         file_path = Path(output_dir) / filename
+        part_path = file_path.with_name(filename + '.part')
+        expected_size = int(file_info.get('size', 0))
         
-        # Skip if file already exists and has correct size
-        if file_path.exists():
-            expected_size = int(file_info.get('size', 0))
-            if expected_size > 0 and file_path.stat().st_size == expected_size:
-                self.logger.info(f"File already exists: {filename}")
-                return True
+        # Skip if file already exists with correct size and no failed verification
+        if self._is_complete(file_path, expected_size):
+            self.logger.info(f"File already exists: {filename}")
+            return SKIPPED, None
+        
+        try:
+            # Create output directory if it doesn't exist
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            
+            offset, headers = self._resume_state(part_path, expected_size)
+            
+            path = self._egress.choose()
+            with self._concurrency.slot() as transfer, self._egress.use(path) as egress_transfer:
+                verification = self._transfer(path.client, path.rewrite(url), part_path,
+                                              expected_size, offset, headers)
+                transfer.bytes = egress_transfer['bytes'] = part_path.stat().st_size - offset
+            with self._bytes_lock:
+                self._bytes_received += transfer.bytes
+            
+            # Verify file size
+            actual_size = part_path.stat().st_size
+            
+            if expected_size > 0 and actual_size != expected_size:
+                self.logger.warning(f"Size mismatch for {filename}: expected {expected_size}, got {actual_size}")
+                if actual_size > expected_size:
+                    self._discard_partial(part_path)
+                return RETRY, None
+            
+            # Segmented and already-complete files weren't seen while streaming
+            if verification is None and self._verification_enabled:
+                verification = self._verify_file(part_path, filename)
+            
+            if verification is not None and not verification['valid']:
+                self.logger.warning(f"Integrity check failed for {filename}: {verification['error']}")
+                self._discard_partial(part_path)
+                return RETRY, None
+            
+            os.replace(part_path, file_path)
+            self._discard_partial(part_path)
+            self._record_completed(file_path, actual_size, verification, url)
+            self.logger.info(f"Downloaded: {filename} ({actual_size:,} bytes)")
+            return DONE, None
+            
+        except Exception as e:
+            # Partial data is kept on purpose; the next attempt resumes from it
+            status, retry_after = self._retry_policy.classify(e)
+            self.logger.error(f"Download attempt {attempt + 1} failed for {filename}"
+                              f"{'' if status == RETRY else ' (not retryable)'}: {e}")
+            return status, retry_after
+    
+    def _transfer(self, client: httpx.Client, url: str, part_path: Path, expected_size: int,
+                  offset: int, headers: Dict[str, str]) -> Optional[Dict]:
+        """
+        Fetch the missing bytes of a file into its '.part' file.
         
-        # Create output directory if it doesn't exist
-        file_path.parent.mkdir(parents=True, exist_ok=True)
+        Single-stream transfers are checksummed and archive-checked inline as the
+        bytes are written; a resumed transfer first feeds the existing partial
+        data through the verifier.
         
-        max_retries = 3
-        for attempt in range(max_retries):
-            try:
-                with httpx.Client(timeout=60) as client:
-                    with client.stream('GET', url) as response:
-                        response.raise_for_status()
-                        
-                        with open(file_path, 'wb') as f:
-                            for chunk in response.iter_bytes(chunk_size=8192):
-                                f.write(chunk)
-                
-                # Verify file size
-                expected_size = int(file_info.get('size', 0))
-                actual_size = file_path.stat().st_size
-                
-                if expected_size > 0 and actual_size != expected_size:
-                    self.logger.warning(f"Size mismatch for {filename}: expected {expected_size}, got {actual_size}")
-                    file_path.unlink()  # Delete incomplete file
-                    continue
-                
-                self.logger.info(f"Downloaded: {filename} ({actual_size:,} bytes)")
-                return True
-                
-            except Exception as e:
-                self.logger.error(f"Download attempt {attempt + 1} failed for {filename}: {e}")
-                if file_path.exists():
-                    file_path.unlink()  # Clean up partial download
-                
-                if attempt < max_retries - 1:
-                    time.sleep(2 ** attempt)  # Exponential backoff
+        Args:
+            client: HTTP client of the chosen egress path
+            url: File URL
+            part_path: Path of the '.part' file
+            expected_size: File size reported by the API (0 if unknown)
+            offset: Byte offset to resume from
+            headers: Extra request headers from _resume_state()
+            
+        Returns:
+            Verification result, or None if the data was not verified inline
+        """
+        # A '.seg' left by an interrupted segmented download is finished as one,
+        # even if segmenting has since been turned off
+        if offset == 0 and expected_size >= self.segment_threshold and (
+                self.segments > 1 or self._segment_path(part_path).exists()):
+            self._download_segmented(client, url, part_path, expected_size)
+            return None
         
-        self.logger.error(f"Failed to download {filename} after {max_retries} attempts")
-        return False
+        if expected_size > 0 and offset >= expected_size:
+            return None
+        
+        if self._download_limiter:
+            self._download_limiter.acquire()
+        
+        with client.stream('GET', url, headers=headers,
+                           timeout=self.download_timeout) as response:
+            if response.status_code == 416:
+                # Our partial data no longer matches the remote file
+                self._discard_partial(part_path)
+                raise Exception("Requested range not satisfiable, restarting from scratch")
+            response.raise_for_status()
+            
+            mode = self._resume_mode(response, offset, expected_size)
+            self._save_validator(part_path, response)
+            
+            verifier = None
+            if self._verification_enabled:
+                verifier = StreamVerifier(part_path.name[:-len('.part')], self.checksum, self.verify_archives)
+                if mode == 'ab':
+                    self._feed_file(part_path, verifier)
+            
+            with open(part_path, mode, buffering=0) as f:
+                self._write_response(response, f, verifier)
+        
+        return verifier.finish() if verifier is not None else None
+    
+    def _download_segmented(self, client: httpx.Client, url: str, part_path: Path,
+                            expected_size: int) -> None:
+        """
+        Download a large file as several concurrent byte ranges.
+        
+        The ranges are written with positional writes into a '.seg' file that is
+        preallocated to the full size, which is renamed to part_path once every
+        segment has arrived. Finished ranges are recorded in a '.seg.ranges'
+        file, so after a failed attempt or a restart only the missing ranges
+        are requested again, guarded by If-Range against the remote file having
+        changed. Falls back to a single stream if the server does not honour
+        Range requests.
+        
+        Args:
+            client: HTTP client of the chosen egress path
+            url: File URL
+            part_path: Path of the '.part' file to produce
+            expected_size: File size reported by the API
+        """
+        filename = part_path.name[:-len('.part')]
+        seg_path = self._segment_path(part_path)
+        state = self._load_segment_state(seg_path, expected_size)
+        if state is None:
+            segment_size = -(-expected_size // self.segments)
+            state = {
+                'size': expected_size,
+                'validator': None,
+                'ranges': [[start, min(start + segment_size, expected_size) - 1]
+                           for start in range(0, expected_size, segment_size)],
+                'done': [],
+            }
+            self._preallocate(seg_path, expected_size)
+            self._save_segment_state(seg_path, state)
+        
+        missing = [(start, end) for start, end in state['ranges'] if [start, end] not in state['done']]
+        if state['done']:
+            self.logger.info(f"Resuming {filename}: {len(missing)}/{len(state['ranges'])} segments missing")
+        
+        # Completed ranges are kept on failure; the next attempt fetches the rest
+        state_lock = threading.Lock()
+        with ThreadPoolExecutor(max_workers=max(len(missing), 1)) as executor:
+            futures = [
+                executor.submit(self._download_segment, client, url, seg_path, start, end,
+                                state, state_lock)
+                for start, end in missing
+            ]
+            ranged = all(future.result() for future in futures)
+        
+        if not ranged:
+            self.logger.info(f"Range requests not usable for {filename}, using a single stream")
+            self._discard_segments(seg_path)
+            if self._download_limiter:
+                self._download_limiter.acquire()
+            with client.stream('GET', url, timeout=self.download_timeout) as response:
+                response.raise_for_status()
+                with open(part_path, 'wb', buffering=0) as f:
+                    self._write_response(response, f)
+            return
+        
+        os.replace(seg_path, part_path)
+        self._discard_segments(seg_path)
+    
+    def _download_segment(self, client: httpx.Client, url: str, seg_path: Path,
+                          start: int, end: int, state: Dict, state_lock: threading.Lock) -> bool:
+        """
+        Fetch one byte range of a segmented download into place.
+        
+        Args:
+            client: HTTP client of the chosen egress path
+            url: File URL
+            seg_path: Preallocated file the segment is written into
+            start: First byte of the range
+            end: Last byte of the range (inclusive)
+            state: Segment state from _load_segment_state(), updated once the
+                range is written
+            state_lock: Lock serializing updates of the state
+            
+        Returns:
+            False if the server ignored the Range header or the remote file
+            changed since earlier segments, True once written
+        """
+        headers = {'Range': f"bytes={start}-{end}"}
+        if state['validator']:
+            headers['If-Range'] = state['validator']
+        if self._download_limiter:
+            self._download_limiter.acquire()
+        with client.stream('GET', url, headers=headers, timeout=self.download_timeout) as response:
+            response.raise_for_status()
+            if response.status_code != 206:
+                return False
+            
+            validator = self._validator(response)
+            with state_lock:
+                if state['validator'] is None:
+                    state['validator'] = validator
+                elif validator is not None and validator != state['validator']:
+                    return False
+            
+            with open(seg_path, 'r+b', buffering=0) as f:
+                f.seek(start)
+                written = self._write_response(response, f)
+        
+        if written != end - start + 1:
+            raise Exception(f"Segment {start}-{end} truncated: got {written} bytes")
+        
+        with state_lock:
+            state['done'].append([start, end])
+            self._save_segment_state(seg_path, state)
+        return True
+    
+    def _segment_path(self, part_path: Path) -> Path:
+        """Return the '.seg' file a segmented download of part_path is assembled in."""
+        return part_path.with_name(part_path.name[:-len('.part')] + '.seg')
+    
+    def _load_segment_state(self, seg_path: Path, expected_size: int) -> Optional[Dict]:
+        """
+        Load the record of an interrupted segmented download.
+        
+        Returns:
+            State dictionary with the file size, the validator of the remote
+            file, the planned ranges and the finished ones, or None (after
+            discarding any leftovers) if there is nothing usable to resume
+        """
+        try:
+            state = json.loads(seg_path.with_name(seg_path.name + '.ranges').read_text())
+            if state['size'] == expected_size and seg_path.stat().st_size == expected_size:
+                return state
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        self._discard_segments(seg_path)
+        return None
+    
+    def _save_segment_state(self, seg_path: Path, state: Dict) -> None:
+        """Atomically replace the '.seg.ranges' record of a segmented download."""
+        ranges_path = seg_path.with_name(seg_path.name + '.ranges')
+        temporary_path = ranges_path.with_name(ranges_path.name + '.tmp')
+        temporary_path.write_text(json.dumps(state))
+        os.replace(temporary_path, ranges_path)
+    
+    def _discard_segments(self, seg_path: Path) -> None:
+        """Remove a '.seg' file and its record of finished ranges."""
+        for path in (seg_path, seg_path.with_name(seg_path.name + '.ranges')):
+            if path.exists():
+                path.unlink()
+    
+    def _write_response(self, response: httpx.Response, f,
+                        verifier: Optional[StreamVerifier] = None) -> int:
+        """
+        Stream a response body into an open file through the tuned write path.
+        
+        Network chunks are coalesced into large reusable buffers and, with
+        write_behind, written by a dedicated thread so reads never wait on disk.
+        
+        Args:
+            response: Streaming response to read from
+            f: Unbuffered binary file positioned where the data belongs
+            verifier: Verifier fed every block as it is written (default: None)
+            
+        Returns:
+            Number of bytes written
+        """
+        observer = verifier.update if verifier is not None else None
+        with WriteBehindWriter(f, buffer_size=self.chunk_size, write_behind=self.write_behind,
+                               observer=observer) as writer:
+            for chunk in response.iter_bytes():
+                if self._bandwidth.enabled:
+                    self._bandwidth.consume(len(chunk))
+                writer.write(chunk)
+        return writer.bytes_written
+    
+    def _feed_file(self, path: Path, verifier: StreamVerifier) -> None:
+        """Run the contents of a file on disk through a verifier."""
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(self.chunk_size), b''):
+                verifier.update(block)
+    
+    def _verify_file(self, path: Path, filename: str) -> Dict:
+        """
+        Checksum and archive-check a file that was not verified while streaming.
+        
+        With cpu_workers, the work runs in the process pool so it doesn't hold
+        the GIL against the transfer threads; at most max_pending_cpu files
+        wait for it, and further callers block until a slot frees up.
+        """
+        args = (str(path), filename, self.checksum, self.verify_archives, self.chunk_size)
+        if self.cpu_workers == 0:
+            return verify_path(*args)
+        with self._cpu_slots:
+            return self._get_cpu_pool().submit(verify_path, *args).result()
+    
+    def _get_cpu_pool(self) -> ProcessPoolExecutor:
+        """Create the process pool for CPU-bound stages on first use."""
+        with self._cpu_pool_lock:
+            if self._cpu_pool is None:
+                # Spawned rather than forked: forking a process full of
+                # network and writer threads can deadlock the children
+                self._cpu_pool = ProcessPoolExecutor(max_workers=self.cpu_workers,
+                                                     mp_context=multiprocessing.get_context('spawn'))
+            return self._cpu_pool
+    
+    def _record_completed(self, file_path: Path, size: int, verification: Optional[Dict],
+                          url: Optional[str] = None) -> None:
+        """Record a completed file and its verification in the manifest, if there is one."""
+        if self._manifest is not None:
+            self._manifest.record(file_path, size, verification, url)
+    
+    def _is_complete(self, file_path: Path, expected_size: int, record: bool = True) -> bool:
+        """
+        Decide whether a downloaded file can be skipped.
+        
+        The size must match the API metadata. With a manifest, its record
+        (including the verification result) decides without touching the file
+        system; files missing from it are checked on disk once and then
+        recorded, unless record is False. Without one, the size check alone
+        decides.
+        """
+        if self._manifest is not None:
+            entry = self._manifest.get(file_path)
+            if entry is not None:
+                return expected_size > 0 and entry['valid'] and entry['size'] == expected_size
+        
+        try:
+            stat = file_path.stat()
+        except OSError:
+            return False
+        if expected_size <= 0 or stat.st_size != expected_size:
+            return False
+        
+        if record and self._manifest is not None:
+            self._manifest.record(file_path, stat.st_size, downloaded_at=stat.st_mtime)
+        return True
+    
+    def _preallocate(self, path: Path, size: int) -> None:
+        """Create a file of the given size, reserving its blocks where supported."""
+        with open(path, 'wb') as f:
+            if size > 0 and hasattr(os, 'posix_fallocate'):
+                try:
+                    os.posix_fallocate(f.fileno(), 0, size)
+                    return
+                except OSError:
+                    # Not supported by this filesystem, fall back to a sparse file
+                    pass
+            f.truncate(size)
     
     def download_data(self, symbol: str, start_date: str, end_date: str,
-                     biz_type: str, product_id: str, output_dir: str = "./data") -> Dict[str, int]:
+                     biz_type: str, product_id: str, output_dir: str = "./data",
+                     max_retries: Optional[int] = None) -> Dict[str, int]:
         """
         Download historical data for the specified parameters.
         
@@ -283,6 +931,8 @@ class ByBitHistoricalDataDownloader:
             biz_type: Market type ('spot' or 'contract')
             product_id: Data type ('trade' or 'orderbook')
             output_dir: Output directory path (default: './data')
+            max_retries: Maximum attempts per file for this run (default: the
+                downloader's max_retries)
             
         Returns:
             Dictionary with download statistics
@@ -290,86 +940,969 @@ class ByBitHistoricalDataDownloader:
         Raises:
             ValueError: If invalid parameters provided
         """
-        # Validate inputs
+        self._validate_request([biz_type], [product_id], start_date, end_date)
+        if self.check_symbols:
+            self.validate_symbols([symbol], biz_type, product_id)
+        
+        self.logger.info(f"Starting download: {symbol} {biz_type}/{product_id} from {start_date} to {end_date}")
+        
+        # One listing job per 7-day chunk
+        jobs = self._listing_jobs([symbol], [biz_type], [product_id], start_date, end_date, 1)
+        self.logger.info(f"Split into {len(jobs)} date chunks")
+        
+        stats = self._run_checkpointed(jobs, output_dir, max_retries)
+        
+        self.logger.info(f"Download completed: {stats['downloaded']}/{stats['total_files']} files successful")
+        return stats
+    
+    def download_many(self, symbols: List[str], biz_types: List[str], product_ids: List[str],
+                      start_date: str, end_date: str, output_dir: str = "./data",
+                      symbols_per_request: int = 5, max_retries: Optional[int] = None) -> Dict[str, int]:
+        """
+        Download several symbols and markets through one shared worker pool.
+        
+        Every (biz_type, product_id) combination is downloaded for every symbol.
+        All files are scheduled on the same download pool, so slow files of one
+        symbol never leave the pool idle. Up to symbols_per_request symbols are
+        listed with a single list-files request; if the API rejects a batch, its
+        symbols are listed one by one instead.
+        
+        Args:
+            symbols: Trading pair symbols (e.g., ['BTCUSDT', 'ETHUSDT'])
+            biz_types: Market types ('spot' and/or 'contract')
+            product_ids: Data types ('trade' and/or 'orderbook')
+            start_date: Start date in 'YYYY-MM-DD' format
+            end_date: End date in 'YYYY-MM-DD' format
+            output_dir: Output directory path (default: './data')
+            symbols_per_request: Maximum symbols per list-files request (default: 5)
+            max_retries: Maximum attempts per file for this run (default: the
+                downloader's max_retries)
+            
+        Returns:
+            Dictionary with download statistics across all symbols and markets
+            
+        Raises:
+            ValueError: If invalid parameters provided
+        """
+        self._validate_request(biz_types, product_ids, start_date, end_date, symbols_per_request)
+        if self.check_symbols:
+            for biz_type in biz_types:
+                for product_id in product_ids:
+                    self.validate_symbols(symbols, biz_type, product_id)
+        
+        self.logger.info(f"Starting batch download: {len(symbols)} symbols x "
+                         f"{len(biz_types) * len(product_ids)} markets from {start_date} to {end_date}")
+        
+        jobs = self._listing_jobs(symbols, biz_types, product_ids, start_date, end_date, symbols_per_request)
+        stats = self._run_checkpointed(jobs, output_dir, max_retries)
+        
+        self.logger.info(f"Batch download completed: {stats['downloaded']}/{stats['total_files']} files successful")
+        return stats
+    
+    def sync(self, symbol: Union[str, List[str]], biz_type: str, product_id: str,
+             since: Optional[str] = None, until: Optional[str] = None,
+             output_dir: str = "./data", symbols_per_request: int = 5,
+             max_retries: Optional[int] = None) -> Dict[str, int]:
+        """
+        Download only the days that are missing locally.
+        
+        The days already present are read from the manifest (or from the
+        filenames in each symbol's directory), and only the uncovered date
+        windows are listed and downloaded. Symbols missing the same days are
+        listed together, so a daily update of many symbols needs only a few
+        list-files requests.
+        
+        Args:
+            symbol: Trading pair symbol, or a list of symbols
+            biz_type: Market type ('spot' or 'contract')
+            product_id: Data type ('trade' or 'orderbook')
+            since: First day to cover in 'YYYY-MM-DD' format (default: the day
+                after the latest day present locally; symbols without local
+                data are then skipped)
+            until: Last day to cover in 'YYYY-MM-DD' format (default: the latest
+                published day, i.e. yesterday in UTC)
+            output_dir: Output directory path (default: './data')
+            symbols_per_request: Maximum symbols per list-files request (default: 5)
+            max_retries: Maximum attempts per file for this run (default: the
+                downloader's max_retries)
+            
+        Returns:
+            Dictionary with download statistics, including the number of
+            'missing_days' found across all symbols and the 'skipped_symbols'
+            that had no local data to continue from
+            
+        Raises:
+            ValueError: If invalid parameters provided
+        """
+        symbols = [symbol] if isinstance(symbol, str) else list(symbol)
         self._validate_biz_type(biz_type)
         self._validate_product_id(product_id)
-        self._validate_date_format(start_date)
-        self._validate_date_format(end_date)
+        if since is not None:
+            self._validate_date_format(since)
+        if until is None:
+            until = (datetime.now(timezone.utc) - timedelta(days=1)).strftime('%Y-%m-%d')
+        self._validate_date_format(until)
+        if symbols_per_request < 1:
+            raise ValueError("symbols_per_request must be at least 1")
+        if self.check_symbols:
+            self.validate_symbols(symbols, biz_type, product_id)
         
-        if datetime.strptime(start_date, '%Y-%m-%d') > datetime.strptime(end_date, '%Y-%m-%d'):
-            raise ValueError("start_date must be before or equal to end_date")
+        # Symbols missing exactly the same windows are listed together
+        groups: Dict[Tuple[Tuple[str, str], ...], List[str]] = {}
+        missing_days = 0
+        skipped_symbols = []
+        for sym in symbols:
+            present = self._local_days(Path(output_dir) / biz_type / product_id / sym)
+            start = since
+            if start is None:
+                if not present:
+                    self.logger.warning(f"Skipping {sym}: no local data, pass since= to start syncing it")
+                    skipped_symbols.append(sym)
+                    continue
+                latest = datetime.strptime(max(present), '%Y-%m-%d')
+                start = (latest + timedelta(days=1)).strftime('%Y-%m-%d')
+            
+            missing = [day for day in self._days_in_range(start, until) if day not in present]
+            missing_days += len(missing)
+            windows = tuple(self._missing_windows(missing))
+            if windows:
+                groups.setdefault(windows, []).append(sym)
         
-        self.logger.info(f"Starting download: {symbol} {biz_type}/{product_id} from {start_date} to {end_date}")
+        self.logger.info(f"Sync: {missing_days} missing days across {len(symbols)} symbols up to {until}")
+        if not groups:
+            return {'total_files': 0, 'downloaded': 0, 'failed': 0, 'missing_days': 0,
+                    'skipped_symbols': skipped_symbols}
         
-        # Split date range into 7-day chunks
-        date_chunks = self._split_date_range(start_date, end_date)
-        self.logger.info(f"Split into {len(date_chunks)} date chunks")
+        jobs = [
+            (group[i:i + symbols_per_request], biz_type, product_id, window_start, window_end)
+            for windows, group in groups.items()
+            for i in range(0, len(group), symbols_per_request)
+            for window_start, window_end in windows
+        ]
+        stats = self._run_pipeline(jobs, output_dir, max_retries)
+        stats['missing_days'] = missing_days
+        stats['skipped_symbols'] = skipped_symbols
         
-        # Collect all files to download
-        all_files = []
-        for chunk_start, chunk_end in date_chunks:
-            try:
-                files = self._get_download_files(symbol, chunk_start, chunk_end, biz_type, product_id)
-                all_files.extend(files)
-                self.logger.info(f"Found {len(files)} files for {chunk_start} to {chunk_end}")
-            except Exception as e:
-                self.logger.error(f"Failed to get files for {chunk_start} to {chunk_end}: {e}")
+        self.logger.info(f"Sync completed: {stats['downloaded']}/{stats['total_files']} files successful")
+        return stats
+    
+    def mirror(self, start_date: str, end_date: Optional[str] = None,
+               biz_types: Optional[List[str]] = None, product_ids: Optional[List[str]] = None,
+               output_dir: str = "./data", symbols: Optional[List[str]] = None,
+               symbols_per_request: int = 5, max_retries: Optional[int] = None) -> Dict[str, int]:
+        """
+        Mirror every listed symbol of every market over a date range.
         
-        if not all_files:
-            self.logger.warning("No files found for the specified parameters")
-            return {'total_files': 0, 'downloaded': 0, 'failed': 0}
+        The work plan is generated lazily: each market's symbols are fetched
+        when the plan reaches it, and listing jobs are only pulled while fewer
+        than max_queued_files listed files are waiting for a worker. Memory use
+        therefore stays flat however many symbols and days are mirrored.
+        
+        Args:
+            start_date: Start date in 'YYYY-MM-DD' format
+            end_date: End date in 'YYYY-MM-DD' format (default: the latest
+                published day, i.e. yesterday in UTC)
+            biz_types: Market types (default: all)
+            product_ids: Data types (default: all)
+            output_dir: Output directory path (default: './data')
+            symbols: Restrict the mirror to these symbols (default: every symbol
+                from list-options)
+            symbols_per_request: Maximum symbols per list-files request (default: 5)
+            max_retries: Maximum attempts per file for this run (default: the
+                downloader's max_retries)
+            
+        Returns:
+            Dictionary with download statistics across the whole mirror
+            
+        Raises:
+            ValueError: If invalid parameters provided
+        """
+        biz_types = biz_types or self.BIZ_TYPES
+        product_ids = product_ids or self.PRODUCT_IDS
+        if end_date is None:
+            end_date = (datetime.now(timezone.utc) - timedelta(days=1)).strftime('%Y-%m-%d')
+        self._validate_request(biz_types, product_ids, start_date, end_date, symbols_per_request)
+        
+        def plan() -> Iterator[Tuple[List[str], str, str, str, str]]:
+            for biz_type in biz_types:
+                for product_id in product_ids:
+                    universe = symbols if symbols is not None else self.fetch_symbols(biz_type, product_id)
+                    self.logger.info(f"Mirroring {len(universe)} symbols of {biz_type}/{product_id}")
+                    yield from self._listing_jobs(universe, [biz_type], [product_id],
+                                                  start_date, end_date, symbols_per_request)
+        
+        self.logger.info(f"Starting mirror of {biz_types} x {product_ids} from {start_date} to {end_date}")
+        stats = self._run_pipeline(plan(), output_dir, max_retries)
+        
+        self.logger.info(f"Mirror completed: {stats['downloaded']}/{stats['total_files']} files successful")
+        return stats
+    
+    def download_sharded(self, symbols: List[str], biz_types: List[str], product_ids: List[str],
+                         start_date: str, end_date: str, lease_path: str,
+                         node_index: int, node_count: int, output_dir: str = "./data",
+                         symbols_per_request: int = 5, lease_seconds: float = 300,
+                         worker_id: Optional[str] = None,
+                         max_retries: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Work on one shared download together with other nodes.
+        
+        Every node runs this with the same parameters and its own node_index.
+        The download is split into deterministic work items (a batch of symbols
+        of one market over one 7-day chunk), registered in the lease database
+        at lease_path on shared storage. Each node leases items, preferring its
+        own shard and helping with other shards once its own are done, and
+        renews its leases while it works. Items of a node that stops renewing
+        are picked up by the others after lease_seconds. Returns once every
+        item is done or failed.
+        
+        Args:
+            symbols: Trading pair symbols (e.g., ['BTCUSDT', 'ETHUSDT'])
+            biz_types: Market types ('spot' and/or 'contract')
+            product_ids: Data types ('trade' and/or 'orderbook')
+            start_date: Start date in 'YYYY-MM-DD' format
+            end_date: End date in 'YYYY-MM-DD' format
+            lease_path: SQLite lease database reachable by every node
+            node_index: This node's shard, from 0 to node_count - 1
+            node_count: Number of nodes the work is partitioned across
+            output_dir: Output directory path (default: './data')
+            symbols_per_request: Maximum symbols per list-files request (default: 5)
+            lease_seconds: How long a claim lasts without renewal (default: 300)
+            worker_id: Unique name of this worker (default: host, PID and node index)
+            max_retries: Maximum attempts per file, and per item whose listing
+                fails (default: the downloader's max_retries)
+            
+        Returns:
+            Dictionary with this node's download statistics and the job-wide
+            item counts by state under 'items'
+            
+        Raises:
+            ValueError: If invalid parameters provided
+        """
+        self._validate_request(biz_types, product_ids, start_date, end_date, symbols_per_request)
+        if not 0 <= node_index < node_count:
+            raise ValueError("node_index must be between 0 and node_count - 1")
+        
+        items = [list(job) for job in self._listing_jobs(symbols, biz_types, product_ids,
+                                                         start_date, end_date, symbols_per_request)]
+        job_id = hashlib.sha256(json.dumps(items).encode()).hexdigest()[:16]
+        worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{node_index}"
+        store = LeaseStore(lease_path, job_id, worker_id, lease_seconds,
+                           max_attempts=max_retries or self._retry_policy.max_retries)
+        store.populate(items, node_count)
+        
+        claimed: Dict[str, int] = {}
+        
+        def claims() -> Iterator[list]:
+            while True:
+                claim = store.claim(node_index)
+                if claim is None:
+                    return
+                item_id, job = claim
+                claimed[json.dumps(job)] = item_id
+                yield job
+        
+        def finished(job, error, listed):
+            item_id = claimed.pop(json.dumps(job))
+            if listed:
+                store.complete(item_id, error)
+            else:
+                store.release(item_id, error)
+        
+        stop = threading.Event()
+        
+        def heartbeat():
+            while not stop.wait(lease_seconds / 3):
+                try:
+                    store.renew()
+                except Exception as e:
+                    self.logger.warning(f"Renewing leases failed: {e}")
+        
+        renewer = threading.Thread(target=heartbeat, name="lease-heartbeat", daemon=True)
+        renewer.start()
+        self.logger.info(f"Node {node_index}/{node_count} ({worker_id}) joining job {job_id}: {len(items)} items")
+        
+        totals = {'total_files': 0, 'downloaded': 0, 'failed': 0, 'retries': 0}
+        try:
+            while True:
+                stats = self._run_pipeline(claims(), output_dir, max_retries, on_job_done=finished)
+                for key in totals:
+                    totals[key] += stats.get(key, 0)
+                
+                remaining, next_expiry = store.outstanding()
+                if remaining == 0:
+                    break
+                # Other nodes still hold leases; wait for them to finish or expire
+                wait_time = 0.0 if next_expiry is None else next_expiry - time.time()
+                self.logger.info(f"{remaining} items held by other nodes, checking again shortly")
+                time.sleep(min(max(wait_time, 0.1), 5.0))
+            totals['items'] = store.counts()
+        finally:
+            stop.set()
+            renewer.join()
+            store.close()
+        
+        self.logger.info(f"Node {node_index} finished: {totals['downloaded']}/{totals['total_files']} files, "
+                         f"items {totals['items']}")
+        return totals
+    
+    def plan(self, symbols: List[str], biz_types: List[str], product_ids: List[str],
+             start_date: str, end_date: str, output_dir: str = "./data",
+             symbols_per_request: int = 5, throughput: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Dry run: list the files of a download and estimate its cost without downloading.
+        
+        Only the concurrent listing pass runs. Files that are already complete
+        locally are subtracted, and the duration is estimated from the measured
+        throughput of recent runs (capped by the bandwidth limit). The returned
+        plan is JSON-serializable and can be run unchanged with execute_plan().
+        
+        Args:
+            symbols: Trading pair symbols (e.g., ['BTCUSDT', 'ETHUSDT'])
+            biz_types: Market types ('spot' and/or 'contract')
+            product_ids: Data types ('trade' and/or 'orderbook')
+            start_date: Start date in 'YYYY-MM-DD' format
+            end_date: End date in 'YYYY-MM-DD' format
+            output_dir: Output directory path (default: './data')
+            symbols_per_request: Maximum symbols per list-files request (default: 5)
+            throughput: Bytes per second to estimate with (default: the measured
+                throughput, if any)
+            
+        Returns:
+            Plan dictionary with the parameters, a 'summary' of file and byte
+            counts, disk space and estimated seconds, and the 'files' to download
+            
+        Raises:
+            ValueError: If invalid parameters provided
+        """
+        self._validate_request(biz_types, product_ids, start_date, end_date, symbols_per_request)
+        jobs = self._listing_jobs(symbols, biz_types, product_ids, start_date, end_date, symbols_per_request)
+        
+        listed_files = listed_bytes = existing_files = existing_bytes = 0
+        files = []
+        with ThreadPoolExecutor(max_workers=self.listing_concurrency) as executor:
+            for job, listed in zip(jobs, executor.map(lambda job: self._list_job(*job), jobs)):
+                _, biz_type, product_id, _, _ = job
+                for file_info, symbol in listed:
+                    size = int(file_info.get('size', 0) or 0)
+                    listed_files += 1
+                    listed_bytes += size
+                    file_path = Path(output_dir) / biz_type / product_id / symbol / file_info['filename']
+                    if self._is_complete(file_path, size, record=False):
+                        existing_files += 1
+                        existing_bytes += size
+                        continue
+                    files.append({'symbol': symbol, 'biz_type': biz_type, 'product_id': product_id,
+                                  'filename': file_info['filename'], 'url': file_info['url'],
+                                  'size': size})
+        
+        bytes_to_download = listed_bytes - existing_bytes
+        rate = throughput or self.measured_throughput()
+        limit = self._bandwidth.current_rate()
+        if limit is not None:
+            rate = min(rate, limit) if rate else limit
+        
+        disk_path = Path(output_dir).resolve()
+        while not disk_path.exists():
+            disk_path = disk_path.parent
+        
+        summary = {
+            'listed_files': listed_files,
+            'listed_bytes': listed_bytes,
+            'existing_files': existing_files,
+            'existing_bytes': existing_bytes,
+            'files': len(files),
+            'bytes': bytes_to_download,
+            'disk_free': shutil.disk_usage(disk_path).free,
+            'throughput': round(rate) if rate else None,
+            'eta_seconds': round(bytes_to_download / rate, 1) if rate else None,
+        }
+        self.logger.info(f"Plan: {summary['files']} files, {bytes_to_download:,} bytes to download, "
+                         f"estimated {summary['eta_seconds']} seconds")
+        return {
+            'version': 1,
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'output_dir': output_dir,
+            'start_date': start_date,
+            'end_date': end_date,
+            'symbols': list(symbols),
+            'biz_types': list(biz_types),
+            'product_ids': list(product_ids),
+            'summary': summary,
+            'files': files,
+        }
+    
+    def execute_plan(self, plan: Union[Dict[str, Any], str],
+                     max_retries: Optional[int] = None) -> Dict[str, int]:
+        """
+        Download exactly the files of a plan made by plan(), without listing again.
+        
+        Args:
+            plan: Plan dictionary, or the path of a JSON file holding one
+            max_retries: Maximum attempts per file for this run (default: the
+                downloader's max_retries)
+            
+        Returns:
+            Dictionary with download statistics
+            
+        Raises:
+            ValueError: If the plan has an unsupported version
+        """
+        if isinstance(plan, str):
+            with open(plan) as f:
+                plan = json.load(f)
+        if plan.get('version') != 1:
+            raise ValueError(f"Unsupported plan version: {plan.get('version')}")
+        
+        # One job per symbol and market; its "listing" is the planned files
+        planned: Dict[Tuple[str, str, str], List[Dict]] = {}
+        for entry in plan['files']:
+            file_info = {'filename': entry['filename'], 'url': entry['url'], 'size': str(entry['size'])}
+            planned.setdefault((entry['biz_type'], entry['product_id'], entry['symbol']), []).append(file_info)
+        
+        def planned_files(symbols, biz_type, product_id, start_date, end_date):
+            return [(file_info, symbols[0]) for file_info in planned[(biz_type, product_id, symbols[0])]]
         
-        # Create output directory structure
-        output_path = Path(output_dir) / biz_type / product_id / symbol
-        output_path.mkdir(parents=True, exist_ok=True)
+        jobs = [([symbol], biz_type, product_id, plan['start_date'], plan['end_date'])
+                for biz_type, product_id, symbol in planned]
+        self.logger.info(f"Executing plan: {len(plan['files'])} files")
+        return self._run_pipeline(jobs, plan['output_dir'], max_retries, list_job=planned_files)
+    
+    def coverage(self, symbols: List[str], biz_type: str, product_id: str,
+                 start_date: str, end_date: str, output_dir: str = "./data",
+                 list_missing: bool = False, symbols_per_request: int = 5) -> CoverageReport:
+        """
+        Build a symbols x days coverage report of local data (requires numpy).
+        
+        Local files come from the manifest, or from a concurrent scan of the
+        symbol directories without one. Listed files and sizes come from the
+        metadata cache; with list_missing, days not in the cache are listed
+        from the API first. Days whose listing is unknown are reported as
+        'unknown' rather than as holes.
+        
+        Args:
+            symbols: Trading pair symbols
+            biz_type: Market type ('spot' or 'contract')
+            product_id: Data type ('trade' or 'orderbook')
+            start_date: Start date in 'YYYY-MM-DD' format
+            end_date: End date in 'YYYY-MM-DD' format
+            output_dir: Output directory path (default: './data')
+            list_missing: List days missing from the metadata cache (default: False)
+            symbols_per_request: Maximum symbols per list-files request (default: 5)
+            
+        Returns:
+            CoverageReport with holes, size anomalies and bytes to fill
+            
+        Raises:
+            ValueError: If invalid parameters provided or numpy is not installed
+        """
+        self._validate_request([biz_type], [product_id], start_date, end_date, symbols_per_request)
+        
+        report = CoverageReport(symbols, self._days_in_range(start_date, end_date))
+        
+        if list_missing:
+            jobs = self._listing_jobs(symbols, [biz_type], [product_id], start_date, end_date, symbols_per_request)
+            with ThreadPoolExecutor(max_workers=self.listing_concurrency) as executor:
+                listings = executor.map(lambda job: self._list_job(*job), jobs)
+                for (batch, _, _, chunk_start, chunk_end), files in zip(jobs, listings):
+                    chunk_days = self._days_in_range(chunk_start, chunk_end)
+                    for symbol in batch:
+                        entries = [(file_day(file_info), int(file_info.get('size', 0) or 0))
+                                   for file_info, owner in files if owner == symbol]
+                        report.add_listed(symbol, entries, chunk_days)
+        elif self._metadata_cache is not None:
+            for symbol in symbols:
+                cached = self._metadata_cache.get(biz_type, product_id, symbol, report.days)
+                entries = [(day, int(file_info.get('size', 0) or 0))
+                           for day, day_files in cached.items() for file_info in day_files]
+                report.add_listed(symbol, entries, list(cached))
         
-        # Download files in parallel using ThreadPoolExecutor
-        self.logger.info(f"Starting parallel download of {len(all_files)} files...")
+        directories = [Path(output_dir) / biz_type / product_id / symbol for symbol in symbols]
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            local = executor.map(lambda directory: self._local_files(directory, start_date, end_date), directories)
+            for symbol, entries in zip(symbols, local):
+                report.add_local(symbol, entries)
+        
+        return report
+    
+    def _run_pipeline(self, jobs: Iterable[Tuple[List[str], str, str, str, str]],
+                      output_dir: str, max_retries: Optional[int] = None,
+                      list_job: Optional[Callable[..., List[Tuple[Dict, str]]]] = None,
+                      on_job_done: Optional[Callable[[tuple, Optional[str], bool], None]] = None,
+                      attempt_download: Optional[Callable[[Dict, str, int], Tuple[str, Optional[float]]]] = None
+                      ) -> Dict[str, int]:
+        """
+        List and download files for a set of listing jobs.
+        
+        Listing jobs run concurrently on a listing pool and each job's files are
+        fed into the download pool as soon as its listing arrives, so transfers
+        start after the first listing rather than the last. Listed files are
+        started in the order given by the scheduling policy, and only while the
+        concurrency controller has a slot free for them. A failed attempt
+        frees its worker immediately; retryable files wait in a delay queue and
+        are resubmitted when their backoff expires.
+        
+        Jobs are pulled from the iterable only while fewer than
+        max_queued_files listed files are waiting, so a lazily generated plan
+        of any size is processed in bounded memory.
+        
+        With warm_connections, files of a host not seen before in the run are
+        held back until that host's warm-up has finished, so the first
+        transfers don't open cold connections of their own next to it.
+        
+        With post_process, each newly downloaded file then goes to a third
+        stage on the process pool. No new transfers start while
+        max_pending_cpu files are waiting there, so a slow CPU stage holds back
+        the network stages instead of piling up work.
+        
+        Args:
+            jobs: (symbols, biz_type, product_id, start_date, end_date) tuples,
+                possibly a generator
+            output_dir: Output directory path
+            max_retries: Maximum attempts per file (default: the downloader's max_retries)
+            list_job: Called with each job to produce its (file information,
+                symbol) tuples (default: _list_job, which lists from the API)
+            on_job_done: Called from the pipeline thread with (job, error,
+                listed) once every file of a job has finished; error is None on
+                success, and listed is False if the listing itself failed
+            attempt_download: Makes one attempt at a file (default:
+                _attempt_download)
+            
+        Returns:
+            Dictionary with download statistics
+        """
+        max_retries = max_retries or self._retry_policy.max_retries
+        list_job = list_job or self._list_job
+        attempt_download = attempt_download or self._attempt_download
+        # Resolved once, so per-file manifest lookups are plain string keys
+        output_dir = str(Path(output_dir).resolve())
+        started = time.monotonic()
+        bytes_before = self._bytes_received
         successful = 0
         failed = 0
+        retries = 0
+        total_files = 0
+        post_processed = 0
+        post_failed = 0
+        post_pending = 0
         
-        with ThreadPoolExecutor(max_workers=self.parallel_downloads) as executor:
-            # Submit all download tasks
-            future_to_file = {
-                executor.submit(self._download_file, file_info, str(output_path)): file_info
-                for file_info in all_files
-            }
+        # Future -> ('list', job), ('file', task), ('warm', host) or ('post', path). Files
+        # wait in a ready heap ordered by the scheduling policy and are only handed to the
+        # pool when a worker is free; delayed retries live in a second heap keyed by time.
+        pending = {}
+        ready = []
+        delayed = []
+        sequence = 0
+        in_flight = 0
+        schedule_key = self._schedule_key
+        warmed_hosts = set()
+        # Host -> tasks held back until the host's warm-up finishes
+        warming: Dict[str, List[Dict]] = {}
+        # Resolved when the concurrency limit changes, so a raised limit is used at once
+        wake = Future()
+        wake_lock = threading.Lock()
+        
+        def limit_changed(limit):
+            with wake_lock:
+                if not wake.done():
+                    wake.set_result(limit)
+        
+        with ThreadPoolExecutor(max_workers=self.listing_concurrency) as list_executor, \
+                ThreadPoolExecutor(max_workers=self._concurrency.max_limit) as executor, \
+                self._concurrency.listen(limit_changed):
             
-            # Process completed downloads
-            for future in as_completed(future_to_file):
-                file_info = future_to_file[future]
-                try:
-                    result = future.result()
-                    if result:
+            def enqueue(task):
+                nonlocal sequence
+                sequence += 1
+                heapq.heappush(ready, (schedule_key(task['file_info']), sequence, task))
+            
+            job_iter = iter(jobs)
+            jobs_left = True
+            listing = 0
+            
+            def submit_listings():
+                # Backpressure: only list more while the queue of waiting files is short
+                nonlocal jobs_left, listing
+                while jobs_left and listing < self.listing_concurrency and len(ready) < self.max_queued_files:
+                    job = next(job_iter, None)
+                    if job is None:
+                        jobs_left = False
+                        return
+                    pending[list_executor.submit(list_job, *job)] = ('list', job)
+                    listing += 1
+            
+            submit_listings()
+            while pending or ready or delayed:
+                timeout = max(0.0, delayed[0][0] - time.monotonic()) if delayed else None
+                if pending:
+                    done, _ = wait([wake, *pending], timeout=timeout, return_when=FIRST_COMPLETED)
+                    if wake in done:
+                        done.discard(wake)
+                        with wake_lock:
+                            wake = Future()
+                else:
+                    time.sleep(timeout or 0.0)
+                    done = set()
+                
+                for future in done:
+                    kind, item = pending.pop(future)
+                    
+                    if kind == 'warm':
+                        try:
+                            future.result()
+                        except Exception as e:
+                            self.logger.debug(f"Warming up {item} failed: {e}")
+                        warmed_hosts.add(item)
+                        for task in warming.pop(item):
+                            enqueue(task)
+                        continue
+                    
+                    if kind == 'post':
+                        post_pending -= 1
+                        try:
+                            future.result()
+                            post_processed += 1
+                        except Exception as e:
+                            self.logger.error(f"Post-processing failed for {item}: {e}")
+                            post_failed += 1
+                        continue
+                    
+                    if kind == 'list':
+                        listing -= 1
+                        _, biz_type, product_id, chunk_start, chunk_end = item
+                        try:
+                            files = future.result()
+                        except Exception as e:
+                            self.logger.error(f"Failed to get files for {chunk_start} to {chunk_end}: {e}")
+                            if on_job_done is not None:
+                                on_job_done(item, f"listing failed: {e}", False)
+                            continue
+                        
+                        self.logger.info(f"Found {len(files)} files for {chunk_start} to {chunk_end}")
+                        total_files += len(files)
+                        # Files of a job share a tracker so its completion can be reported
+                        tracker = {'job': item, 'remaining': len(files), 'failed': 0}
+                        if not files and on_job_done is not None:
+                            on_job_done(item, None, True)
+                        for file_info, symbol in files:
+                            output_path = Path(output_dir) / biz_type / product_id / symbol
+                            task = {'file_info': file_info, 'output_dir': str(output_path),
+                                    'attempt': 0, 'delay': None, 'tracker': tracker}
+                            host = httpx.URL(file_info['url']).host if self.warm_connections > 0 else None
+                            if host is None or host in warmed_hosts:
+                                enqueue(task)
+                                continue
+                            if host not in warming:
+                                # First file of a new host: warm it up before any transfer starts
+                                warming[host] = []
+                                pending[list_executor.submit(self.warm_up, file_info['url'])] = ('warm', host)
+                            warming[host].append(task)
+                        continue
+                    
+                    in_flight -= 1
+                    try:
+                        status, retry_after = future.result()
+                    except Exception as e:
+                        self.logger.error(f"Download task failed for {item['file_info']['filename']}: {e}")
+                        status, retry_after = FATAL, None
+                    
+                    if status in COMPLETED:
                         successful += 1
+                        if status == DONE and self.post_process is not None:
+                            path = str(Path(item['output_dir']) / item['file_info']['filename'])
+                            pending[self._get_cpu_pool().submit(self.post_process, path)] = ('post', path)
+                            post_pending += 1
+                    elif status == RETRY and item['attempt'] + 1 < max_retries:
+                        item['attempt'] += 1
+                        item['delay'] = self._retry_policy.next_delay(item['delay'], retry_after)
+                        retries += 1
+                        sequence += 1
+                        heapq.heappush(delayed, (time.monotonic() + item['delay'], sequence, item))
+                        continue
                     else:
+                        if status == RETRY:
+                            self.logger.error(f"Failed to download {item['file_info']['filename']} "
+                                              f"after {max_retries} attempts")
                         failed += 1
-                except Exception as e:
-                    self.logger.error(f"Download task failed for {file_info['filename']}: {e}")
-                    failed += 1
+                        item['tracker']['failed'] += 1
+                    
+                    tracker = item['tracker']
+                    tracker['remaining'] -= 1
+                    if tracker['remaining'] == 0 and on_job_done is not None:
+                        error = f"{tracker['failed']} files failed" if tracker['failed'] else None
+                        on_job_done(tracker['job'], error, True)
+                
+                # Requeue retries whose backoff has expired
+                while delayed and delayed[0][0] <= time.monotonic():
+                    enqueue(heapq.heappop(delayed)[2])
+                
+                # Hand the highest-priority files to free transfer slots, unless
+                # the CPU stage is backed up. Files stay in the heap while the
+                # controller's current limit is reached, so the policy decides
+                # which file gets the next free slot.
+                while ready and in_flight < self._concurrency.limit and post_pending < self.max_pending_cpu:
+                    task = heapq.heappop(ready)[2]
+                    future = executor.submit(attempt_download, task['file_info'],
+                                             task['output_dir'], task['attempt'])
+                    pending[future] = ('file', task)
+                    in_flight += 1
+                
+                submit_listings()
+        
+        if total_files == 0:
+            self.logger.warning("No files found for the specified parameters")
+            return {'total_files': 0, 'downloaded': 0, 'failed': 0}
         
+        self._record_throughput(self._bytes_received - bytes_before, time.monotonic() - started)
         stats = {
-            'total_files': len(all_files),
+            'total_files': total_files,
             'downloaded': successful,
-            'failed': failed
+            'failed': failed,
+            'retries': retries
         }
+        if self._concurrency.adaptive:
+            stats.update(self._concurrency.stats())
+        if len(self._egress.paths) > 1:
+            stats['egress'] = self._egress.stats()
+        if self.post_process is not None:
+            stats['post_processed'] = post_processed
+            stats['post_failed'] = post_failed
+        return stats
+    
+    def _run_checkpointed(self, jobs: List[Tuple[List[str], str, str, str, str]],
+                          output_dir: str, max_retries: Optional[int] = None) -> Dict[str, int]:
+        """
+        Run listing jobs through the pipeline, checkpointed in the job queue if there is one.
+        
+        The job is identified by its listing jobs and output directory. Items
+        that were already listed are not listed again, files already done are
+        not touched, and files that were in flight resume from their partial
+        data. An item's files that are still not done when it finishes are
+        recorded as failed; an item whose listing failed stays open for the
+        next run.
+        """
+        if self._job_queue is None:
+            return self._run_pipeline(jobs, output_dir, max_retries)
+        
+        queue = self._job_queue
+        output_dir = str(Path(output_dir).resolve())
+        items = [[list(symbols), biz_type, product_id, chunk_start, chunk_end]
+                 for symbols, biz_type, product_id, chunk_start, chunk_end in jobs]
+        job_id = hashlib.sha256(json.dumps([items, output_dir]).encode()).hexdigest()[:16]
+        resumed = queue.open_job(job_id, items, {'output_dir': output_dir})
+        open_items = queue.open_items(job_id)
+        if resumed:
+            self.logger.info(f"Resuming job {job_id}: {len(open_items)}/{len(items)} items open, "
+                             f"files {queue.counts(job_id)}")
+        
+        item_ids = {json.dumps(item): item_id for item_id, item in open_items}
+        # (output directory, filename) -> (item id, symbol) of files being worked on
+        origins: Dict[Tuple[str, str], Tuple[int, str]] = {}
+        origins_lock = threading.Lock()
+        
+        def list_item(symbols, biz_type, product_id, chunk_start, chunk_end):
+            item_id = item_ids[json.dumps([symbols, biz_type, product_id, chunk_start, chunk_end])]
+            files = queue.listed_files(job_id, item_id)
+            if files is None:
+                files = self._list_job(symbols, biz_type, product_id, chunk_start, chunk_end)
+                queue.record_listing(job_id, item_id, files)
+            with origins_lock:
+                for file_info, symbol in files:
+                    key = (str(Path(output_dir) / biz_type / product_id / symbol), file_info['filename'])
+                    origins[key] = (item_id, symbol)
+            return files
         
-        self.logger.info(f"Download completed: {successful}/{len(all_files)} files successful")
+        def attempt(file_info, file_output_dir, attempt_number):
+            with origins_lock:
+                item_id, symbol = origins[(file_output_dir, file_info['filename'])]
+            queue.set_file_state(job_id, item_id, symbol, file_info['filename'], IN_FLIGHT)
+            status, retry_after = self._attempt_download(file_info, file_output_dir, attempt_number)
+            if status in COMPLETED:
+                queue.set_file_state(job_id, item_id, symbol, file_info['filename'], FILE_DONE)
+                with origins_lock:
+                    origins.pop((file_output_dir, file_info['filename']), None)
+            return status, retry_after
+        
+        def finished(job, error, listed):
+            if listed:
+                queue.finish_item(job_id, item_ids[json.dumps(job)])
+        
+        stats = self._run_pipeline([item for _, item in open_items], output_dir, max_retries,
+                                   list_job=list_item, on_job_done=finished, attempt_download=attempt)
+        queue.finish_job(job_id)
+        if resumed:
+            stats['resumed'] = True
         return stats
     
-    def _validate_biz_type(self, biz_type: str) -> None:
-        """Validate biz_type parameter."""
-        if biz_type not in ['spot', 'contract']:
-            raise ValueError("biz_type must be 'spot' or 'contract'")
+    def _record_throughput(self, nbytes: int, elapsed: float) -> None:
+        """Remember the aggregate throughput of a run for later ETA estimates."""
+        # Runs that mostly skipped existing files say nothing about the link
+        if nbytes < 1024 * 1024 or elapsed <= 0:
+            return
+        self._throughput = nbytes / elapsed
+        if self._metadata_cache is not None:
+            self._metadata_cache.put_measurement('throughput', self._throughput)
     
-    def _validate_product_id(self, product_id: str) -> None:
-        """Validate product_id parameter."""
-        if product_id not in ['trade', 'orderbook']:
-            raise ValueError("product_id must be 'trade' or 'orderbook'")
+    def measured_throughput(self) -> Optional[float]:
+        """
+        Return the aggregate throughput of the most recent run, in bytes per second.
+        
+        Falls back to the value stored in the metadata cache by an earlier
+        process, if there is one.
+        """
+        if self._throughput is None and self._metadata_cache is not None:
+            measurement = self._metadata_cache.get_measurement('throughput')
+            if measurement is not None:
+                self._throughput = measurement[0]
+        return self._throughput
+    
+    def _list_job(self, symbols: List[str], biz_type: str, product_id: str,
+                  start_date: str, end_date: str) -> List[Tuple[Dict, str]]:
+        """
+        List files for one or more symbols over one date chunk.
+        
+        Days already held in the metadata cache are served from it; only the
+        span of uncached days is requested from list-files.
+        
+        Args:
+            symbols: Symbols listed together in one list-files request
+            biz_type: Market type ('spot' or 'contract')
+            product_id: Data type ('trade' or 'orderbook')
+            start_date: Start date in 'YYYY-MM-DD' format
+            end_date: End date in 'YYYY-MM-DD' format
+            
+        Returns:
+            List of (file information, symbol) tuples
+        """
+        if self._metadata_cache is None:
+            return self._list_symbols(symbols, biz_type, product_id, start_date, end_date)
+        
+        days = self._days_in_range(start_date, end_date)
+        result = []
+        cached = {}
+        missing_days = set()
+        for symbol in symbols:
+            cached[symbol] = self._metadata_cache.get(biz_type, product_id, symbol, days)
+            missing_days.update(day for day in days if day not in cached[symbol])
+        
+        if missing_days:
+            list_start, list_end = min(missing_days), max(missing_days)
+            to_list = [symbol for symbol in symbols if len(cached[symbol]) < len(days)]
+            listed = self._list_symbols(to_list, biz_type, product_id, list_start, list_end)
+            
+            listed_days = self._days_in_range(list_start, list_end)
+            for symbol in to_list:
+                symbol_files = [file_info for file_info, owner in listed if owner == symbol]
+                self._metadata_cache.put(biz_type, product_id, symbol, listed_days, symbol_files)
+                cached[symbol] = {day: files for day, files in cached[symbol].items()
+                                  if day not in listed_days}
+            result.extend(listed)
+        
+        for symbol in symbols:
+            for day_files in cached[symbol].values():
+                result.extend((file_info, symbol) for file_info in day_files)
+        return result
     
-    def _validate_date_format(self, date_str: str) -> None:
-        """Validate date string format."""
+    def _days_in_range(self, start_date: str, end_date: str) -> List[str]:
+        """Return every 'YYYY-MM-DD' day from start_date to end_date inclusive."""
+        start = datetime.strptime(start_date, '%Y-%m-%d')
+        end = datetime.strptime(end_date, '%Y-%m-%d')
+        return [(start + timedelta(days=i)).strftime('%Y-%m-%d') for i in range((end - start).days + 1)]
+    
+    def _local_days(self, directory: Path) -> set:
+        """
+        Return the days with a completed file in one symbol's directory.
+        
+        Uses the manifest when there is one; otherwise only the directory's
+        filenames are read, without a stat() per file.
+        """
+        if self._manifest is not None:
+            return self._manifest.days(directory)
+        try:
+            names = os.listdir(directory)
+        except OSError:
+            return set()
+        days = (file_day({'filename': name}) for name in names if not name.endswith(TEMPORARY_SUFFIXES))
+        return {day for day in days if day is not None}
+    
+    def _local_files(self, directory: Path, start_date: str, end_date: str) -> List[Tuple[str, int, bool]]:
+        """Return (day, size, valid) of the completed files of one symbol within a date range."""
+        if self._manifest is not None:
+            return self._manifest.entries(directory, start_date, end_date)
         try:
-            datetime.strptime(date_str, '%Y-%m-%d')
-        except ValueError:
-            raise ValueError(f"Invalid date format: {date_str}. Use 'YYYY-MM-DD'")
\ No newline at end of file
+            entries = list(os.scandir(directory))
+        except OSError:
+            return []
+        result = []
+        for entry in entries:
+            day = file_day({'filename': entry.name})
+            if day is None or not start_date <= day <= end_date or entry.name.endswith(TEMPORARY_SUFFIXES):
+                continue
+            try:
+                result.append((day, entry.stat().st_size, True))
+            except OSError:
+                continue
+        return result
+    
+    def _missing_windows(self, days: List[str]) -> List[Tuple[str, str]]:
+        """Group sorted missing days into contiguous windows of at most 7 days."""
+        windows = []
+        run_start = previous = None
+        for day in days:
+            current = datetime.strptime(day, '%Y-%m-%d')
+            if previous is not None and current - previous != timedelta(days=1):
+                windows.extend(self._split_date_range(run_start, previous.strftime('%Y-%m-%d')))
+                run_start = None
+            if run_start is None:
+                run_start = day
+            previous = current
+        if run_start is not None:
+            windows.extend(self._split_date_range(run_start, previous.strftime('%Y-%m-%d')))
+        return windows
+    
+    def _list_symbols(self, symbols: List[str], biz_type: str, product_id: str,
+                      start_date: str, end_date: str) -> List[Tuple[Dict, str]]:
+        """
+        List files for one or more symbols over one date chunk via list-files.
+        
+        Args:
+            symbols: Symbols listed together in one list-files request
+            biz_type: Market type ('spot' or 'contract')
+            product_id: Data type ('trade' or 'orderbook')
+            start_date: Start date in 'YYYY-MM-DD' format
+            end_date: End date in 'YYYY-MM-DD' format
+            
+        Returns:
+            List of (file information, symbol) tuples
+        """
+        if len(symbols) == 1:
+            files = self._get_download_files(symbols[0], start_date, end_date, biz_type, product_id)
+            return [(file_info, symbols[0]) for file_info in files]
+        
+        try:
+            files = self._get_download_files(','.join(symbols), start_date, end_date, biz_type, product_id)
+        except Exception as e:
+            self.logger.warning(f"Batched listing failed for {','.join(symbols)}, listing individually: {e}")
+            return [
+                pair
+                for symbol in symbols
+                for pair in self._list_symbols([symbol], biz_type, product_id, start_date, end_date)
+            ]
+        
+        result = []
+        for file_info in files:
+            symbol = self._symbol_for_file(file_info, symbols)
+            if symbol is None:
+                self.logger.warning(f"Could not match {file_info.get('filename')} to a requested symbol")
+                continue
+            result.append((file_info, symbol))
+        return result
+    
+    def _symbol_for_file(self, file_info: Dict, symbols: List[str]) -> Optional[str]:
+        """Find which of the batched symbols a listed file belongs to."""
+        if file_info.get('symbol') in symbols:
+            return file_info['symbol']
+        
+        # Longest prefix wins so that e.g. 'BTCUSDT' doesn't claim 'BTCUSDTPERP' files
+        filename = file_info.get('filename', '')
+        matches = [symbol for symbol in symbols if filename.startswith(symbol)]
+        return max(matches, key=len) if matches else None
\ No newline at end of file
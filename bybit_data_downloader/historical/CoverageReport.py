@@ -0,0 +1,139 @@
+from typing import Dict, List, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+class CoverageReport:
+    """
+    Symbols x days matrices of local data against the listed files.
+
+    Every matrix has one row per symbol and one column per day:
+
+    - ``listed``: the listing of that day is known (from the metadata cache)
+    - ``expected_files`` / ``expected_bytes``: files and bytes the listing reports
+    - ``local_files`` / ``local_bytes``: completed files and bytes on disk
+    - ``invalid``: a local file failed verification
+
+    Derived masks (``holes``, ``size_anomalies``, ``unknown``) are plain
+    element-wise expressions, so reports over thousands of symbols and years
+    of days stay cheap.
+    """
+
+    def __init__(self, symbols: List[str], days: List[str]):
+        """
+        Initialize an empty report.
+
+        Args:
+            symbols: Row labels
+            days: Column labels in 'YYYY-MM-DD' format
+
+        Raises:
+            ValueError: If numpy is not installed
+        """
+        if np is None:
+            raise ValueError("CoverageReport requires the numpy package")
+
+        self.symbols = list(symbols)
+        self.days = list(days)
+        shape = (len(self.symbols), len(self.days))
+        self.listed = np.zeros(shape, dtype=bool)
+        self.expected_files = np.zeros(shape, dtype=np.int32)
+        self.expected_bytes = np.zeros(shape, dtype=np.int64)
+        self.local_files = np.zeros(shape, dtype=np.int32)
+        self.local_bytes = np.zeros(shape, dtype=np.int64)
+        self.invalid = np.zeros(shape, dtype=bool)
+
+        self._symbol_index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self._day_index = {day: i for i, day in enumerate(self.days)}
+
+    def add_listed(self, symbol: str, entries: List[Tuple[str, int]], listed_days: List[str]) -> None:
+        """
+        Add listing metadata for one symbol.
+
+        Args:
+            symbol: Row label
+            entries: (day, size) of every listed file
+            listed_days: Days whose listing is known, including days without files
+        """
+        row = self._symbol_index[symbol]
+        columns = [self._day_index[day] for day in listed_days if day in self._day_index]
+        self.listed[row, columns] = True
+        columns, sizes = self._columns(entries)
+        np.add.at(self.expected_files[row], columns, 1)
+        np.add.at(self.expected_bytes[row], columns, sizes)
+
+    def add_local(self, symbol: str, entries: List[Tuple[str, int, bool]]) -> None:
+        """
+        Add the completed files found locally for one symbol.
+
+        Args:
+            symbol: Row label
+            entries: (day, size, valid) of every local file
+        """
+        row = self._symbol_index[symbol]
+        columns, sizes = self._columns([(day, size) for day, size, _ in entries])
+        np.add.at(self.local_files[row], columns, 1)
+        np.add.at(self.local_bytes[row], columns, sizes)
+        bad, _ = self._columns([(day, size) for day, size, valid in entries if not valid])
+        self.invalid[row, bad] = True
+
+    @property
+    def present(self) -> "np.ndarray":
+        """Cells with at least one local file."""
+        return self.local_files > 0
+
+    @property
+    def holes(self) -> "np.ndarray":
+        """Cells with listed files but nothing on disk."""
+        return self.listed & (self.expected_files > 0) & (self.local_files == 0)
+
+    @property
+    def size_anomalies(self) -> "np.ndarray":
+        """Cells present on disk whose files fail verification or don't add up to the listed size."""
+        mismatch = self.listed & (self.local_bytes != self.expected_bytes)
+        return self.present & (mismatch | self.invalid)
+
+    @property
+    def unknown(self) -> "np.ndarray":
+        """Cells without local data whose listing is not known."""
+        return ~self.listed & ~self.present
+
+    @property
+    def bytes_to_fill(self) -> int:
+        """Listed bytes needed to fill every hole and re-fetch every anomalous cell."""
+        return int(self.expected_bytes[self.holes | self.size_anomalies].sum())
+
+    def cells(self, mask: "np.ndarray") -> List[Tuple[str, str]]:
+        """Return the (symbol, day) labels of the cells selected by a mask."""
+        return [(self.symbols[row], self.days[column]) for row, column in np.argwhere(mask)]
+
+    def summary(self) -> Dict:
+        """
+        Summarize the report.
+
+        Returns:
+            Dictionary with cell counts, the share of listed cells with data
+            present, and the bytes needed to fill the gaps
+        """
+        expected = self.listed & (self.expected_files > 0)
+        complete = expected & self.present & ~self.size_anomalies
+        expected_cells = int(expected.sum())
+        return {
+            'symbols': len(self.symbols),
+            'days': len(self.days),
+            'present': int(self.present.sum()),
+            'holes': int(self.holes.sum()),
+            'size_anomalies': int(self.size_anomalies.sum()),
+            'unknown': int(self.unknown.sum()),
+            'coverage': round(int(complete.sum()) / expected_cells, 4) if expected_cells else None,
+            'bytes_to_fill': self.bytes_to_fill,
+        }
+
+    def _columns(self, entries: List[Tuple[str, int]]) -> Tuple["np.ndarray", "np.ndarray"]:
+        """Map (day, size) entries inside the report's range to column indices and sizes."""
+        pairs = [(self._day_index[day], size) for day, size in entries if day in self._day_index]
+        columns = np.fromiter((column for column, _ in pairs), dtype=np.intp, count=len(pairs))
+        sizes = np.fromiter((size for _, size in pairs), dtype=np.int64, count=len(pairs))
+        return columns, sizes
@@ -0,0 +1,290 @@
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from .MetadataCache import DAY_PATTERN
+
+# Working files the downloader keeps next to completed ones
+TEMPORARY_SUFFIXES = ('.part', '.validator', '.seg', '.ranges', '.ranges.tmp')
+
+class DownloadManifest:
+    """
+    Transactional SQLite record of completed downloads.
+
+    Every completed file is stored under its directory and filename with its
+    size, checksum, verification outcome, source URL and timestamps, so that
+    deciding whether a file can be skipped, or which days of a symbol are
+    present, is an indexed lookup instead of a stat() per file. The manifest
+    is trusted as-is; after files are moved or deleted behind the
+    downloader's back, rebuild it from disk with scan().
+
+    Directories are keyed by their resolved path. Each distinct directory is
+    resolved once and remembered, so lookups cost no file system calls; a
+    directory re-pointed by a symlink while the manifest is open keeps its
+    old key until the manifest is reopened.
+    """
+
+    def __init__(self, path: str):
+        """
+        Initialize the manifest.
+
+        Args:
+            path: SQLite database file
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        database = os.path.realpath(self.path)
+        self._database_files = {database, database + '-wal', database + '-shm', database + '-journal'}
+
+        # Absolute directory -> resolved directory
+        self._directories: Dict[str, str] = {}
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS files (
+                directory TEXT NOT NULL,
+                filename TEXT NOT NULL,
+                day TEXT,
+                size INTEGER NOT NULL,
+                algorithm TEXT,
+                checksum TEXT,
+                valid INTEGER NOT NULL,
+                url TEXT,
+                downloaded_at REAL,
+                verified_at REAL,
+                PRIMARY KEY (directory, filename)
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS files_by_day ON files (directory, day)")
+        self._conn.commit()
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
+
+    def get(self, file_path: Path) -> Optional[Dict]:
+        """
+        Look up the record of one file.
+
+        Args:
+            file_path: Path of the completed file
+
+        Returns:
+            Record dictionary, or None if the file is not in the manifest
+        """
+        directory, filename = self._key(file_path)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT size, algorithm, checksum, valid, url, downloaded_at, verified_at "
+                "FROM files WHERE directory = ? AND filename = ?",
+                (directory, filename)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            'size': row[0],
+            'algorithm': row[1],
+            'checksum': row[2],
+            'valid': bool(row[3]),
+            'url': row[4],
+            'downloaded_at': row[5],
+            'verified_at': row[6],
+        }
+
+    def record(self, file_path: Path, size: int, verification: Optional[Dict] = None,
+               url: Optional[str] = None, downloaded_at: Optional[float] = None) -> None:
+        """
+        Record a completed file, replacing any previous record.
+
+        Args:
+            file_path: Path of the completed file
+            size: File size in bytes
+            verification: Result of StreamVerifier.finish(), if verified
+            url: Source URL
+            downloaded_at: Completion timestamp (default: now)
+        """
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                               self._row(file_path, size, verification, url, downloaded_at))
+            self._conn.commit()
+
+    def remove(self, file_path: Path) -> None:
+        """Forget a file."""
+        with self._lock:
+            self._conn.execute("DELETE FROM files WHERE directory = ? AND filename = ?",
+                               self._key(file_path))
+            self._conn.commit()
+
+    def days(self, directory: Path) -> Set[str]:
+        """
+        Return the days with at least one valid file in a directory.
+
+        Args:
+            directory: Directory holding one symbol's files
+
+        Returns:
+            Set of 'YYYY-MM-DD' days
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT DISTINCT day FROM files WHERE directory = ? AND valid = 1 AND day IS NOT NULL",
+                (self._directory(directory),)
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def entries(self, directory: Path, start_day: str, end_day: str) -> List[Tuple[str, int, bool]]:
+        """
+        Return the recorded files of a directory within a range of days.
+
+        Args:
+            directory: Directory holding one symbol's files
+            start_day: First day in 'YYYY-MM-DD' format
+            end_day: Last day in 'YYYY-MM-DD' format
+
+        Returns:
+            List of (day, size, valid) tuples
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT day, size, valid FROM files WHERE directory = ? AND day BETWEEN ? AND ?",
+                (self._directory(directory), start_day, end_day)
+            ).fetchall()
+        return [(day, size, bool(valid)) for day, size, valid in rows]
+
+    def scan(self, root: str, workers: int = 8,
+             verifier: Optional[Callable[[Path], Dict]] = None) -> int:
+        """
+        Rebuild the records under a directory tree from what is on disk.
+
+        Directories are listed concurrently. Every completed file found replaces
+        its record (keeping a known URL and checksum when the size still
+        matches), and records of files that no longer exist are dropped.
+
+        Args:
+            root: Top-level output directory
+            workers: Number of directories listed concurrently (default: 8)
+            verifier: Optional callable mapping a file path to a verification
+                dictionary, used to checksum files without a usable record
+
+        Returns:
+            Number of files recorded
+        """
+        root_path = Path(root).resolve()
+        found = self._scan_tree(root_path, workers)
+
+        existing = {}
+        prefix = str(root_path)
+        with self._lock:
+            for row in self._conn.execute(
+                "SELECT * FROM files WHERE directory = ? OR directory LIKE ? ESCAPE '\\'",
+                (prefix, self._like_prefix(prefix))
+            ):
+                existing[(row[0], row[1])] = row
+
+        rows = []
+        for path, size, mtime in found:
+            key = (str(path.parent), path.name)
+            known = existing.get(key)
+            if known is not None and known[3] == size:
+                rows.append(known)
+                continue
+            verification = verifier(path) if verifier is not None else None
+            rows.append(self._row(path, size, verification, None, mtime))
+
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM files WHERE directory = ? OR directory LIKE ? ESCAPE '\\'",
+                (prefix, self._like_prefix(prefix))
+            )
+            self._conn.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                   rows)
+            self._conn.commit()
+        return len(rows)
+
+    def _scan_tree(self, root: Path, workers: int) -> List[Tuple[Path, int, float]]:
+        """List every completed file below root, one directory per worker task."""
+        found = []
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            pending = {executor.submit(self._scan_directory, root)}
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    files, subdirectories = future.result()
+                    found.extend(files)
+                    pending.update(executor.submit(self._scan_directory, subdirectory)
+                                   for subdirectory in subdirectories)
+        return found
+
+    def _scan_directory(self, directory: Path) -> Tuple[List[Tuple[Path, int, float]], List[Path]]:
+        """List one directory, returning (completed files, subdirectories)."""
+        files = []
+        subdirectories = []
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            return files, subdirectories
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirectories.append(Path(entry.path))
+                elif entry.is_file(follow_symlinks=False):
+                    if entry.name.endswith(TEMPORARY_SUFFIXES) or self._is_database(entry.path):
+                        continue
+                    stat = entry.stat(follow_symlinks=False)
+                    files.append((Path(entry.path), stat.st_size, stat.st_mtime))
+            except OSError:
+                continue
+        return files, subdirectories
+
+    def _is_database(self, path: str) -> bool:
+        """Whether a path is the manifest itself or one of its WAL/SHM files."""
+        return os.path.realpath(path) in self._database_files
+
+    def _directory(self, directory: Path) -> str:
+        """Return the resolved form of a directory, resolving it only the first time."""
+        directory = os.path.abspath(directory)
+        resolved = self._directories.get(directory)
+        if resolved is None:
+            resolved = self._directories[directory] = os.path.realpath(directory)
+        return resolved
+
+    def _key(self, file_path: Path) -> Tuple[str, str]:
+        """Split a file path into its (resolved directory, filename) key."""
+        directory, filename = os.path.split(file_path)
+        return self._directory(directory), filename
+
+    def _row(self, file_path: Path, size: int, verification: Optional[Dict],
+             url: Optional[str], downloaded_at: Optional[float]) -> tuple:
+        """Build a table row for a file."""
+        directory, filename = self._key(file_path)
+        match = DAY_PATTERN.search(filename)
+        verification = verification or {}
+        now = time.time()
+        return (
+            directory,
+            filename,
+            match.group(0) if match else None,
+            size,
+            verification.get('algorithm'),
+            verification.get('checksum'),
+            int(verification.get('valid', True)),
+            url,
+            downloaded_at if downloaded_at is not None else now,
+            verification.get('verified_at', now) if verification else None,
+        )
+
+    def _like_prefix(self, directory: str) -> str:
+        """LIKE pattern matching every directory below the given one."""
+        escaped = directory.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        return escaped.rstrip(os.sep) + os.sep + '%'
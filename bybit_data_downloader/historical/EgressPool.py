@@ -0,0 +1,139 @@
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+import httpx
+
+class EgressPath:
+    """
+    One way of reaching the file CDN: a client (direct or through a proxy)
+    plus an optional base URL that replaces the scheme and host of file URLs.
+
+    Keeps exponentially weighted averages of throughput and error rate.
+    """
+
+    def __init__(self, name: str, client: httpx.Client, base_url: Optional[str] = None,
+                 smoothing: float = 0.3):
+        """
+        Initialize the path.
+
+        Args:
+            name: Label used in logs and statistics
+            client: HTTP client used for transfers on this path
+            base_url: Base URL to send file requests to instead of the listed host
+            smoothing: Weight of the newest sample in the moving averages (default: 0.3)
+        """
+        self.name = name
+        self.client = client
+        self.base_url = base_url.rstrip('/') if base_url else None
+        self.smoothing = smoothing
+
+        self.throughput: Optional[float] = None
+        self.error_rate = 0.0
+        self.in_flight = 0
+        self.transfers = 0
+        self.errors = 0
+
+    def rewrite(self, url: str) -> str:
+        """Point a listed file URL at this path's base URL, if it has one."""
+        if self.base_url is None:
+            return url
+        parsed = httpx.URL(url)
+        target = self.base_url + parsed.raw_path.decode('ascii')
+        return target
+
+    def record(self, nbytes: int, elapsed: float, failed: bool) -> None:
+        """Fold one transfer outcome into the moving averages."""
+        self.transfers += 1
+        self.error_rate += self.smoothing * ((1.0 if failed else 0.0) - self.error_rate)
+        if failed:
+            self.errors += 1
+        elif nbytes > 0 and elapsed > 0:
+            sample = nbytes / elapsed
+            if self.throughput is None:
+                self.throughput = sample
+            else:
+                self.throughput += self.smoothing * (sample - self.throughput)
+
+    def stats(self) -> Dict:
+        """Return the path's health figures."""
+        return {
+            'transfers': self.transfers,
+            'errors': self.errors,
+            'throughput': round(self.throughput or 0.0),
+            'error_rate': round(self.error_rate, 3),
+        }
+
+class EgressPool:
+    """
+    Spreads transfers across several egress paths by live health score.
+
+    A path's score is its smoothed per-transfer throughput, scaled down by its
+    recent error rate and by how busy it already is. Paths are picked at
+    random in proportion to their score, with a floor so that degraded paths
+    still get the occasional probe transfer and can recover. Paths without
+    measurements yet are scored like the best known path so they get tried.
+    """
+
+    def __init__(self, paths: List[EgressPath], min_share: float = 0.05):
+        """
+        Initialize the pool.
+
+        Args:
+            paths: Available egress paths (at least one)
+            min_share: Minimum fraction of the best score any path keeps (default: 0.05)
+        """
+        if not paths:
+            raise ValueError("EgressPool needs at least one path")
+        self.paths = paths
+        self.min_share = min_share
+        self._lock = threading.Lock()
+
+    def choose(self) -> EgressPath:
+        """Pick the path for the next transfer."""
+        if len(self.paths) == 1:
+            return self.paths[0]
+
+        with self._lock:
+            known = [path.throughput for path in self.paths if path.throughput is not None]
+            best = max(known) if known else 1.0
+            scores = []
+            for path in self.paths:
+                throughput = path.throughput if path.throughput is not None else best
+                score = throughput * (1.0 - path.error_rate) ** 2 / (1 + path.in_flight)
+                scores.append(max(score, best * self.min_share))
+            return random.choices(self.paths, weights=scores)[0]
+
+    @contextmanager
+    def use(self, path: EgressPath) -> Iterator[Dict]:
+        """
+        Track one transfer on a path.
+
+        The yielded dict's 'bytes' entry should be set to the bytes transferred;
+        an exception escaping the block counts as an error for the path.
+        """
+        with self._lock:
+            path.in_flight += 1
+        transfer = {'bytes': 0}
+        started = time.monotonic()
+        failed = True
+        try:
+            yield transfer
+            failed = False
+        finally:
+            with self._lock:
+                path.in_flight -= 1
+                path.record(transfer['bytes'], time.monotonic() - started, failed)
+
+    def stats(self) -> Dict[str, Dict]:
+        """Return health figures for every path."""
+        with self._lock:
+            return {path.name: path.stats() for path in self.paths}
+
+    def close(self, keep: Optional[httpx.Client] = None) -> None:
+        """Close every path's client except ``keep``."""
+        for path in self.paths:
+            if path.client is not keep:
+                path.client.close()
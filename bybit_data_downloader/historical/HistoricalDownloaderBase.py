@@ -0,0 +1,253 @@
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import httpx
+
+class HistoricalDownloaderBase:
+    """
+    Behaviour shared by the threaded and asyncio Bybit downloaders.
+
+    Holds the API endpoints and headers, parameter validation, the splitting
+    of date ranges into API-sized chunks, and the bookkeeping that lets a
+    '.part' file be resumed with a ranged request. Subclasses provide the
+    transport.
+    """
+
+    BASE_URL = "https://www.bybit.com/x-api/quote/public/support/download"
+
+    BIZ_TYPES = ['spot', 'contract']
+    PRODUCT_IDS = ['trade', 'orderbook']
+
+    # Default headers based on the curl commands
+    HEADERS = {
+        'accept': '*/*',
+        'accept-language': 'en-US,en;q=0.9',
+        'priority': 'u=1, i',
+        'sec-ch-ua': '"Not)A;Brand";v="8", "Chromium";v="138", "Google Chrome";v="138"',
+        'sec-ch-ua-mobile': '?0',
+        'sec-ch-ua-platform': '"macOS"',
+        'sec-fetch-dest': 'empty',
+        'sec-fetch-mode': 'cors',
+        'sec-fetch-site': 'same-origin',
+        'user-agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
+    }
+
+    def help(self) -> None:
+        """Display usage information and parameter details."""
+        help_text = """
+        Bybit Data Downloader - Usage Guide
+        ==================================
+
+        Parameters:
+        -----------
+        symbol: str
+            - Trading pair symbol (e.g., 'BTCUSDT', 'ETHUSDT')
+            - Use fetch_symbols() to get available symbols
+
+        start_date: str
+            - Start date in 'YYYY-MM-DD' format
+            - Example: '2025-01-01'
+
+        end_date: str
+            - End date in 'YYYY-MM-DD' format
+            - Example: '2025-01-07'
+
+        biz_type: str
+            - Market type: 'spot' or 'contract'
+
+        product_id: str
+            - Data type: 'trade' or 'orderbook'
+
+        parallel_downloads: int
+            - Number of concurrent downloads (1-20 recommended)
+            - Default: 5
+
+        Example Usage:
+        --------------
+        downloader = ByBitHistoricalDataDownloader(parallel_downloads=10)
+
+        # Fetch available symbols
+        symbols = downloader.fetch_symbols('spot', 'trade')
+
+        # Download trade data
+        downloader.download_data(
+            symbol='BTCUSDT',
+            start_date='2025-01-01',
+            end_date='2025-01-31',
+            biz_type='spot',
+            product_id='trade',
+            output_dir='./data'
+        )
+
+        Supported Markets:
+        ------------------
+        - biz_type: 'spot', 'contract'
+        - product_id: 'trade', 'orderbook'
+
+        Note: API supports maximum 7-day ranges. Larger ranges are automatically split.
+        """
+        print(help_text)
+
+    def _validate_biz_type(self, biz_type: str) -> None:
+        """Validate biz_type parameter."""
+        if biz_type not in self.BIZ_TYPES:
+            raise ValueError("biz_type must be 'spot' or 'contract'")
+
+    def _validate_product_id(self, product_id: str) -> None:
+        """Validate product_id parameter."""
+        if product_id not in self.PRODUCT_IDS:
+            raise ValueError("product_id must be 'trade' or 'orderbook'")
+
+    def _validate_date_format(self, date_str: str) -> None:
+        """Validate date string format."""
+        try:
+            datetime.strptime(date_str, '%Y-%m-%d')
+        except ValueError:
+            raise ValueError(f"Invalid date format: {date_str}. Use 'YYYY-MM-DD'")
+
+    def _validate_request(self, biz_types: List[str], product_ids: List[str],
+                          start_date: str, end_date: str, symbols_per_request: int = 1) -> None:
+        """
+        Validate the markets, date range and batch size of a download request.
+
+        Raises:
+            ValueError: If any of them is invalid
+        """
+        for biz_type in biz_types:
+            self._validate_biz_type(biz_type)
+        for product_id in product_ids:
+            self._validate_product_id(product_id)
+        self._validate_date_format(start_date)
+        self._validate_date_format(end_date)
+        if datetime.strptime(start_date, '%Y-%m-%d') > datetime.strptime(end_date, '%Y-%m-%d'):
+            raise ValueError("start_date must be before or equal to end_date")
+        if symbols_per_request < 1:
+            raise ValueError("symbols_per_request must be at least 1")
+
+    def _split_date_range(self, start_date: str, end_date: str) -> List[Tuple[str, str]]:
+        """
+        Split date range into 7-day chunks as required by the API.
+
+        Args:
+            start_date: Start date in 'YYYY-MM-DD' format
+            end_date: End date in 'YYYY-MM-DD' format
+
+        Returns:
+            List of (start_date, end_date) tuples, each spanning max 7 days
+        """
+        start = datetime.strptime(start_date, '%Y-%m-%d')
+        end = datetime.strptime(end_date, '%Y-%m-%d')
+
+        chunks = []
+        current_start = start
+
+        while current_start <= end:
+            current_end = min(current_start + timedelta(days=6), end)
+            chunks.append((
+                current_start.strftime('%Y-%m-%d'),
+                current_end.strftime('%Y-%m-%d')
+            ))
+            current_start = current_end + timedelta(days=1)
+
+        return chunks
+
+    def _listing_jobs(self, symbols: List[str], biz_types: List[str], product_ids: List[str],
+                      start_date: str, end_date: str,
+                      symbols_per_request: int) -> List[Tuple[List[str], str, str, str, str]]:
+        """
+        Split a download into list-files requests.
+
+        Args:
+            symbols: Trading pair symbols
+            biz_types: Market types
+            product_ids: Data types
+            start_date: Start date in 'YYYY-MM-DD' format
+            end_date: End date in 'YYYY-MM-DD' format
+            symbols_per_request: Maximum symbols listed by one request
+
+        Returns:
+            List of (symbol batch, biz_type, product_id, chunk start, chunk end)
+            tuples, ordered by market, then batch, then date chunk
+        """
+        date_chunks = self._split_date_range(start_date, end_date)
+        batches = [symbols[i:i + symbols_per_request] for i in range(0, len(symbols), symbols_per_request)]
+        return [
+            (batch, biz_type, product_id, chunk_start, chunk_end)
+            for biz_type in biz_types
+            for product_id in product_ids
+            for batch in batches
+            for chunk_start, chunk_end in date_chunks
+        ]
+
+    def _resume_state(self, part_path: Path, expected_size: int) -> Tuple[int, Dict[str, str]]:
+        """
+        Work out where to resume a partial download from.
+
+        Args:
+            part_path: Path of the '.part' file
+            expected_size: File size reported by the API (0 if unknown)
+
+        Returns:
+            Tuple of (byte offset to resume from, extra request headers)
+        """
+        offset = part_path.stat().st_size if part_path.exists() else 0
+
+        # Partial data larger than the whole file can't be trusted
+        if offset == 0 or (expected_size > 0 and offset > expected_size):
+            self._discard_partial(part_path)
+            return 0, {}
+
+        headers = {'Range': f"bytes={offset}-"}
+        validator_path = part_path.with_name(part_path.name + '.validator')
+        if validator_path.exists():
+            headers['If-Range'] = validator_path.read_text().strip()
+        return offset, headers
+
+    def _resume_mode(self, response: httpx.Response, offset: int, expected_size: int) -> str:
+        """
+        Decide whether a response continues the partial file or replaces it.
+
+        Args:
+            response: Response to a (possibly ranged) GET request
+            offset: Byte offset that was requested
+            expected_size: File size reported by the API (0 if unknown)
+
+        Returns:
+            'ab' to append to the partial file, 'wb' to start it over
+        """
+        if offset == 0 or response.status_code != 206:
+            # Server ignored the range or If-Range failed, full body follows
+            return 'wb'
+
+        # Content-Range: bytes <start>-<end>/<total>
+        content_range = response.headers.get('content-range', '')
+        try:
+            range_spec, total = content_range.split(' ', 1)[1].split('/')
+            start = int(range_spec.split('-')[0])
+        except (IndexError, ValueError):
+            raise Exception(f"Invalid Content-Range header: {content_range!r}")
+
+        if start != offset:
+            raise Exception(f"Server resumed at byte {start}, expected {offset}")
+        if expected_size > 0 and total != '*' and int(total) != expected_size:
+            raise Exception(f"Remote size {total} does not match expected size {expected_size}")
+        return 'ab'
+
+    def _validator(self, response: httpx.Response) -> Optional[str]:
+        """Return the strong ETag or Last-Modified of a response, usable in If-Range."""
+        validator = response.headers.get('etag') or response.headers.get('last-modified')
+        if validator and not validator.startswith('W/'):
+            return validator
+        return None
+
+    def _save_validator(self, part_path: Path, response: httpx.Response) -> None:
+        """Store the ETag/Last-Modified of a response for later If-Range requests."""
+        validator = self._validator(response)
+        if validator:
+            part_path.with_name(part_path.name + '.validator').write_text(validator)
+
+    def _discard_partial(self, part_path: Path) -> None:
+        """Remove a partial download and its stored validator."""
+        for path in (part_path, part_path.with_name(part_path.name + '.validator')):
+            if path.exists():
+                path.unlink()
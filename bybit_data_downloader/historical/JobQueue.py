@@ -0,0 +1,193 @@
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# Listing and file states
+PENDING = 'pending'
+LISTED = 'listed'
+IN_FLIGHT = 'in_flight'
+DONE = 'done'
+FAILED = 'failed'
+
+class JobQueue:
+    """
+    Durable checkpoint of download jobs, for resuming after a crash.
+
+    A job is stored with its listing items (symbol batch, market and date
+    chunk) and, once an item has been listed, every file it produced. Files
+    move from pending to in_flight to done or failed as they are worked on.
+    A restarted job skips listed items' API calls and done files entirely;
+    files that were in flight resume from their '.part' data. Every state
+    change is committed, in WAL mode, before the work it describes goes on.
+    """
+
+    def __init__(self, path: str):
+        """
+        Initialize the queue.
+
+        Args:
+            path: SQLite database file
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY,
+                params TEXT NOT NULL,
+                state TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS listings (
+                job_id TEXT NOT NULL,
+                item_id INTEGER NOT NULL,
+                payload TEXT NOT NULL,
+                state TEXT NOT NULL,
+                PRIMARY KEY (job_id, item_id)
+            )
+            """
+        )
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS files (
+                job_id TEXT NOT NULL,
+                item_id INTEGER NOT NULL,
+                symbol TEXT NOT NULL,
+                filename TEXT NOT NULL,
+                file_info TEXT NOT NULL,
+                state TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (job_id, item_id, symbol, filename)
+            )
+            """
+        )
+        self._conn.commit()
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
+
+    def open_job(self, job_id: str, items: List[list], params: Dict) -> bool:
+        """
+        Start a job, or pick up an unfinished one with the same id.
+
+        A finished job with the same id is discarded and started afresh.
+
+        Args:
+            job_id: Identifier derived from the job's parameters
+            items: Listing items in a deterministic order, JSON-serializable
+            params: Parameters stored for reference
+
+        Returns:
+            True if an unfinished job was resumed
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT state FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+            if row is not None and row[0] != DONE:
+                return True
+            for table in ('jobs', 'listings', 'files'):
+                self._conn.execute(f"DELETE FROM {table} WHERE job_id = ?", (job_id,))
+            self._conn.execute("INSERT INTO jobs VALUES (?, ?, ?, ?, ?)",
+                               (job_id, json.dumps(params), PENDING, now, now))
+            self._conn.executemany("INSERT INTO listings VALUES (?, ?, ?, ?)",
+                                   [(job_id, item_id, json.dumps(item), PENDING)
+                                    for item_id, item in enumerate(items)])
+            self._conn.commit()
+        return False
+
+    def open_items(self, job_id: str) -> List[Tuple[int, list]]:
+        """Return the (item id, item) pairs of a job that are not finished yet."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT item_id, payload FROM listings WHERE job_id = ? AND state != ? ORDER BY item_id",
+                (job_id, DONE)
+            ).fetchall()
+        return [(item_id, json.loads(payload)) for item_id, payload in rows]
+
+    def listed_files(self, job_id: str, item_id: int) -> Optional[List[Tuple[Dict, str]]]:
+        """
+        Return the unfinished files of an item that was already listed.
+
+        Returns:
+            List of (file information, symbol) tuples, or None if the item
+            still has to be listed
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT state FROM listings WHERE job_id = ? AND item_id = ?",
+                                     (job_id, item_id)).fetchone()
+            if row is None or row[0] == PENDING:
+                return None
+            rows = self._conn.execute(
+                "SELECT file_info, symbol FROM files WHERE job_id = ? AND item_id = ? AND state != ?",
+                (job_id, item_id, DONE)
+            ).fetchall()
+        return [(json.loads(file_info), symbol) for file_info, symbol in rows]
+
+    def record_listing(self, job_id: str, item_id: int, files: List[Tuple[Dict, str]]) -> None:
+        """Store the files an item listed, atomically with marking it listed."""
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO files VALUES (?, ?, ?, ?, ?, ?, 0, ?)",
+                [(job_id, item_id, symbol, file_info['filename'], json.dumps(file_info), PENDING, now)
+                 for file_info, symbol in files]
+            )
+            self._conn.execute("UPDATE listings SET state = ? WHERE job_id = ? AND item_id = ?",
+                               (LISTED, job_id, item_id))
+            self._conn.execute("UPDATE jobs SET state = ?, updated_at = ? WHERE job_id = ?",
+                               (IN_FLIGHT, now, job_id))
+            self._conn.commit()
+
+    def set_file_state(self, job_id: str, item_id: int, symbol: str, filename: str, state: str) -> None:
+        """Move one file to a new state; starting it again counts an attempt."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE files SET state = ?, updated_at = ?, attempts = attempts + ? "
+                "WHERE job_id = ? AND item_id = ? AND symbol = ? AND filename = ?",
+                (state, time.time(), 1 if state == IN_FLIGHT else 0, job_id, item_id, symbol, filename)
+            )
+            self._conn.commit()
+
+    def finish_item(self, job_id: str, item_id: int) -> None:
+        """Close an item; any of its files not done by now have failed."""
+        with self._lock:
+            self._conn.execute("UPDATE files SET state = ?, updated_at = ? "
+                               "WHERE job_id = ? AND item_id = ? AND state != ?",
+                               (FAILED, time.time(), job_id, item_id, DONE))
+            self._conn.execute("UPDATE listings SET state = ? WHERE job_id = ? AND item_id = ?",
+                               (DONE, job_id, item_id))
+            self._conn.commit()
+
+    def finish_job(self, job_id: str) -> None:
+        """Mark a job finished if none of its items are still open."""
+        with self._lock:
+            open_items = self._conn.execute(
+                "SELECT COUNT(*) FROM listings WHERE job_id = ? AND state != ?", (job_id, DONE)
+            ).fetchone()[0]
+            if open_items == 0:
+                self._conn.execute("UPDATE jobs SET state = ?, updated_at = ? WHERE job_id = ?",
+                                   (DONE, time.time(), job_id))
+                self._conn.commit()
+
+    def counts(self, job_id: str) -> Dict[str, int]:
+        """Return the number of files of a job in each state."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT state, COUNT(*) FROM files WHERE job_id = ? GROUP BY state", (job_id,)
+            ).fetchall()
+        return dict(rows)
@@ -0,0 +1,182 @@
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Work item states
+PENDING = 'pending'
+DONE = 'done'
+FAILED = 'failed'
+
+class LeaseStore:
+    """
+    Lease-based work distribution for several nodes sharing one job.
+
+    Work items live in an SQLite database on storage every node can reach.
+    Each item belongs to a shard chosen by a stable hash of its key, so every
+    node computes the same partition. A node claims items with a time-limited
+    lease, preferring its own shard and taking over other shards' unclaimed
+    items once its own run out. Leases are renewed while the node works; items
+    whose lease expires (because their node died) become claimable again.
+
+    The database uses a rollback journal rather than WAL, since WAL's shared
+    memory index does not work across machines on network filesystems.
+    """
+
+    def __init__(self, path: str, job_id: str, worker_id: str,
+                 lease_seconds: float = 300, max_attempts: int = 3):
+        """
+        Initialize the store.
+
+        Args:
+            path: SQLite database file on shared storage
+            job_id: Identifier shared by all nodes working on the same job
+            worker_id: Unique identifier of this worker
+            lease_seconds: How long a claim lasts without renewal (default: 300)
+            max_attempts: Claims of an item whose listing keeps failing before
+                it is marked failed (default: 3)
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.job_id = job_id
+        self.worker_id = worker_id
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), timeout=60, isolation_level=None,
+                                     check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS items (
+                job_id TEXT NOT NULL,
+                item_id INTEGER NOT NULL,
+                shard INTEGER NOT NULL,
+                payload TEXT NOT NULL,
+                state TEXT NOT NULL,
+                owner TEXT,
+                expires_at REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                PRIMARY KEY (job_id, item_id)
+            )
+            """
+        )
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
+
+    def populate(self, items: List[Tuple], node_count: int) -> None:
+        """
+        Register the job's work items; nodes racing to do so insert the same rows.
+
+        Args:
+            items: Work items in a deterministic order, JSON-serializable
+            node_count: Number of nodes the items are partitioned across
+        """
+        rows = []
+        for item_id, item in enumerate(items):
+            payload = json.dumps(item)
+            shard = zlib.crc32(payload.encode()) % node_count
+            rows.append((self.job_id, item_id, shard, payload, PENDING))
+        with self._transaction():
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO items (job_id, item_id, shard, payload, state) VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+
+    def claim(self, shard: int) -> Optional[Tuple[int, list]]:
+        """
+        Lease the next claimable item, preferring the given shard.
+
+        Args:
+            shard: This node's shard
+
+        Returns:
+            Tuple of (item id, item), or None if nothing is claimable right now
+        """
+        now = time.time()
+        with self._transaction():
+            row = self._conn.execute(
+                "SELECT item_id, payload FROM items "
+                "WHERE job_id = ? AND state = ? AND (owner IS NULL OR expires_at < ?) "
+                "ORDER BY shard != ?, item_id LIMIT 1",
+                (self.job_id, PENDING, now, shard)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE items SET owner = ?, expires_at = ?, attempts = attempts + 1 "
+                "WHERE job_id = ? AND item_id = ?",
+                (self.worker_id, now + self.lease_seconds, self.job_id, row[0])
+            )
+        return row[0], json.loads(row[1])
+
+    def renew(self) -> None:
+        """Extend every lease this worker holds."""
+        with self._transaction():
+            self._conn.execute(
+                "UPDATE items SET expires_at = ? WHERE job_id = ? AND owner = ? AND state = ?",
+                (time.time() + self.lease_seconds, self.job_id, self.worker_id, PENDING)
+            )
+
+    def complete(self, item_id: int, error: Optional[str] = None) -> None:
+        """Mark a leased item done, or failed with the given error."""
+        with self._transaction():
+            self._conn.execute(
+                "UPDATE items SET state = ?, error = ?, expires_at = NULL "
+                "WHERE job_id = ? AND item_id = ? AND owner = ?",
+                (DONE if error is None else FAILED, error, self.job_id, item_id, self.worker_id)
+            )
+
+    def release(self, item_id: int, error: str) -> None:
+        """Give a leased item back for another attempt, or fail it after max_attempts."""
+        with self._transaction():
+            self._conn.execute(
+                "UPDATE items SET owner = NULL, expires_at = NULL, error = ?, "
+                "state = CASE WHEN attempts >= ? THEN ? ELSE state END "
+                "WHERE job_id = ? AND item_id = ? AND owner = ?",
+                (error, self.max_attempts, FAILED, self.job_id, item_id, self.worker_id)
+            )
+
+    def outstanding(self) -> Tuple[int, Optional[float]]:
+        """
+        Report unfinished items.
+
+        Returns:
+            Tuple of (number of pending items, earliest expiry of a lease held
+            by another worker, or None)
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COUNT(*), MIN(CASE WHEN owner != ? THEN expires_at END) "
+                "FROM items WHERE job_id = ? AND state = ?",
+                (self.worker_id, self.job_id, PENDING)
+            ).fetchone()
+        return row[0], row[1]
+
+    def counts(self) -> Dict[str, int]:
+        """Return the number of items in each state."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT state, COUNT(*) FROM items WHERE job_id = ? GROUP BY state", (self.job_id,)
+            ).fetchall()
+        return dict(rows)
+
+    @contextmanager
+    def _transaction(self) -> Iterator[None]:
+        """Write transaction that takes the database lock up front."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
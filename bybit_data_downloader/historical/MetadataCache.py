@@ -0,0 +1,202 @@
+import json
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+DAY_PATTERN = re.compile(r'\d{4}-\d{2}-\d{2}')
+
+class MetadataCache:
+    """
+    Persistent SQLite cache of list-files and list-options results.
+
+    Entries are keyed by (biz_type, product_id, symbol, day) and hold the
+    files listed for that day, which may be none. Listings of past days never
+    change, so they stay valid indefinitely; days within ``recent_days`` of
+    today are only trusted for ``ttl`` seconds because files may still be
+    published for them. Symbol lists from list-options are stored with their
+    ETag so that stale entries can be refreshed with a conditional request.
+    """
+
+    def __init__(self, path: str, ttl: float = 3600, recent_days: int = 2):
+        """
+        Initialize the cache.
+
+        Args:
+            path: SQLite database file
+            ttl: Seconds a listing of a recent day stays valid (default: 3600)
+            recent_days: Number of trailing days treated as recent (default: 2)
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.recent_days = recent_days
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS list_files (
+                biz_type TEXT NOT NULL,
+                product_id TEXT NOT NULL,
+                symbol TEXT NOT NULL,
+                day TEXT NOT NULL,
+                files TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                PRIMARY KEY (biz_type, product_id, symbol, day)
+            )
+            """
+        )
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS list_options (
+                biz_type TEXT NOT NULL,
+                product_id TEXT NOT NULL,
+                symbols TEXT NOT NULL,
+                etag TEXT,
+                fetched_at REAL NOT NULL,
+                PRIMARY KEY (biz_type, product_id)
+            )
+            """
+        )
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS measurements (
+                name TEXT PRIMARY KEY,
+                value REAL NOT NULL,
+                measured_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
+
+    def get(self, biz_type: str, product_id: str, symbol: str,
+            days: List[str]) -> Dict[str, List[Dict]]:
+        """
+        Look up cached listings.
+
+        Args:
+            biz_type: Market type
+            product_id: Data type
+            symbol: Trading pair symbol
+            days: Days in 'YYYY-MM-DD' format
+
+        Returns:
+            Mapping of day to its listed files, for fresh entries only
+        """
+        if not days:
+            return {}
+
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT day, files, fetched_at FROM list_files "
+                "WHERE biz_type = ? AND product_id = ? AND symbol = ? AND day BETWEEN ? AND ?",
+                (biz_type, product_id, symbol, min(days), max(days))
+            ).fetchall()
+
+        wanted = set(days)
+        now = time.time()
+        recent = self._recent_cutoff()
+        return {
+            day: json.loads(files)
+            for day, files, fetched_at in rows
+            if day in wanted and (day < recent or now - fetched_at < self.ttl)
+        }
+
+    def put(self, biz_type: str, product_id: str, symbol: str,
+            days: List[str], files: List[Dict]) -> bool:
+        """
+        Store the listing for a range of days.
+
+        Files are assigned to days by the date in their filename; days without
+        files are stored as empty so they are not asked for again.
+
+        Args:
+            biz_type: Market type
+            product_id: Data type
+            symbol: Trading pair symbol
+            days: Every day covered by the listing, in 'YYYY-MM-DD' format
+            files: File information dictionaries returned by list-files
+
+        Returns:
+            False if a file could not be assigned to a day (nothing is cached)
+        """
+        by_day: Dict[str, List[Dict]] = {day: [] for day in days}
+        for file_info in files:
+            day = file_day(file_info)
+            if day not in by_day:
+                return False
+            by_day[day].append(file_info)
+
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO list_files VALUES (?, ?, ?, ?, ?, ?)",
+                [(biz_type, product_id, symbol, day, json.dumps(day_files), now)
+                 for day, day_files in by_day.items()]
+            )
+            self._conn.commit()
+        return True
+
+    def get_symbols(self, biz_type: str, product_id: str) -> Optional[Tuple[List[str], Optional[str], float]]:
+        """
+        Look up a cached list-options result, fresh or not.
+
+        Args:
+            biz_type: Market type
+            product_id: Data type
+
+        Returns:
+            Tuple of (symbols, ETag, fetch timestamp), or None if never cached
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT symbols, etag, fetched_at FROM list_options WHERE biz_type = ? AND product_id = ?",
+                (biz_type, product_id)
+            ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1], row[2]
+
+    def put_symbols(self, biz_type: str, product_id: str, symbols: List[str],
+                    etag: Optional[str] = None) -> None:
+        """Store a list-options result with its ETag for conditional refreshes."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO list_options VALUES (?, ?, ?, ?, ?)",
+                (biz_type, product_id, json.dumps(symbols), etag, time.time())
+            )
+            self._conn.commit()
+
+    def get_measurement(self, name: str) -> Optional[Tuple[float, float]]:
+        """Return a stored measurement as (value, timestamp), or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, measured_at FROM measurements WHERE name = ?", (name,)
+            ).fetchone()
+        return (row[0], row[1]) if row is not None else None
+
+    def put_measurement(self, name: str, value: float) -> None:
+        """Store a measurement such as the throughput of the last run."""
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO measurements VALUES (?, ?, ?)",
+                               (name, value, time.time()))
+            self._conn.commit()
+
+    def _recent_cutoff(self) -> str:
+        """First day that is still considered recent."""
+        return (datetime.now(timezone.utc) - timedelta(days=self.recent_days)).strftime('%Y-%m-%d')
+
+def file_day(file_info: Dict) -> Optional[str]:
+    """Extract the 'YYYY-MM-DD' day a listed file covers from its filename."""
+    match = DAY_PATTERN.search(file_info.get('filename', ''))
+    return match.group(0) if match else None
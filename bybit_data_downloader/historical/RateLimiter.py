@@ -0,0 +1,131 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+class TokenBucket:
+    """
+    Thread-safe token bucket limiting requests per second within one process.
+
+    Tokens refill continuously at ``rate`` per second up to ``burst``. Callers
+    that find the bucket empty sleep for exactly the time until the next token
+    is due instead of polling.
+    """
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        """
+        Initialize the bucket.
+
+        Args:
+            rate: Sustained requests per second
+            burst: Maximum number of tokens that can accumulate (default: max(1, rate))
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1, int(rate))
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1) -> None:
+        """Block until ``tokens`` tokens are available, then consume them."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+class FileTokenBucket(TokenBucket):
+    """
+    Token bucket whose state lives in a file shared by every process on a host.
+
+    The bucket state is read and updated under an exclusive ``flock``, which is
+    only held for the few microseconds of the refill calculation, so processes
+    coordinate their budget without serializing their requests.
+    """
+
+    def __init__(self, path: str, rate: float, burst: Optional[int] = None):
+        """
+        Initialize the bucket.
+
+        Args:
+            path: State file shared by all participating processes
+            rate: Sustained requests per second across all processes
+            burst: Maximum number of tokens that can accumulate (default: max(1, rate))
+        """
+        if fcntl is None:
+            raise RuntimeError("FileTokenBucket requires fcntl (POSIX only)")
+
+        super().__init__(rate, burst)
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.touch(exist_ok=True)
+
+    def acquire(self, tokens: float = 1) -> None:
+        """Block until ``tokens`` tokens are available, then consume them."""
+        while True:
+            with open(self.path, 'r+') as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    # Wall-clock time, since monotonic clocks are per process
+                    now = time.time()
+                    try:
+                        state = json.loads(f.read() or '{}')
+                    except ValueError:
+                        state = {}
+                    available = state.get('tokens', float(self.burst))
+                    updated = state.get('updated', now)
+                    available = min(self.burst, available + max(0.0, now - updated) * self.rate)
+
+                    if available >= tokens:
+                        available -= tokens
+                        wait = 0.0
+                    else:
+                        wait = (tokens - available) / self.rate
+
+                    f.seek(0)
+                    f.truncate()
+                    f.write(json.dumps({'tokens': available, 'updated': now}))
+                    f.flush()
+                finally:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+            if wait == 0.0:
+                return
+            time.sleep(wait)
+
+def create_token_bucket(name: str, rate: Optional[float], burst: Optional[int] = None,
+                        state_dir: Optional[str] = None) -> Optional[TokenBucket]:
+    """
+    Build a token bucket for one endpoint budget.
+
+    Args:
+        name: Budget name, used as the state file name when shared
+        rate: Requests per second, or None for no limit
+        burst: Maximum burst size (default: max(1, rate))
+        state_dir: Directory for cross-process state, or None for an
+            in-process bucket
+
+    Returns:
+        A TokenBucket, a FileTokenBucket, or None if rate is None
+    """
+    if rate is None:
+        return None
+    if state_dir is None:
+        return TokenBucket(rate, burst)
+    return FileTokenBucket(os.path.join(state_dir, f"{name}.bucket"), rate, burst)
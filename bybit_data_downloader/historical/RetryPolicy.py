@@ -0,0 +1,97 @@
+import random
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional, Tuple
+
+import httpx
+
+# Outcomes of a single download attempt
+DONE = 'done'
+SKIPPED = 'skipped'
+RETRY = 'retry'
+FATAL = 'fatal'
+COMPLETED = (DONE, SKIPPED)
+
+RETRYABLE_STATUS_CODES = {408, 425, 429}
+
+class RetryPolicy:
+    """
+    Retry classification and backoff for download attempts.
+
+    Transport errors, timeouts, 408/425/429 and 5xx responses, and size or
+    integrity mismatches are retryable; other 4xx responses and local disk
+    errors are fatal. Delays use decorrelated jitter (each delay is drawn
+    between base_delay and three times the previous one, capped at max_delay),
+    and never undercut a server's Retry-After.
+    """
+
+    def __init__(self, max_retries: int = 3, base_delay: float = 1.0, max_delay: float = 60.0):
+        """
+        Initialize the policy.
+
+        Args:
+            max_retries: Maximum attempts per file (default: 3)
+            base_delay: Smallest delay between attempts in seconds (default: 1.0)
+            max_delay: Largest delay between attempts in seconds (default: 60.0)
+        """
+        if max_retries < 1:
+            raise ValueError("max_retries must be at least 1")
+
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def classify(self, error: Exception) -> Tuple[str, Optional[float]]:
+        """
+        Classify a failed attempt.
+
+        Args:
+            error: Exception raised by the attempt
+
+        Returns:
+            Tuple of (RETRY or FATAL, Retry-After seconds if the server sent one)
+        """
+        if isinstance(error, httpx.HTTPStatusError):
+            response = error.response
+            if response.status_code in RETRYABLE_STATUS_CODES or response.status_code >= 500:
+                return RETRY, parse_retry_after(response.headers.get('retry-after'))
+            return FATAL, None
+        if isinstance(error, httpx.TransportError):
+            return RETRY, None
+        if isinstance(error, OSError):
+            # Disk full, permissions and the like won't fix themselves
+            return FATAL, None
+        return RETRY, None
+
+    def next_delay(self, previous: Optional[float], retry_after: Optional[float] = None) -> float:
+        """
+        Compute the delay before the next attempt.
+
+        Args:
+            previous: Delay used before the previous attempt, None for the first retry
+            retry_after: Delay requested by the server, if any
+
+        Returns:
+            Delay in seconds
+        """
+        upper = max(self.base_delay, (previous or self.base_delay) * 3)
+        delay = min(self.max_delay, random.uniform(self.base_delay, upper))
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given either as seconds or as an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
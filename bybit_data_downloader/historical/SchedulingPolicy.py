@@ -0,0 +1,50 @@
+from datetime import datetime
+from typing import Any, Callable, Dict, Union
+
+from .MetadataCache import file_day
+
+def largest_first(file_info: Dict) -> Any:
+    """Biggest files first, so the longest transfers don't form the tail of a run."""
+    return -int(file_info.get('size', 0) or 0)
+
+def smallest_first(file_info: Dict) -> Any:
+    """Smallest files first, to get the most files done early."""
+    return int(file_info.get('size', 0) or 0)
+
+def oldest_first(file_info: Dict) -> Any:
+    """Earliest days first, for backfills that should fill in chronologically."""
+    return file_day(file_info) or ''
+
+def newest_first(file_info: Dict) -> Any:
+    """Latest days first, so the freshest data lands earliest."""
+    day = file_day(file_info)
+    return -datetime.strptime(day, '%Y-%m-%d').toordinal() if day else 0
+
+def listing_order(file_info: Dict) -> Any:
+    """Keep the order in which files were listed."""
+    return 0
+
+SCHEDULING_POLICIES = {
+    'largest_first': largest_first,
+    'smallest_first': smallest_first,
+    'oldest_first': oldest_first,
+    'newest_first': newest_first,
+    'listing_order': listing_order,
+}
+
+def resolve_policy(policy: Union[str, Callable[[Dict], Any]]) -> Callable[[Dict], Any]:
+    """
+    Turn a policy name or key function into a sort key for file information.
+
+    Args:
+        policy: One of SCHEDULING_POLICIES, or a callable mapping a file
+            information dictionary to a sort key (lower runs first)
+
+    Returns:
+        Sort key function
+    """
+    if callable(policy):
+        return policy
+    if policy not in SCHEDULING_POLICIES:
+        raise ValueError(f"scheduling must be one of {list(SCHEDULING_POLICIES)} or a callable")
+    return SCHEDULING_POLICIES[policy]
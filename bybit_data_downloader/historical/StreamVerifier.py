@@ -0,0 +1,149 @@
+import hashlib
+import zlib
+from typing import Dict, Optional
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+ZIP_LOCAL_HEADER = b'PK\x03\x04'
+ZIP_END_OF_CENTRAL_DIR = b'PK\x05\x06'
+# End-of-central-directory record is 22 bytes plus an optional 64 KiB comment
+ZIP_TAIL_SIZE = 22 + 65535
+
+SUPPORTED_CHECKSUMS = ['crc32', 'sha256', 'xxh64']
+
+class StreamVerifier:
+    """
+    Incremental checksum and archive validation for a file being streamed.
+
+    Every byte is fed through update() exactly once as it is written, so a
+    download is verified in the same pass that stores it. ``.gz`` files are
+    inflated incrementally (output discarded) to prove the whole stream
+    decompresses and ends properly; ``.zip`` files get a structural check of
+    the local header and end-of-central-directory record.
+    """
+
+    def __init__(self, filename: str, algorithm: Optional[str] = 'crc32', check_archive: bool = True):
+        """
+        Initialize the verifier.
+
+        Args:
+            filename: Name of the file, used to pick the archive check
+            algorithm: 'crc32', 'sha256', 'xxh64' (needs xxhash) or None
+            check_archive: Validate gzip/zip structure while streaming (default: True)
+        """
+        if algorithm is not None and algorithm not in SUPPORTED_CHECKSUMS:
+            raise ValueError(f"checksum must be one of {SUPPORTED_CHECKSUMS} or None")
+        if algorithm == 'xxh64' and xxhash is None:
+            raise ValueError("checksum 'xxh64' requires the xxhash package")
+
+        self.algorithm = algorithm
+        self.size = 0
+        self._crc = 0
+        self._hash = None
+        if algorithm == 'sha256':
+            self._hash = hashlib.sha256()
+        elif algorithm == 'xxh64':
+            self._hash = xxhash.xxh64()
+
+        self._format = None
+        if check_archive:
+            if filename.endswith('.gz'):
+                self._format = 'gzip'
+            elif filename.endswith('.zip'):
+                self._format = 'zip'
+
+        self._error: Optional[str] = None
+        self._inflater = zlib.decompressobj(16 + zlib.MAX_WBITS) if self._format == 'gzip' else None
+        self._head = b''
+        self._tail = b''
+
+    def update(self, data) -> None:
+        """Feed the next block of file data."""
+        self.size += len(data)
+        if self.algorithm == 'crc32':
+            self._crc = zlib.crc32(data, self._crc)
+        elif self._hash is not None:
+            self._hash.update(data)
+
+        if self._error is not None:
+            return
+        if self._format == 'gzip':
+            self._inflate(bytes(data))
+        elif self._format == 'zip':
+            if len(self._head) < len(ZIP_LOCAL_HEADER):
+                self._head += bytes(data[:len(ZIP_LOCAL_HEADER) - len(self._head)])
+            self._tail = (self._tail + bytes(data))[-ZIP_TAIL_SIZE:]
+
+    def finish(self) -> Dict:
+        """
+        Complete verification.
+
+        Returns:
+            Dictionary with 'size', 'algorithm', 'checksum', 'valid' and 'error'
+        """
+        if self._error is None:
+            if self._format == 'gzip' and not self._inflater.eof:
+                self._error = "gzip stream is truncated"
+            elif self._format == 'zip':
+                if self._head != ZIP_LOCAL_HEADER:
+                    self._error = "missing zip local file header"
+                elif ZIP_END_OF_CENTRAL_DIR not in self._tail:
+                    self._error = "missing zip end of central directory"
+
+        if self.algorithm == 'crc32':
+            checksum = f"{self._crc & 0xffffffff:08x}"
+        elif self._hash is not None:
+            checksum = self._hash.hexdigest()
+        else:
+            checksum = None
+
+        return {
+            'size': self.size,
+            'algorithm': self.algorithm,
+            'checksum': checksum,
+            'valid': self._error is None,
+            'error': self._error
+        }
+
+    def _inflate(self, data: bytes) -> None:
+        """Decompress data in bounded steps, handling multi-member gzip files."""
+        try:
+            while data:
+                if self._inflater.eof:
+                    # Trailing zero padding after the last member is allowed
+                    if not data.strip(b'\x00'):
+                        return
+                    self._inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)
+                self._inflater.decompress(data, 1024 * 1024)
+                if self._inflater.eof:
+                    data = self._inflater.unused_data
+                else:
+                    data = self._inflater.unconsumed_tail
+        except zlib.error as e:
+            self._error = f"invalid gzip data: {e}"
+
+def verify_path(path: str, filename: str, algorithm: Optional[str] = 'crc32',
+                check_archive: bool = True, block_size: int = 1024 * 1024) -> Dict:
+    """
+    Checksum and archive-check a file on disk.
+
+    A module-level function so that it can run in a worker process.
+
+    Args:
+        path: File to read
+        filename: Name used to pick the archive check
+        algorithm: Checksum algorithm, as for StreamVerifier
+        check_archive: Validate gzip/zip structure (default: True)
+        block_size: Read size in bytes (default: 1 MiB)
+
+    Returns:
+        Result of StreamVerifier.finish()
+    """
+    verifier = StreamVerifier(filename, algorithm, check_archive)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            verifier.update(block)
+    return verifier.finish()
@@ -0,0 +1,128 @@
+import queue
+import threading
+from typing import BinaryIO, Callable, Optional
+
+class WriteBehindWriter:
+    """
+    Coalescing file writer with an optional dedicated writer thread.
+
+    Incoming network chunks are copied into one of a small set of preallocated
+    buffers. Full buffers are written with a single ``write`` call, either
+    inline or, with ``write_behind``, by a background thread while the caller
+    keeps reading from the network. Buffers are recycled, so a transfer
+    allocates ``buffers * buffer_size`` bytes once no matter how large the
+    file is. When the disk falls behind, the caller blocks waiting for a free
+    buffer, which bounds memory use.
+    """
+
+    def __init__(self, f: BinaryIO, buffer_size: int = 1024 * 1024,
+                 write_behind: bool = True, buffers: int = 4,
+                 observer: Optional[Callable[[memoryview], None]] = None):
+        """
+        Initialize the writer.
+
+        Args:
+            f: Binary file object, already positioned where data should go
+            buffer_size: Size of each write buffer in bytes (default: 1 MiB)
+            write_behind: Write full buffers from a dedicated thread (default: True)
+            buffers: Number of buffers in flight when writing behind (default: 4)
+            observer: Called with every block right before it is written, on the
+                writer thread when writing behind (e.g. StreamVerifier.update)
+        """
+        self._file = f
+        self._buffer_size = buffer_size
+        self._write_behind = write_behind
+        self._observer = observer
+        self._error: Optional[BaseException] = None
+        self.bytes_written = 0
+
+        count = buffers if write_behind else 1
+        self._free: "queue.Queue[bytearray]" = queue.Queue()
+        for _ in range(count):
+            self._free.put(bytearray(buffer_size))
+        self._buffer = self._free.get()
+        self._view = memoryview(self._buffer)
+        self._filled = 0
+
+        self._pending: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self._thread = None
+        if write_behind:
+            self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+            self._thread.start()
+
+    def __enter__(self) -> "WriteBehindWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def write(self, data: bytes) -> None:
+        """Append data, handing off every buffer that fills up."""
+        data = memoryview(data)
+        while data:
+            if self._error is not None:
+                raise self._error
+
+            count = min(len(data), self._buffer_size - self._filled)
+            self._view[self._filled:self._filled + count] = data[:count]
+            self._filled += count
+            data = data[count:]
+
+            if self._filled == self._buffer_size:
+                self._flush_buffer()
+
+    def close(self) -> None:
+        """Write any buffered data and wait for the writer thread to finish."""
+        if self._filled:
+            self._flush_buffer()
+        if self._thread is not None:
+            self._pending.put(None)
+            self._thread.join()
+            self._thread = None
+        self._view.release()
+        if self._error is not None:
+            raise self._error
+
+    def _flush_buffer(self) -> None:
+        """Hand the current buffer to the disk and switch to a free one."""
+        if self._thread is None:
+            if self._observer is not None:
+                self._observer(self._view[:self._filled])
+            self._write_all(self._view[:self._filled])
+            self.bytes_written += self._filled
+            self._filled = 0
+            return
+
+        self._view.release()
+        self._pending.put((self._buffer, self._filled))
+        self._buffer = self._free.get()
+        self._view = memoryview(self._buffer)
+        self._filled = 0
+
+    def _write_all(self, view: memoryview) -> None:
+        """Write a whole block, looping over short writes of unbuffered files."""
+        while view:
+            written = self._file.write(view)
+            if written is None:
+                # Buffered file objects always write everything
+                return
+            view = view[written:]
+
+    def _run(self) -> None:
+        """Writer thread: drain full buffers to disk and recycle them."""
+        while True:
+            item = self._pending.get()
+            if item is None:
+                return
+            buffer, length = item
+            try:
+                if self._error is None:
+                    with memoryview(buffer) as view:
+                        if self._observer is not None:
+                            self._observer(view[:length])
+                        self._write_all(view[:length])
+                    self.bytes_written += length
+            except BaseException as e:
+                self._error = e
+            finally:
+                self._free.put(buffer)
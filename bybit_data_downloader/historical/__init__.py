@@ -3,7 +3,9 @@ Historical data downloader module for ByBit exchange.
 """
 
 from .ByBitHistoricalDataDownloader import ByBitHistoricalDataDownloader
+from .AsyncByBitHistoricalDataDownloader import AsyncByBitHistoricalDataDownloader
 
 __all__ = [
     "ByBitHistoricalDataDownloader",
+    "AsyncByBitHistoricalDataDownloader",
 ]
@@ -25,9 +25,12 @@ setup(
     ],
     python_requires=">=3.8",
     install_requires=[
-        "httpx>=0.24.0",
+        "httpx>=0.26.0",
     ],
     extras_require={
+        "coverage": [
+            "numpy>=1.20",
+        ],
         "dev": [
             "pytest>=7.0",
             "pytest-asyncio>=0.21.0",
@@ -0,0 +1,198 @@
+import gzip
+import json
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from bybit_data_downloader import ByBitHistoricalDataDownloader
+
+class MockBybit:
+    """
+    In-process stand-in for the Bybit download API and its file CDN.
+
+    Lists one gzip file per symbol and day, serves files with Range and ETag
+    support, and records every request it sees, when it arrived and the
+    client connection it arrived on. Tests can slow file responses down with
+    ``delay``, turn off Range support with ``ranges`` and make individual file
+    requests fail with fail().
+    """
+
+    SYMBOLS = ['BTCUSDT', 'ETHUSDT', 'SOLUSDT']
+
+    def __init__(self):
+        self.files = {}
+        self.requests = []
+        self.arrivals = []
+        self.connections = set()
+        self.faults = {}
+        self.delay = 0.0
+        self.ranges = True
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def content(self, filename):
+        """Deterministic gzip body of a listed file."""
+        with self.lock:
+            if filename not in self.files:
+                rng = random.Random(filename)
+                rows = ''.join(f"{i},{rng.random()}\n" for i in range(5000))
+                self.files[filename] = gzip.compress(rows.encode())
+            return self.files[filename]
+
+    def fail(self, filename=None, status=503, truncate=None, retry_after=None, times=1):
+        """
+        Make the next requests for a file fail.
+
+        Args:
+            filename: File to fail, or None for whichever file is requested next
+            status: Status code answered instead of the file (default: 503)
+            truncate: Instead of an error status, serve the file but close the
+                connection after this many bytes of the body
+            retry_after: Retry-After header sent with the error status
+            times: Number of requests to fail (default: 1)
+        """
+        with self.lock:
+            self.faults.setdefault(filename, []).extend(
+                [{'status': status, 'truncate': truncate, 'retry_after': retry_after}] * times
+            )
+
+    def _fault(self, filename):
+        """Pop the fault to apply to a file request, if any."""
+        with self.lock:
+            for key in (filename, None):
+                if self.faults.get(key):
+                    return self.faults[key].pop(0)
+        return None
+
+    def requests_for(self, path_part):
+        """Return the (path, headers) of every request whose path contains path_part."""
+        with self.lock:
+            return [(path, headers) for path, headers in self.requests if path_part in path]
+
+    def arrival_times(self, path_part):
+        """Return the time.monotonic() arrival of every request whose path contains path_part."""
+        with self.lock:
+            return [at for path, at in self.arrivals if path_part in path]
+
+    def list_files(self, query, host):
+        start = datetime.strptime(query['startDay'], '%Y-%m-%d')
+        end = datetime.strptime(query['endDay'], '%Y-%m-%d')
+        listed = []
+        for symbol in query['symbols'].split(','):
+            day = start
+            while day <= end:
+                filename = f"{symbol}_{day:%Y-%m-%d}_{query['productId']}.csv.gz"
+                listed.append({
+                    'filename': filename,
+                    'url': f"http://{host}/files/{filename}",
+                    'size': str(len(self.content(filename))),
+                })
+                day += timedelta(days=1)
+        return listed
+
+    def _handler(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def do_HEAD(self):
+                self._serve(body=False)
+
+            def do_GET(self):
+                self._serve(body=True)
+
+            def _serve(self, body):
+                url = urlparse(self.path)
+                query = {key: values[0] for key, values in parse_qs(url.query, keep_blank_values=True).items()}
+                with mock.lock:
+                    mock.requests.append((url.path, dict(self.headers)))
+                    mock.arrivals.append((url.path, time.monotonic()))
+                    mock.connections.add(self.client_address)
+
+                if url.path.endswith('/list-options'):
+                    return self._json({'ret_code': 0, 'result': {'symbols': mock.SYMBOLS}})
+                if url.path.endswith('/list-files'):
+                    listed = mock.list_files(query, self.headers.get('Host'))
+                    return self._json({'ret_code': 0, 'result': {'list': listed}})
+                if url.path.startswith('/files/'):
+                    return self._file(url.path.rsplit('/', 1)[1], body)
+                self._send(404, b'')
+
+            def _json(self, obj):
+                self._send(200, json.dumps(obj).encode(), {'Content-Type': 'application/json'})
+
+            def _file(self, filename, body):
+                if mock.delay:
+                    time.sleep(mock.delay)
+                fault = mock._fault(filename) if body else None
+                if fault is not None and fault['truncate'] is None:
+                    headers = {'Retry-After': fault['retry_after']} if fault['retry_after'] else {}
+                    return self._send(fault['status'], b'', headers)
+
+                data = mock.content(filename)
+                headers = {'ETag': '"v1"'}
+                requested = self.headers.get('Range') if mock.ranges else None
+                status, payload = 200, data
+                if mock.ranges:
+                    headers['Accept-Ranges'] = 'bytes'
+                if requested and self.headers.get('If-Range', '"v1"') == '"v1"':
+                    first, last = requested.split('=', 1)[1].split('-')
+                    first, last = int(first), int(last) if last else len(data) - 1
+                    headers['Content-Range'] = f"bytes {first}-{last}/{len(data)}"
+                    status, payload = 206, data[first:last + 1]
+                self._send(status, payload, headers, body, fault['truncate'] if fault else None)
+
+            def _send(self, status, payload, headers=None, body=True, truncate=None):
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                if body:
+                    self.wfile.write(payload[:truncate])
+                if truncate is not None:
+                    self.close_connection = True
+
+        return Handler
+
+@pytest.fixture
+def bybit():
+    """Running MockBybit server."""
+    server = MockBybit()
+    yield server
+    server.close()
+
+@pytest.fixture
+def downloader(bybit, monkeypatch):
+    """
+    Factory for ByBitHistoricalDataDownloaders talking to the mock server.
+
+    Takes the constructor keyword arguments (timeout defaults to 10 seconds);
+    every downloader made is closed after the test.
+    """
+    monkeypatch.setattr(ByBitHistoricalDataDownloader, 'BASE_URL', bybit.url)
+    made = []
+
+    def make(**kwargs):
+        kwargs.setdefault('timeout', 10)
+        made.append(ByBitHistoricalDataDownloader(**kwargs))
+        return made[-1]
+
+    yield make
+    for instance in made:
+        instance.close()
@@ -0,0 +1,148 @@
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from bybit_data_downloader.historical import AdaptiveConcurrencyController as controller_module
+from bybit_data_downloader.historical.AdaptiveConcurrencyController import AdaptiveConcurrencyController, Transfer
+
+class Clock:
+    """Stand-in for time.monotonic that only moves when told to."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(controller_module, 'time', SimpleNamespace(monotonic=clock))
+    return clock
+
+def record(controller, clock, nbytes=1000, latency=0.1, congested=False):
+    """Feed one finished transfer to the controller."""
+    transfer = Transfer()
+    clock.now += latency
+    transfer.bytes = nbytes
+    controller._in_flight += 1
+    controller._record(transfer, congested)
+
+def window(controller, clock, nbytes=1000, latency=0.1):
+    for _ in range(controller.window):
+        record(controller, clock, nbytes, latency)
+
+def test_increases_while_throughput_holds(clock):
+    controller = AdaptiveConcurrencyController(2, min_limit=1, max_limit=4, window=4)
+
+    window(controller, clock)
+    assert controller.limit == 3
+    window(controller, clock)
+    assert controller.limit == 4
+    window(controller, clock)
+    assert controller.limit == 4
+    assert controller.stats() == {'concurrency_limit': 4, 'concurrency_peak': 4, 'concurrency_errors': 0}
+
+def test_steps_back_when_latency_inflates(clock):
+    controller = AdaptiveConcurrencyController(2, min_limit=1, max_limit=4, window=4)
+    window(controller, clock)
+    assert controller.limit == 3
+
+    # Same bytes per second, but each transfer takes three times as long
+    window(controller, clock, nbytes=3000, latency=0.3)
+
+    assert controller.limit == 2
+
+def test_steps_back_when_throughput_drops(clock):
+    controller = AdaptiveConcurrencyController(2, min_limit=2, max_limit=4, window=4)
+    window(controller, clock)
+    assert controller.limit == 3
+
+    window(controller, clock, nbytes=500)
+    assert controller.limit == 2
+    window(controller, clock, nbytes=100)
+    # Never below min_limit
+    assert controller.limit == 2
+
+def test_congestion_halves_down_to_min(clock):
+    controller = AdaptiveConcurrencyController(8, min_limit=3, max_limit=16)
+
+    record(controller, clock, congested=True)
+    assert controller.limit == 4
+    record(controller, clock, congested=True)
+    assert controller.limit == 3
+    assert controller.stats() == {'concurrency_limit': 3, 'concurrency_peak': 8, 'concurrency_errors': 2}
+
+def test_congestion_starts_fresh_window(clock):
+    controller = AdaptiveConcurrencyController(4, min_limit=1, max_limit=8, window=4)
+    for _ in range(3):
+        record(controller, clock)
+    record(controller, clock, congested=True)
+    assert controller.limit == 2
+
+    # The transfers before the congestion don't count towards the next window
+    record(controller, clock)
+    assert controller.limit == 2
+
+def test_fixed_limit_never_moves(clock):
+    controller = AdaptiveConcurrencyController(4, window=2)
+
+    window(controller, clock)
+    record(controller, clock, congested=True)
+
+    assert not controller.adaptive
+    assert controller.limit == 4
+    assert controller.stats()['concurrency_errors'] == 1
+
+def test_listeners_see_changes(clock):
+    controller = AdaptiveConcurrencyController(2, min_limit=1, max_limit=4, window=4)
+    seen = []
+
+    with controller.listen(seen.append):
+        window(controller, clock)
+        record(controller, clock)
+        record(controller, clock, congested=True)
+        controller.set_bounds(2, 4)
+    window(controller, clock)
+
+    assert seen == [3, 1, 2]
+
+def status_error(status):
+    request = httpx.Request('GET', 'http://example.com/file')
+    return httpx.HTTPStatusError('error', request=request, response=httpx.Response(status, request=request))
+
+@pytest.mark.parametrize('error, congested', [
+    (status_error(429), True),
+    (status_error(503), True),
+    (status_error(404), False),
+    (httpx.ConnectError('refused'), True),
+    (ValueError('bad data'), False),
+])
+def test_classifies_congestion(error, congested):
+    controller = AdaptiveConcurrencyController(4, min_limit=1, max_limit=8)
+
+    with pytest.raises(type(error)):
+        with controller.slot():
+            raise error
+
+    assert controller.limit == (2 if congested else 4)
+
+@pytest.mark.parametrize('bounds', [(0, 2, 4), (3, 2, 4), (1, 5, 4)])
+def test_rejects_invalid_bounds(bounds):
+    min_limit, initial, max_limit = bounds
+    with pytest.raises(ValueError):
+        AdaptiveConcurrencyController(initial, min_limit=min_limit, max_limit=max_limit)
+
+def test_server_errors_lower_limit(downloader, bybit, tmp_path):
+    bybit.fail(status=503, times=2)
+    adaptive = downloader(parallel_downloads=4, adaptive_concurrency=True, retry_base_delay=0.01,
+                          retry_max_delay=0.05)
+
+    stats = adaptive.download_data('BTCUSDT', '2024-01-01', '2024-01-07', 'spot', 'trade', str(tmp_path))
+
+    assert stats['downloaded'] == 7
+    assert stats['concurrency_errors'] == 2
+    # Halved twice, and too few transfers afterwards for a window to raise it again
+    assert stats['concurrency_limit'] == 1
+    assert stats['concurrency_peak'] == 4
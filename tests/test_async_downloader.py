@@ -0,0 +1,82 @@
+import asyncio
+import threading
+
+import pytest
+
+from bybit_data_downloader import AsyncByBitHistoricalDataDownloader
+
+@pytest.fixture
+def downloader(bybit, monkeypatch):
+    monkeypatch.setattr(AsyncByBitHistoricalDataDownloader, 'BASE_URL', bybit.url)
+    return AsyncByBitHistoricalDataDownloader(parallel_downloads=4, timeout=10)
+
+def test_fetch_symbols(downloader, bybit):
+    assert downloader.fetch_symbols_sync('spot', 'trade') == bybit.SYMBOLS
+
+def test_download_data(downloader, bybit, tmp_path):
+    stats = downloader.download_data_sync('BTCUSDT', '2024-01-01', '2024-01-10',
+                                          'spot', 'trade', str(tmp_path))
+
+    assert stats == {'total_files': 10, 'downloaded': 10, 'failed': 0}
+    # Ten days span two 7-day listing chunks
+    assert len(bybit.requests_for('/list-files')) == 2
+    symbol_dir = tmp_path / 'spot' / 'trade' / 'BTCUSDT'
+    for path in symbol_dir.iterdir():
+        assert path.read_bytes() == bybit.content(path.name)
+
+def test_download_data_in_running_loop(downloader, tmp_path):
+    async def run():
+        async with downloader:
+            return await downloader.download_data('ETHUSDT', '2024-02-01', '2024-02-03',
+                                                  'contract', 'orderbook', str(tmp_path))
+
+    stats = asyncio.run(run())
+
+    assert stats['downloaded'] == 3
+    assert downloader._client is None
+
+def test_resumes_part_file(downloader, bybit, tmp_path):
+    symbol_dir = tmp_path / 'spot' / 'trade' / 'SOLUSDT'
+    symbol_dir.mkdir(parents=True)
+    filename = 'SOLUSDT_2024-03-01_trade.csv.gz'
+    data = bybit.content(filename)
+    (symbol_dir / (filename + '.part')).write_bytes(data[:1000])
+
+    stats = downloader.download_data_sync('SOLUSDT', '2024-03-01', '2024-03-01',
+                                          'spot', 'trade', str(tmp_path))
+
+    assert stats['downloaded'] == 1
+    assert (symbol_dir / filename).read_bytes() == data
+    assert not (symbol_dir / (filename + '.part')).exists()
+    [(_, headers)] = bybit.requests_for(filename)
+    assert headers['Range'] == 'bytes=1000-'
+
+def test_writes_blocks_off_the_loop(downloader, bybit, tmp_path, monkeypatch):
+    loop_thread = threading.get_ident()
+    write_threads = []
+    real_in_executor = downloader._in_executor
+
+    def in_executor(func, *args, **kwargs):
+        if getattr(func, '__name__', None) == 'write':
+            def write(block, write=func):
+                write_threads.append(threading.get_ident())
+                return write(block)
+            func = write
+        return real_in_executor(func, *args, **kwargs)
+
+    monkeypatch.setattr(downloader, '_in_executor', in_executor)
+
+    stats = downloader.download_data_sync('BTCUSDT', '2024-01-01', '2024-01-02',
+                                          'spot', 'trade', str(tmp_path))
+
+    assert stats['downloaded'] == 2
+    assert len(write_threads) >= 2
+    assert loop_thread not in write_threads
+    symbol_dir = tmp_path / 'spot' / 'trade' / 'BTCUSDT'
+    for path in symbol_dir.iterdir():
+        assert path.read_bytes() == bybit.content(path.name)
+
+@pytest.mark.parametrize('biz_type, product_id', [('futures', 'trade'), ('spot', 'klines')])
+def test_rejects_invalid_market(downloader, biz_type, product_id):
+    with pytest.raises(ValueError):
+        downloader.fetch_symbols_sync(biz_type, product_id)
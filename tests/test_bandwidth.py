@@ -0,0 +1,78 @@
+import threading
+import time
+from datetime import datetime
+
+import pytest
+
+from bybit_data_downloader.historical import BandwidthLimiter as bandwidth_module
+from bybit_data_downloader.historical.BandwidthLimiter import BandwidthLimiter
+
+SCHEDULE = [('22:00', '06:00', 100), ('09:00', '17:00', None)]
+
+def at(monkeypatch, hour, minute):
+    """Make the limiter see a fixed local time."""
+    class FixedDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return cls(2024, 1, 1, hour, minute)
+
+    monkeypatch.setattr(bandwidth_module, 'datetime', FixedDatetime)
+
+@pytest.mark.parametrize('hour, minute, expected', [
+    (23, 30, 100),   # inside the window that wraps past midnight
+    (0, 0, 100),
+    (5, 59, 100),
+    (6, 0, 500),     # end of a window is exclusive
+    (12, 0, None),   # a window can lift the limit
+    (17, 0, 500),
+    (21, 59, 500),
+])
+def test_schedule_windows(monkeypatch, hour, minute, expected):
+    at(monkeypatch, hour, minute)
+    limiter = BandwidthLimiter(500, SCHEDULE)
+
+    assert limiter.current_rate() == expected
+
+def test_invalid_schedule_time():
+    with pytest.raises(ValueError):
+        BandwidthLimiter(schedule=[('25:00', '06:00', 100)])
+
+def test_raised_rate_wakes_blocked_consumer():
+    limiter = BandwidthLimiter(1000)
+    # Ten seconds of debt at the original rate
+    consumer = threading.Thread(target=limiter.consume, args=(10000,))
+    consumer.start()
+    time.sleep(0.2)
+    assert consumer.is_alive()
+
+    limiter.set_rate(10 ** 9)
+    # Well before the once-a-second re-check would notice
+    consumer.join(timeout=0.5)
+
+    assert not consumer.is_alive()
+
+def test_download_is_capped(downloader, bybit, tmp_path):
+    names = [f"BTCUSDT_2024-01-0{day}_trade.csv.gz" for day in range(1, 4)]
+    total = sum(len(bybit.content(name)) for name in names)
+    # Sized so that the three files take 1.5 seconds at the cap
+    capped = downloader(parallel_downloads=3, bandwidth_limit=total / 1.5)
+
+    started = time.monotonic()
+    stats = capped.download_data('BTCUSDT', '2024-01-01', '2024-01-03', 'spot', 'trade', str(tmp_path))
+    elapsed = time.monotonic() - started
+
+    assert stats['downloaded'] == 3
+    # Less a quarter-second burst
+    assert elapsed >= 1.15
+
+def test_lifting_limit_speeds_up_running_download(downloader, tmp_path):
+    # Slow enough that the download would take minutes
+    capped = downloader(parallel_downloads=3, bandwidth_limit=1000)
+    threading.Timer(0.3, capped.set_bandwidth_limit, args=(None,)).start()
+
+    started = time.monotonic()
+    stats = capped.download_data('BTCUSDT', '2024-01-01', '2024-01-03', 'spot', 'trade', str(tmp_path))
+
+    assert stats['downloaded'] == 3
+    # Blocked transfers resume at once rather than at their next re-check
+    assert time.monotonic() - started < 0.9
@@ -0,0 +1,72 @@
+import pytest
+
+pytest.importorskip('numpy')
+
+DAYS = [f"2024-01-{day:02d}" for day in range(1, 6)]
+
+def name(symbol, day):
+    return f"{symbol}_{day}_trade.csv.gz"
+
+@pytest.fixture
+def tree(downloader, bybit, tmp_path):
+    """
+    Local data with known gaps, and a metadata cache that knows every BTCUSDT day
+    but only the first three ETHUSDT days.
+    """
+    output_dir = tmp_path / 'data'
+    seeding = downloader(parallel_downloads=2, cache_dir=str(tmp_path / 'cache'))
+    seeding.download_data('BTCUSDT', '2024-01-01', '2024-01-05', 'spot', 'trade', str(output_dir))
+    seeding.download_data('ETHUSDT', '2024-01-01', '2024-01-03', 'spot', 'trade', str(output_dir))
+    seeding.close()
+
+    btc_dir = output_dir / 'spot' / 'trade' / 'BTCUSDT'
+    (btc_dir / name('BTCUSDT', '2024-01-02')).unlink()
+    truncated = btc_dir / name('BTCUSDT', '2024-01-03')
+    truncated.write_bytes(truncated.read_bytes()[:1000])
+    bybit.requests.clear()
+    return output_dir
+
+def coverage(downloader, tmp_path, output_dir, list_missing):
+    reporting = downloader(parallel_downloads=2, cache_dir=str(tmp_path / 'cache'))
+    return reporting.coverage(['BTCUSDT', 'ETHUSDT'], 'spot', 'trade', DAYS[0], DAYS[-1], str(output_dir),
+                              list_missing=list_missing)
+
+def test_cached_listing(downloader, bybit, tree, tmp_path):
+    report = coverage(downloader, tmp_path, tree, list_missing=False)
+
+    assert bybit.requests_for('/list-files') == []
+    assert report.cells(report.holes) == [('BTCUSDT', '2024-01-02')]
+    assert report.cells(report.size_anomalies) == [('BTCUSDT', '2024-01-03')]
+    assert report.cells(report.unknown) == [('ETHUSDT', '2024-01-04'), ('ETHUSDT', '2024-01-05')]
+    assert report.bytes_to_fill == (len(bybit.content(name('BTCUSDT', '2024-01-02')))
+                                    + len(bybit.content(name('BTCUSDT', '2024-01-03'))))
+    assert report.local_bytes[0, 2] == 1000
+
+    summary = report.summary()
+    assert summary['present'] == 7
+    assert summary['holes'] == 1
+    assert summary['size_anomalies'] == 1
+    assert summary['unknown'] == 2
+    # Eight listed cells, of which BTCUSDT 01, 04, 05 and ETHUSDT 01-03 are complete
+    assert summary['coverage'] == 0.75
+
+def test_list_missing(downloader, bybit, tree, tmp_path):
+    report = coverage(downloader, tmp_path, tree, list_missing=True)
+
+    assert bybit.requests_for('/list-files')
+    assert not report.unknown.any()
+    assert report.cells(report.holes) == [('BTCUSDT', '2024-01-02'), ('ETHUSDT', '2024-01-04'),
+                                          ('ETHUSDT', '2024-01-05')]
+    assert report.cells(report.size_anomalies) == [('BTCUSDT', '2024-01-03')]
+    assert report.expected_files.sum() == 10
+    assert report.summary()['coverage'] == 0.6
+
+def test_without_cache_everything_missing_is_unknown(downloader, tree):
+    reporting = downloader(parallel_downloads=2)
+    report = reporting.coverage(['BTCUSDT', 'ETHUSDT'], 'spot', 'trade', DAYS[0], DAYS[-1], str(tree))
+
+    assert not report.listed.any()
+    assert not report.holes.any()
+    assert report.summary()['coverage'] is None
+    assert report.cells(report.unknown) == [('BTCUSDT', '2024-01-02'), ('ETHUSDT', '2024-01-04'),
+                                            ('ETHUSDT', '2024-01-05')]
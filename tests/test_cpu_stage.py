@@ -0,0 +1,76 @@
+import time
+import zlib
+
+from bybit_data_downloader.historical.DownloadManifest import DownloadManifest
+
+POST_SECONDS = 0.5
+
+def reject_second_day(path):
+    """Post-processing step that fails for one file."""
+    if '_2024-01-02_' in path:
+        raise ValueError("cannot process")
+
+def slow_post_process(path):
+    """Post-processing step that records when it finished."""
+    time.sleep(POST_SECONDS)
+    with open(path + '.post', 'w') as f:
+        f.write(str(time.time()))
+
+def download(instance, tmp_path, end_date='2024-01-03'):
+    return instance.download_data('BTCUSDT', '2024-01-01', end_date, 'spot', 'trade', str(tmp_path))
+
+def test_post_process_counts(downloader, tmp_path):
+    stats = download(downloader(parallel_downloads=2, cpu_workers=1, post_process=reject_second_day), tmp_path)
+
+    assert stats['downloaded'] == 3
+    assert stats['post_processed'] == 2
+    assert stats['post_failed'] == 1
+
+def test_transfers_wait_for_cpu_stage(downloader, tmp_path):
+    staged = downloader(parallel_downloads=1, cpu_workers=1, max_pending_cpu=1, post_process=slow_post_process)
+    # Start the worker process up front so its start-up time doesn't blur the timings
+    staged._get_cpu_pool().submit(time.sleep, 0).result()
+    started = {}
+    real_attempt = staged._attempt_download
+
+    def attempt(file_info, output_dir, attempt_number):
+        started[file_info['filename']] = time.time()
+        return real_attempt(file_info, output_dir, attempt_number)
+
+    staged._attempt_download = attempt
+    stats = download(staged, tmp_path)
+
+    assert stats['post_processed'] == 3
+    symbol_dir = tmp_path / 'spot' / 'trade' / 'BTCUSDT'
+    order = sorted(started, key=started.get)
+    for previous, following in zip(order, order[1:]):
+        # The next transfer only starts once the previous file has left the CPU stage
+        finished = float((symbol_dir / (previous + '.post')).read_text())
+        assert started[following] >= finished
+
+def test_segmented_verification_runs_in_pool(downloader, bybit, tmp_path):
+    manifest_path = str(tmp_path / 'manifest.sqlite')
+    segmented = downloader(parallel_downloads=2, segments=4, segment_threshold=1, cpu_workers=1,
+                           manifest_path=manifest_path)
+    submitted = []
+    pool = segmented._get_cpu_pool()
+    real_submit = pool.submit
+
+    def submit(fn, *args, **kwargs):
+        submitted.append(fn.__name__)
+        return real_submit(fn, *args, **kwargs)
+
+    pool.submit = submit
+    stats = download(segmented, tmp_path / 'data', end_date='2024-01-02')
+    segmented.close()
+
+    assert stats['downloaded'] == 2
+    assert submitted == ['verify_path', 'verify_path']
+    manifest = DownloadManifest(manifest_path)
+    try:
+        for path in (tmp_path / 'data' / 'spot' / 'trade' / 'BTCUSDT').iterdir():
+            record = manifest.get(path)
+            assert record['valid']
+            assert record['checksum'] == f"{zlib.crc32(bybit.content(path.name)):08x}"
+    finally:
+        manifest.close()
@@ -0,0 +1,62 @@
+import os
+
+import pytest
+
+from bybit_data_downloader.historical.DownloadManifest import DownloadManifest
+
+def test_record_and_get(tmp_path):
+    manifest = DownloadManifest(str(tmp_path / 'manifest.sqlite'))
+    directory = tmp_path / 'data' / 'spot' / 'trade' / 'BTCUSDT'
+    directory.mkdir(parents=True)
+
+    manifest.record(directory / 'BTCUSDT_2024-01-01_trade.csv.gz', 100,
+                    {'algorithm': 'crc32', 'checksum': 'abcd', 'valid': True})
+
+    record = manifest.get(directory / 'BTCUSDT_2024-01-01_trade.csv.gz')
+    assert record['size'] == 100
+    assert record['checksum'] == 'abcd'
+    assert manifest.get(directory / 'BTCUSDT_2024-01-02_trade.csv.gz') is None
+    assert manifest.days(directory) == {'2024-01-01'}
+    manifest.close()
+
+def test_directory_resolved_once(tmp_path, monkeypatch):
+    manifest = DownloadManifest(str(tmp_path / 'manifest.sqlite'))
+    real = tmp_path / 'real'
+    real.mkdir()
+    link = tmp_path / 'link'
+    link.symlink_to(real)
+
+    calls = []
+    realpath = os.path.realpath
+    monkeypatch.setattr(os.path, 'realpath', lambda path: calls.append(path) or realpath(path))
+
+    for day in range(1, 11):
+        manifest.record(link / f"BTCUSDT_2024-01-{day:02d}_trade.csv.gz", day)
+        manifest.get(real / f"BTCUSDT_2024-01-{day:02d}_trade.csv.gz")
+
+    # One resolution per distinct directory string, and both spellings share a key
+    assert len(calls) == 2
+    assert len(manifest.days(real)) == 10
+    manifest.close()
+
+@pytest.mark.parametrize('record', [True, False])
+def test_existing_file_recorded_on_first_check(downloader, tmp_path, record):
+    manifest_path = str(tmp_path / 'manifest.sqlite')
+    path = tmp_path / 'data' / 'spot' / 'trade' / 'BTCUSDT' / 'BTCUSDT_2024-01-01_trade.csv.gz'
+    path.parent.mkdir(parents=True)
+    path.write_bytes(b'x' * 100)
+
+    with downloader(manifest_path=manifest_path) as checking:
+        assert checking._is_complete(path, 100, record=record)
+        assert not checking._is_complete(path.with_name('BTCUSDT_2024-01-02_trade.csv.gz'), 100, record=record)
+
+    manifest = DownloadManifest(manifest_path)
+    try:
+        entry = manifest.get(path)
+        if record:
+            assert entry['size'] == 100
+            assert entry['valid']
+        else:
+            assert entry is None
+    finally:
+        manifest.close()
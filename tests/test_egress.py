@@ -0,0 +1,120 @@
+import http.client
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+import pytest
+
+from conftest import MockBybit
+
+SYMBOLS = ['BTCUSDT', 'ETHUSDT', 'SOLUSDT']
+
+class ForwardingProxy:
+    """Minimal HTTP forward proxy relaying each request to its absolute URL."""
+
+    HOP_HEADERS = {'connection', 'proxy-connection', 'keep-alive', 'transfer-encoding', 'content-length'}
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.relayed = 0
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _handler(self):
+        proxy = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def do_HEAD(self):
+                self._relay()
+
+            def do_GET(self):
+                self._relay()
+
+            def _relay(self):
+                with proxy.lock:
+                    proxy.relayed += 1
+                if proxy.delay:
+                    time.sleep(proxy.delay)
+                target = urlparse(self.path)
+                headers = {name: value for name, value in self.headers.items()
+                           if name.lower() not in ForwardingProxy.HOP_HEADERS}
+                upstream = http.client.HTTPConnection(target.hostname, target.port, timeout=10)
+                try:
+                    upstream.request(self.command, target.path + (f"?{target.query}" if target.query else ''),
+                                     headers=headers)
+                    response = upstream.getresponse()
+                    payload = response.read()
+                finally:
+                    upstream.close()
+
+                self.send_response(response.status)
+                for name, value in response.getheaders():
+                    if name.lower() not in ForwardingProxy.HOP_HEADERS:
+                        self.send_header(name, value)
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                if self.command == 'GET':
+                    self.wfile.write(payload)
+
+        return Handler
+
+@pytest.fixture
+def proxy():
+    server = ForwardingProxy()
+    yield server
+    server.close()
+
+@pytest.fixture
+def mirror():
+    server = MockBybit()
+    yield server
+    server.close()
+
+@pytest.fixture(autouse=True)
+def seeded():
+    random.seed(1234)
+
+def download(downloader, tmp_path):
+    with downloader:
+        stats = downloader.download_many(SYMBOLS, ['spot'], ['trade'], '2024-01-01', '2024-01-10', str(tmp_path))
+    assert stats['downloaded'] == 30
+    assert stats['failed'] == 0
+    return stats['egress']
+
+def test_transfers_move_away_from_failing_mirror(downloader, bybit, proxy, mirror, tmp_path):
+    mirror.fail(status=503, times=1000)
+    spreading = downloader(parallel_downloads=4, proxies=[proxy.url], download_mirrors=[mirror.url],
+                           max_retries=10, retry_base_delay=0.01, retry_max_delay=0.05)
+
+    egress = download(spreading, tmp_path)
+
+    failing = egress[f"mirror:{mirror.url}"]
+    assert failing['errors'] == failing['transfers']
+    assert egress['direct']['transfers'] > 0
+    assert egress[f"proxy:{proxy.url}"]['transfers'] > 0
+    assert proxy.relayed >= egress[f"proxy:{proxy.url}"]['transfers']
+    # The failing path is only probed now and then
+    assert failing['transfers'] < egress['direct']['transfers'] + egress[f"proxy:{proxy.url}"]['transfers']
+    for symbol in SYMBOLS:
+        for path in (tmp_path / 'spot' / 'trade' / symbol).glob('*.csv.gz'):
+            assert path.read_bytes() == bybit.content(path.name)
+
+def test_transfers_move_away_from_slow_proxy(downloader, proxy, tmp_path):
+    proxy.delay = 0.3
+
+    egress = download(downloader(parallel_downloads=4, proxies=[proxy.url]), tmp_path)
+
+    assert egress['direct']['transfers'] > 2 * egress[f"proxy:{proxy.url}"]['transfers']
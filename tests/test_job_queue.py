@@ -0,0 +1,57 @@
+import pytest
+
+class Crash(BaseException):
+    """Stands in for the process dying mid-run."""
+
+def queued(downloader, tmp_path):
+    return downloader(parallel_downloads=1, job_queue_path=str(tmp_path / 'jobs.sqlite'))
+
+def download(instance, tmp_path):
+    return instance.download_data('BTCUSDT', '2024-01-01', '2024-01-07', 'spot', 'trade', str(tmp_path / 'data'))
+
+def test_resumes_interrupted_job(downloader, bybit, tmp_path):
+    crashing = queued(downloader, tmp_path)
+    real_attempt = crashing._attempt_download
+    attempted = []
+
+    def crash_on_third_file(file_info, output_dir, attempt_number):
+        attempted.append(file_info['filename'])
+        if len(attempted) < 3:
+            return real_attempt(file_info, output_dir, attempt_number)
+        # Leave partial data behind, then die
+        bybit.fail(file_info['filename'], truncate=16384)
+        real_attempt(file_info, output_dir, attempt_number)
+        raise Crash()
+
+    crashing._attempt_download = crash_on_third_file
+    with pytest.raises(Crash):
+        download(crashing, tmp_path)
+    crashing.close()
+    done, interrupted = attempted[:2], attempted[2]
+    bybit.requests.clear()
+
+    stats = download(queued(downloader, tmp_path), tmp_path)
+
+    assert stats['resumed'] is True
+    assert stats['downloaded'] == 5
+    assert stats['failed'] == 0
+    # Listed items and done files are not requested again
+    assert bybit.requests_for('/list-files') == []
+    requested = [path.rsplit('/', 1)[1] for path, _ in bybit.requests_for('/files/')]
+    assert not set(done) & set(requested)
+    [(_, headers)] = bybit.requests_for(interrupted)
+    assert headers['Range'] == 'bytes=16384-'
+
+    symbol_dir = tmp_path / 'data' / 'spot' / 'trade' / 'BTCUSDT'
+    names = sorted(path.name for path in symbol_dir.glob('*.csv.gz'))
+    assert names == [f"BTCUSDT_2024-01-{day:02d}_trade.csv.gz" for day in range(1, 8)]
+    for name in names:
+        assert (symbol_dir / name).read_bytes() == bybit.content(name)
+
+def test_finished_job_starts_afresh(downloader, bybit, tmp_path):
+    with queued(downloader, tmp_path) as first:
+        download(first, tmp_path)
+    stats = download(queued(downloader, tmp_path), tmp_path)
+
+    assert 'resumed' not in stats
+    assert len(bybit.requests_for('/list-files')) == 2
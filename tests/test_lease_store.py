@@ -0,0 +1,105 @@
+import json
+import time
+import zlib
+
+import pytest
+
+from bybit_data_downloader.historical.LeaseStore import LeaseStore
+
+ITEMS = [[['BTCUSDT'], 'spot', 'trade', f"2024-01-{day:02d}", f"2024-01-{day:02d}"] for day in range(1, 7)]
+
+@pytest.fixture
+def stores(tmp_path):
+    opened = []
+
+    def open_store(worker_id, **kwargs):
+        store = LeaseStore(str(tmp_path / 'leases.sqlite'), 'job', worker_id, **kwargs)
+        opened.append(store)
+        return store
+
+    yield open_store
+    for store in opened:
+        store.close()
+
+def shard_of(item, node_count):
+    return zlib.crc32(json.dumps(item).encode()) % node_count
+
+def test_claim_prefers_own_shard(stores):
+    store = stores('a')
+    store.populate(ITEMS, 2)
+    store.populate(ITEMS, 2)
+
+    claimed = []
+    while (claim := store.claim(0)) is not None:
+        claimed.append(claim[1])
+
+    assert sorted(map(json.dumps, claimed)) == sorted(map(json.dumps, ITEMS))
+    shards = [shard_of(item, 2) for item in claimed]
+    assert shards == sorted(shards)
+
+def test_item_is_leased_once(stores):
+    a, b = stores('a'), stores('b')
+    a.populate(ITEMS, 1)
+
+    claimed = set()
+    while True:
+        claims = [a.claim(0), b.claim(0)]
+        if claims == [None, None]:
+            break
+        claimed.update(item_id for item_id, _ in filter(None, claims))
+
+    assert claimed == set(range(len(ITEMS)))
+    assert a.outstanding()[0] == len(ITEMS)
+
+def test_complete_only_by_owner(stores):
+    a, b = stores('a'), stores('b')
+    a.populate(ITEMS[:1], 1)
+    item_id, _ = a.claim(0)
+
+    b.complete(item_id)
+    assert a.counts() == {'pending': 1}
+
+    a.complete(item_id)
+    assert a.counts() == {'done': 1}
+    assert a.outstanding() == (0, None)
+
+def test_expired_lease_is_taken_over(stores):
+    a, b = stores('a', lease_seconds=0.2), stores('b')
+    a.populate(ITEMS[:1], 1)
+    item_id, _ = a.claim(0)
+
+    remaining, expiry = b.outstanding()
+    assert remaining == 1
+    assert expiry > time.time()
+    assert b.claim(0) is None
+
+    time.sleep(0.3)
+    assert b.claim(0)[0] == item_id
+    # The previous owner lost the item
+    a.complete(item_id)
+    assert a.counts() == {'pending': 1}
+
+def test_renew_extends_lease(stores):
+    a, b = stores('a', lease_seconds=0.4), stores('b')
+    a.populate(ITEMS[:1], 1)
+    a.claim(0)
+
+    time.sleep(0.25)
+    a.renew()
+    time.sleep(0.25)
+
+    assert b.claim(0) is None
+
+def test_release_retries_then_fails(stores):
+    a, b = stores('a', max_attempts=2), stores('b', max_attempts=2)
+    a.populate(ITEMS[:1], 1)
+
+    item_id, _ = a.claim(0)
+    a.release(item_id, 'listing failed')
+    assert a.counts() == {'pending': 1}
+
+    assert b.claim(0)[0] == item_id
+    b.release(item_id, 'listing failed again')
+    assert a.counts() == {'failed': 1}
+    assert a.claim(0) is None
+    assert a.outstanding() == (0, None)
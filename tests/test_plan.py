@@ -0,0 +1,24 @@
+from bybit_data_downloader.historical.DownloadManifest import DownloadManifest
+
+def test_plan_leaves_manifest_untouched(downloader, bybit, tmp_path):
+    output_dir = str(tmp_path / 'data')
+    downloader(parallel_downloads=2).download_data('BTCUSDT', '2024-01-01', '2024-01-03', 'spot', 'trade',
+                                                   output_dir)
+    bybit.requests.clear()
+
+    manifest_path = str(tmp_path / 'manifest.sqlite')
+    planner = downloader(parallel_downloads=2, manifest_path=manifest_path)
+    plan = planner.plan(['BTCUSDT'], ['spot'], ['trade'], '2024-01-01', '2024-01-05', output_dir)
+    planner.close()
+
+    assert plan['summary']['existing_files'] == 3
+    assert [entry['filename'] for entry in plan['files']] == [
+        'BTCUSDT_2024-01-04_trade.csv.gz', 'BTCUSDT_2024-01-05_trade.csv.gz'
+    ]
+    assert bybit.requests_for('/files/') == []
+    manifest = DownloadManifest(manifest_path)
+    try:
+        for path in (tmp_path / 'data' / 'spot' / 'trade' / 'BTCUSDT').iterdir():
+            assert manifest.get(path) is None
+    finally:
+        manifest.close()
@@ -0,0 +1,85 @@
+import multiprocessing
+import threading
+import time
+
+import pytest
+
+from bybit_data_downloader import ByBitHistoricalDataDownloader
+from bybit_data_downloader.historical.RateLimiter import FileTokenBucket, TokenBucket
+
+RATE = 5
+FILES_PER_PROCESS = 10
+
+def run_process(base_url, rate_limit_dir, output_dir, symbol, ready, go):
+    """One of several processes sharing a download budget."""
+    ByBitHistoricalDataDownloader.BASE_URL = base_url
+    with ByBitHistoricalDataDownloader(parallel_downloads=4, timeout=10, download_rate_limit=RATE,
+                                       rate_limit_dir=rate_limit_dir) as downloader:
+        ready.set()
+        go.wait(timeout=60)
+        downloader.download_data(symbol, '2024-01-01', f"2024-01-{FILES_PER_PROCESS:02d}", 'spot', 'trade',
+                                 output_dir)
+
+def test_bucket_paces_after_burst():
+    bucket = TokenBucket(rate=10, burst=2)
+
+    started = time.monotonic()
+    for _ in range(7):
+        bucket.acquire()
+
+    # Two from the burst, then five at ten per second
+    assert time.monotonic() - started >= 0.45
+
+def test_file_bucket_shared_between_threads(tmp_path):
+    buckets = [FileTokenBucket(str(tmp_path / 'download.bucket'), rate=10, burst=2) for _ in range(2)]
+
+    started = time.monotonic()
+    threads = [threading.Thread(target=lambda bucket=bucket: [bucket.acquire() for _ in range(4)])
+               for bucket in buckets]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Eight tokens from one budget: a burst of two, then six at ten per second
+    assert time.monotonic() - started >= 0.55
+
+def test_processes_share_download_budget(bybit, tmp_path):
+    context = multiprocessing.get_context('spawn')
+    go = context.Event()
+    readies = []
+    processes = []
+    for symbol in ['BTCUSDT', 'ETHUSDT']:
+        ready = context.Event()
+        readies.append(ready)
+        processes.append(context.Process(target=run_process, args=(
+            bybit.url, str(tmp_path / 'limits'), str(tmp_path / 'data'), symbol, ready, go)))
+    for process in processes:
+        process.start()
+
+    try:
+        for ready in readies:
+            assert ready.wait(timeout=60)
+        go.set()
+        for process in processes:
+            process.join(timeout=60)
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.kill()
+
+    assert [process.exitcode for process in processes] == [0, 0]
+    times = sorted(bybit.arrival_times('/files/'))
+    assert len(times) == 2 * FILES_PER_PROCESS
+    # One budget for both: a burst of RATE, then RATE requests per second. Two
+    # separate budgets would finish in well under half the time.
+    minimum = (len(times) - RATE) / RATE
+    assert times[-1] - times[0] >= 0.9 * minimum
+    # And no second ever sees more than a burst plus a second's worth of requests
+    for i, start in enumerate(times):
+        assert sum(1 for at in times[i:] if at < start + 1.0) <= 2 * RATE + 1
+
+@pytest.mark.parametrize('rate', [0, -1])
+def test_rejects_non_positive_rate(rate):
+    with pytest.raises(ValueError):
+        TokenBucket(rate)
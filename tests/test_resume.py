@@ -0,0 +1,59 @@
+import pytest
+
+FILENAME = 'BTCUSDT_2024-01-01_trade.csv.gz'
+
+@pytest.fixture
+def symbol_dir(tmp_path):
+    path = tmp_path / 'spot' / 'trade' / 'BTCUSDT'
+    path.mkdir(parents=True)
+    return path
+
+def download(downloader, tmp_path):
+    return downloader(parallel_downloads=2).download_data('BTCUSDT', '2024-01-01', '2024-01-01', 'spot', 'trade', str(tmp_path))
+
+def test_resumes_part_file(downloader, bybit, symbol_dir, tmp_path):
+    data = bybit.content(FILENAME)
+    (symbol_dir / (FILENAME + '.part')).write_bytes(data[:1000])
+    (symbol_dir / (FILENAME + '.part.validator')).write_text('"v1"')
+
+    stats = download(downloader, tmp_path)
+
+    assert stats['downloaded'] == 1
+    assert (symbol_dir / FILENAME).read_bytes() == data
+    assert not (symbol_dir / (FILENAME + '.part')).exists()
+    assert not (symbol_dir / (FILENAME + '.part.validator')).exists()
+    [(_, headers)] = bybit.requests_for(FILENAME)
+    assert headers['Range'] == 'bytes=1000-'
+    assert headers['If-Range'] == '"v1"'
+
+def test_restarts_when_remote_file_changed(downloader, bybit, symbol_dir, tmp_path):
+    (symbol_dir / (FILENAME + '.part')).write_bytes(b'x' * 1000)
+    (symbol_dir / (FILENAME + '.part.validator')).write_text('"v0"')
+
+    stats = download(downloader, tmp_path)
+
+    # If-Range no longer matches, so the server sends the whole file
+    assert stats['downloaded'] == 1
+    assert (symbol_dir / FILENAME).read_bytes() == bybit.content(FILENAME)
+
+def test_discards_oversized_part_file(downloader, bybit, symbol_dir, tmp_path):
+    data = bybit.content(FILENAME)
+    (symbol_dir / (FILENAME + '.part')).write_bytes(data + b'garbage')
+
+    stats = download(downloader, tmp_path)
+
+    assert stats['downloaded'] == 1
+    assert (symbol_dir / FILENAME).read_bytes() == data
+    [(_, headers)] = bybit.requests_for(FILENAME)
+    assert 'Range' not in headers
+
+def test_retry_resumes_interrupted_transfer(downloader, bybit, symbol_dir, tmp_path):
+    bybit.fail(FILENAME, truncate=16384)
+
+    stats = download(downloader, tmp_path)
+
+    assert stats['downloaded'] == 1
+    assert (symbol_dir / FILENAME).read_bytes() == bybit.content(FILENAME)
+    first, second = bybit.requests_for(FILENAME)
+    assert 'Range' not in first[1]
+    assert second[1]['Range'] == 'bytes=16384-'
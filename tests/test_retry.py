@@ -0,0 +1,47 @@
+import time
+
+SETTINGS = {'parallel_downloads': 1, 'max_retries': 3, 'retry_base_delay': 0.3, 'retry_max_delay': 0.5}
+
+def requested_files(bybit):
+    return [path.rsplit('/', 1)[1] for path, _ in bybit.requests_for('/files/')]
+
+def test_retry_does_not_hold_worker(downloader, bybit, tmp_path):
+    bybit.fail(status=503)
+
+    stats = downloader(**SETTINGS).download_data('BTCUSDT', '2024-01-01', '2024-01-03', 'spot', 'trade', str(tmp_path))
+
+    assert stats['downloaded'] == 3
+    assert stats['failed'] == 0
+    assert stats['retries'] == 1
+    # The only worker moved on to the other files while the failed one waited
+    names = requested_files(bybit)
+    assert len(names) == 4
+    assert names[-1] == names[0]
+
+def test_honours_retry_after(downloader, bybit, tmp_path):
+    bybit.fail(status=429, retry_after='1')
+
+    started = time.monotonic()
+    stats = downloader(**SETTINGS).download_data('BTCUSDT', '2024-01-01', '2024-01-01', 'spot', 'trade', str(tmp_path))
+
+    assert stats['downloaded'] == 1
+    assert time.monotonic() - started >= 1.0
+
+def test_fatal_status_is_not_retried(downloader, bybit, tmp_path):
+    bybit.fail(status=404)
+
+    stats = downloader(**SETTINGS).download_data('BTCUSDT', '2024-01-01', '2024-01-01', 'spot', 'trade', str(tmp_path))
+
+    assert stats['failed'] == 1
+    assert stats['retries'] == 0
+    assert len(requested_files(bybit)) == 1
+
+def test_gives_up_after_max_retries(downloader, bybit, tmp_path):
+    bybit.fail(status=503, times=5)
+
+    stats = downloader(**SETTINGS).download_data('BTCUSDT', '2024-01-01', '2024-01-01', 'spot', 'trade',
+                                                 str(tmp_path), max_retries=2)
+
+    assert stats['failed'] == 1
+    assert stats['retries'] == 1
+    assert len(requested_files(bybit)) == 2
@@ -0,0 +1,49 @@
+import threading
+import time
+
+SETTINGS = {'parallel_downloads': 1, 'adaptive_concurrency': True, 'max_parallel_downloads': 4,
+            'scheduling': 'newest_first'}
+
+def test_adaptive_limit_keeps_scheduling_order(downloader, bybit, tmp_path):
+    scheduled = downloader(**SETTINGS)
+    bybit.delay = 0.05
+    attempted = []
+    real_attempt = scheduled._attempt_download
+
+    def attempt(file_info, output_dir, attempt_number):
+        attempted.append(file_info['filename'])
+        return real_attempt(file_info, output_dir, attempt_number)
+
+    scheduled._attempt_download = attempt
+    stats = scheduled.download_data('BTCUSDT', '2024-01-01', '2024-01-07', 'spot', 'trade', str(tmp_path))
+
+    assert stats['downloaded'] == 7
+    # The limit stays at 1 for the first window, so files leave the heap one at a time
+    assert stats['concurrency_limit'] == 1
+    expected = [f"BTCUSDT_2024-01-{day:02d}_trade.csv.gz" for day in range(7, 0, -1)]
+    assert attempted == expected
+    assert [path.rsplit('/', 1)[1] for path, _ in bybit.requests_for('/files/')] == expected
+
+def test_raised_limit_starts_waiting_files(downloader, tmp_path):
+    scheduled = downloader(**SETTINGS)
+    second_started = threading.Event()
+    real_attempt = scheduled._attempt_download
+    attempted = []
+
+    def attempt(file_info, output_dir, attempt_number):
+        attempted.append(file_info['filename'])
+        if len(attempted) == 1:
+            # Raise the limit once the pipeline waits on the only busy slot;
+            # the next file must start without waiting for this one
+            time.sleep(0.2)
+            scheduled._concurrency.set_bounds(2, 4)
+            assert second_started.wait(timeout=5)
+        else:
+            second_started.set()
+        return real_attempt(file_info, output_dir, attempt_number)
+
+    scheduled._attempt_download = attempt
+    stats = scheduled.download_data('BTCUSDT', '2024-01-01', '2024-01-03', 'spot', 'trade', str(tmp_path))
+
+    assert stats['downloaded'] == 3
+    assert second_started.is_set()
@@ -0,0 +1,38 @@
+FILENAME = 'ETHUSDT_2024-01-01_trade.csv.gz'
+
+def download(downloader, tmp_path):
+    segmented = downloader(parallel_downloads=2, segments=4, segment_threshold=1)
+    stats = segmented.download_data('ETHUSDT', '2024-01-01', '2024-01-01', 'spot', 'trade', str(tmp_path))
+    symbol_dir = tmp_path / 'spot' / 'trade' / 'ETHUSDT'
+    leftovers = [path.name for path in symbol_dir.iterdir()
+                 if path.name.endswith(('.part', '.seg', '.ranges', '.validator'))]
+    assert leftovers == []
+    return stats, symbol_dir
+
+def test_downloads_in_segments(downloader, bybit, tmp_path):
+    stats, symbol_dir = download(downloader, tmp_path)
+
+    assert stats['downloaded'] == 1
+    assert (symbol_dir / FILENAME).read_bytes() == bybit.content(FILENAME)
+    ranges = {headers['Range'] for _, headers in bybit.requests_for(FILENAME)}
+    assert len(ranges) == 4
+
+def test_retry_fetches_only_missing_segments(downloader, bybit, tmp_path):
+    bybit.fail(FILENAME, status=503)
+
+    stats, symbol_dir = download(downloader, tmp_path)
+
+    assert stats['downloaded'] == 1
+    assert (symbol_dir / FILENAME).read_bytes() == bybit.content(FILENAME)
+    ranges = [headers['Range'] for _, headers in bybit.requests_for(FILENAME)]
+    # Four segments plus one repeat of the segment that failed
+    assert len(ranges) == 5
+    assert len(set(ranges)) == 4
+
+def test_falls_back_without_range_support(downloader, bybit, tmp_path):
+    bybit.ranges = False
+
+    stats, symbol_dir = download(downloader, tmp_path)
+
+    assert stats['downloaded'] == 1
+    assert (symbol_dir / FILENAME).read_bytes() == bybit.content(FILENAME)
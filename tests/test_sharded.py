@@ -0,0 +1,86 @@
+import multiprocessing
+import sqlite3
+import time
+
+from bybit_data_downloader import ByBitHistoricalDataDownloader
+from bybit_data_downloader.historical.LeaseStore import LeaseStore
+
+SYMBOLS = ['BTCUSDT', 'ETHUSDT', 'SOLUSDT']
+NODES = 3
+PARALLEL_DOWNLOADS = 2
+
+def run_node(base_url, lease_path, output_dir, node_index, results):
+    """One node of the sharded download, run in its own process."""
+    ByBitHistoricalDataDownloader.BASE_URL = base_url
+    with ByBitHistoricalDataDownloader(parallel_downloads=PARALLEL_DOWNLOADS, timeout=10) as downloader:
+        stats = downloader.download_sharded(SYMBOLS, ['spot'], ['trade'], '2024-01-01', '2024-01-08',
+                                            lease_path, node_index, NODES, output_dir,
+                                            symbols_per_request=1, lease_seconds=1.5)
+    results.put((node_index, stats))
+
+def nodes_holding_leases(lease_path):
+    """Indexes of the nodes that currently lease unfinished items."""
+    try:
+        with sqlite3.connect(lease_path, timeout=10) as conn:
+            owners = conn.execute("SELECT DISTINCT owner FROM items "
+                                  "WHERE state = 'pending' AND owner IS NOT NULL").fetchall()
+    except sqlite3.OperationalError:
+        # Table not created yet
+        return []
+    return sorted(int(owner.rsplit(':', 1)[1]) for owner, in owners)
+
+def test_nodes_take_over_from_killed_node(bybit, tmp_path):
+    bybit.delay = 0.2
+    lease_path = str(tmp_path / 'leases.sqlite')
+    output_dir = tmp_path / 'data'
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    nodes = [context.Process(target=run_node, args=(bybit.url, lease_path, str(output_dir), index, results))
+             for index in range(NODES)]
+    for node in nodes:
+        node.start()
+
+    try:
+        # Kill a node while it holds leases and transfers are under way
+        deadline = time.time() + 60
+        while True:
+            holding = nodes_holding_leases(lease_path)
+            if holding and len(bybit.requests_for('/files/')) >= 3:
+                break
+            assert time.time() < deadline, "no node started working"
+            time.sleep(0.02)
+        killed = holding[0]
+        nodes[killed].kill()
+        survivors = [index for index in range(NODES) if index != killed]
+
+        finished = dict(results.get(timeout=60) for _ in range(NODES - 1))
+        for node in nodes:
+            node.join(timeout=60)
+    finally:
+        for node in nodes:
+            if node.is_alive():
+                node.kill()
+
+    assert sorted(finished) == survivors
+    assert [nodes[index].exitcode for index in survivors] == [0, 0]
+
+    for symbol in SYMBOLS:
+        symbol_dir = output_dir / 'spot' / 'trade' / symbol
+        names = sorted(path.name for path in symbol_dir.glob('*.csv.gz'))
+        assert names == [f"{symbol}_2024-01-{day:02d}_trade.csv.gz" for day in range(1, 9)]
+        for name in names:
+            assert (symbol_dir / name).read_bytes() == bybit.content(name)
+        assert not [path for path in symbol_dir.iterdir()
+                    if path.name.endswith(('.part', '.seg', '.ranges', '.validator'))]
+
+    # Only files the killed node had in flight were fetched twice
+    full_transfers = [path for path, headers in bybit.requests_for('/files/') if 'Range' not in headers]
+    assert len(full_transfers) - len(set(full_transfers)) <= PARALLEL_DOWNLOADS
+
+    with sqlite3.connect(lease_path) as conn:
+        [(job_id,)] = conn.execute("SELECT DISTINCT job_id FROM items").fetchall()
+    store = LeaseStore(lease_path, job_id, 'test')
+    try:
+        assert store.counts() == {'done': 6}
+    finally:
+        store.close()
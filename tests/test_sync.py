@@ -0,0 +1,30 @@
+def test_continues_after_latest_local_day(downloader, bybit, tmp_path):
+    syncing = downloader(parallel_downloads=2)
+    syncing.download_data('BTCUSDT', '2024-01-01', '2024-01-03', 'spot', 'trade', str(tmp_path))
+    bybit.requests.clear()
+
+    stats = syncing.sync('BTCUSDT', 'spot', 'trade', until='2024-01-05', output_dir=str(tmp_path))
+
+    assert stats['missing_days'] == 2
+    assert stats['downloaded'] == 2
+    assert stats['skipped_symbols'] == []
+    requested = sorted(path.rsplit('/', 1)[1] for path, _ in bybit.requests_for('/files/'))
+    assert requested == ['BTCUSDT_2024-01-04_trade.csv.gz', 'BTCUSDT_2024-01-05_trade.csv.gz']
+
+def test_skips_symbols_without_local_data(downloader, bybit, tmp_path):
+    syncing = downloader(parallel_downloads=2)
+    syncing.download_data('BTCUSDT', '2024-01-01', '2024-01-03', 'spot', 'trade', str(tmp_path))
+
+    stats = syncing.sync(['BTCUSDT', 'ETHUSDT'], 'spot', 'trade', until='2024-01-04',
+                         output_dir=str(tmp_path))
+
+    assert stats['downloaded'] == 1
+    assert stats['skipped_symbols'] == ['ETHUSDT']
+    assert not (tmp_path / 'spot' / 'trade' / 'ETHUSDT').exists()
+
+def test_nothing_to_sync_reports_skipped(downloader, tmp_path):
+    stats = downloader(parallel_downloads=2).sync('ETHUSDT', 'spot', 'trade', until='2024-01-04',
+                                                  output_dir=str(tmp_path))
+
+    assert stats == {'total_files': 0, 'downloaded': 0, 'failed': 0, 'missing_days': 0,
+                     'skipped_symbols': ['ETHUSDT']}
@@ -0,0 +1,28 @@
+import zlib
+
+from bybit_data_downloader.historical.DownloadManifest import DownloadManifest
+
+def download(downloader, tmp_path):
+    with downloader:
+        stats = downloader.download_data('BTCUSDT', '2024-01-01', '2024-01-03', 'spot', 'trade',
+                                         str(tmp_path / 'data'))
+    assert stats['downloaded'] == 3
+    return tmp_path / 'data' / 'spot' / 'trade' / 'BTCUSDT'
+
+def test_only_data_files_written(downloader, tmp_path):
+    symbol_dir = download(downloader(parallel_downloads=2), tmp_path)
+
+    assert sorted(path.name for path in symbol_dir.iterdir()) == [
+        f"BTCUSDT_2024-01-{day:02d}_trade.csv.gz" for day in range(1, 4)
+    ]
+
+def test_checksums_recorded_in_manifest(downloader, bybit, tmp_path):
+    manifest_path = str(tmp_path / 'manifest.sqlite')
+    symbol_dir = download(downloader(parallel_downloads=2, manifest_path=manifest_path), tmp_path)
+
+    manifest = DownloadManifest(manifest_path)
+    for path in symbol_dir.iterdir():
+        record = manifest.get(path)
+        assert record['valid']
+        assert record['checksum'] == f"{zlib.crc32(bybit.content(path.name)):08x}"
+    manifest.close()
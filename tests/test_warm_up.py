@@ -0,0 +1,32 @@
+import time
+
+def test_warm_up_opens_connections(downloader, bybit):
+    warming = downloader(parallel_downloads=4, warm_connections=4)
+
+    assert warming.warm_up(f"{bybit.url}/files/BTCUSDT_2024-01-01_trade.csv.gz") == 4
+    assert len(bybit.connections) == 4
+
+def test_warm_up_respects_download_rate_limit(downloader, bybit):
+    limited = downloader(parallel_downloads=4, download_rate_limit=2)
+    started = time.monotonic()
+    opened = limited.warm_up(f"{bybit.url}/files/BTCUSDT_2024-01-01_trade.csv.gz", 4)
+
+    # A burst of two, then two more at two per second
+    assert opened == 4
+    assert time.monotonic() - started >= 0.9
+
+def test_warm_up_after_close(downloader, bybit):
+    closed = downloader(parallel_downloads=4, warm_connections=4)
+    closed.close()
+
+    assert closed.warm_up(f"{bybit.url}/files/BTCUSDT_2024-01-01_trade.csv.gz") == 0
+
+def test_transfers_reuse_warmed_connections(downloader, bybit, tmp_path):
+    bybit.delay = 0.05
+
+    warming = downloader(parallel_downloads=4, warm_connections=4)
+    stats = warming.download_data('BTCUSDT', '2024-01-01', '2024-01-07', 'spot', 'trade', str(tmp_path))
+
+    assert stats['downloaded'] == 7
+    # The listing connection plus the four warmed ones; transfers open none of their own
+    assert len(bybit.connections) <= 5